@@ -0,0 +1,120 @@
+import numpy as np
+from typing import Dict, List, Any, Tuple
+
+from risk_engine.ecological_risk import AdvancedRiskEngine, RISK_LEVELS, MAX_RISK_SCORE
+from data_processing.satellite_features import SatelliteProcessor, LAND_USE_CODES
+
+# SeedSequence words for the ensemble draws, distinct from the single-run SCENARIO_STREAM
+ENSEMBLE_STREAM = 2
+WARMING_STREAM = 3
+# Realizations x cells evaluated per block, bounding the working arrays to a few tens of MB
+BLOCK_ELEMENTS = 1 << 21
+PERCENTILES = (10, 90)
+
+class ScenarioEnsemble:
+    """
+    Monte Carlo version of the what-if simulation: N realizations of the urban
+    conversion draws (and, optionally, of the regional warming) are scored as
+    (realizations x cells) arrays with the vectorized rule engine.
+
+    Scores are small integers, so each cell only keeps a histogram over
+    0..MAX_RISK_SCORE; means, percentiles and level probabilities are exact
+    and memory does not grow with N.
+    """
+
+    def __init__(self, processor: SatelliteProcessor):
+        self.processor = processor
+
+    def run(self, bbox: Tuple[float, float, float, float], grid_size: int, urban_growth_pct: float,
+            temp_increase: float, realizations: int, temp_increase_sd: float = 0.0) -> Dict[str, Any]:
+        min_lat, min_lng, max_lat, max_lng = bbox
+        seed = SatelliteProcessor.grid_seed(min_lat, min_lng, max_lat, max_lng, grid_size)
+        # One warming offset per realization, shared by the whole region
+        warming = np.full(realizations, float(temp_increase))
+        if temp_increase_sd > 0:
+            warming += np.random.default_rng([seed, WARMING_STREAM]).normal(0.0, temp_increase_sd, realizations)
+
+        cells = []
+        high_cells = np.zeros(realizations, dtype=np.int64)
+        tiles_per_side, _ = self.processor.tile_layout(grid_size)
+        for tile_row in range(tiles_per_side):
+            for tile_col in range(tiles_per_side):
+                grid = self.processor.get_tile_columns(min_lat, min_lng, max_lat, max_lng, grid_size, tile_row, tile_col, seed)
+                rng = np.random.default_rng([seed, tile_row, tile_col, ENSEMBLE_STREAM])
+                histogram = self.score_histogram(grid, rng, urban_growth_pct, warming, high_cells)
+                cells.extend(self.summarize(grid, histogram, realizations))
+        cells.sort(key=lambda cell: (cell["row"], cell["col"]))
+
+        low, high = np.percentile(high_cells, PERCENTILES, method="inverted_cdf")
+        return {
+            "realizations": realizations,
+            "grid": [{key: value for key, value in cell.items() if key not in ("row", "col")} for cell in cells],
+            "summary": {
+                "cells": grid_size * grid_size,
+                "high_risk_cells": {
+                    "mean": round(float(high_cells.mean()), 2),
+                    f"p{PERCENTILES[0]}": int(low),
+                    f"p{PERCENTILES[1]}": int(high)
+                },
+                "mean_risk_score": round(float(np.mean([cell["risk_score"]["mean"] for cell in cells])), 3)
+            }
+        }
+
+    @staticmethod
+    def score_histogram(grid: Dict[str, np.ndarray], rng: np.random.Generator, urban_growth_pct: float,
+                        warming: np.ndarray, high_cells: np.ndarray) -> np.ndarray:
+        """
+        (cells, MAX_RISK_SCORE + 1) counts of each score over all realizations.
+        Also adds each realization's number of High cells into high_cells.
+        """
+        ndvi, land_use = grid["ndvi"], grid["land_use"]
+        temperature, water_index = grid["temperature"], grid["water_index"]
+        n_cells, realizations = land_use.size, warming.size
+        convertible = land_use != LAND_USE_CODES["urban"]
+        histogram = np.zeros((n_cells, MAX_RISK_SCORE + 1), dtype=np.int64)
+        block = max(1, BLOCK_ELEMENTS // n_cells)
+
+        for start in range(0, realizations, block):
+            stop = min(start + block, realizations)
+            # Same conversion rule as RegionAnalyzer.apply_scenario, one row per realization;
+            # blocks draw consecutively from one generator, so results do not depend on the block size
+            converted = convertible & (rng.random((stop - start, n_cells)) < (urban_growth_pct / 100.0))
+            batch = AdvancedRiskEngine.score_batch(
+                np.where(converted, ndvi * 0.4, ndvi),
+                np.where(converted, LAND_USE_CODES["urban"], land_use),
+                temperature + warming[start:stop, None] + 3.0 * converted,
+                np.where(converted, water_index * 0.5, water_index)
+            )
+            high_cells[start:stop] += (batch["level_idx"] == 2).sum(axis=1)
+            # Per-cell histogram: offset each cell's scores into its own bin range
+            flat = batch["risk_score"] + np.arange(n_cells) * (MAX_RISK_SCORE + 1)
+            histogram += np.bincount(flat.ravel(), minlength=n_cells * (MAX_RISK_SCORE + 1)).reshape(n_cells, -1)
+        return histogram
+
+    @staticmethod
+    def summarize(grid: Dict[str, np.ndarray], histogram: np.ndarray, realizations: int) -> List[Dict[str, Any]]:
+        scores = np.arange(MAX_RISK_SCORE + 1)
+        mean = histogram @ scores / realizations
+        cumulative = np.cumsum(histogram, axis=1)
+        # Inverted-CDF percentiles: smallest score whose cumulative share reaches q
+        percentiles = [np.argmax(cumulative * 100 >= q * realizations, axis=1) for q in PERCENTILES]
+        score_levels = AdvancedRiskEngine.level_index(scores)
+        level_probs = np.stack([
+            histogram[:, score_levels == level].sum(axis=1) for level in range(len(RISK_LEVELS))
+        ], axis=1) / realizations
+
+        return [
+            {
+                "row": i,
+                "col": j,
+                "grid_id": f"{i}_{j}",
+                "location": {"lat": lat, "lng": lng},
+                "risk_score": {"mean": round(m, 3), f"p{PERCENTILES[0]}": lo, f"p{PERCENTILES[1]}": hi},
+                "level_probabilities": {level: round(p, 4) for level, p in zip(RISK_LEVELS, probs)},
+                "p_high": round(probs[2], 4)
+            }
+            for i, j, lat, lng, m, lo, hi, probs in zip(
+                grid["row"].tolist(), grid["col"].tolist(), grid["lat"].tolist(), grid["lng"].tolist(),
+                mean.tolist(), percentiles[0].tolist(), percentiles[1].tolist(), level_probs.tolist()
+            )
+        ]
@@ -0,0 +1,99 @@
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Any
+
+from data_processing.rng import stable_seed, counter_uniform
+
+FORECAST_EVENTS = [
+    "Stable climate patterns",
+    "Minor thermal anomaly detected",
+    "Potential heatwave window",
+    "Moisture stress in canopy",
+    "Increased urban encroachment signal",
+    "Positive reforestation impact",
+    "Migratory pattern shift",
+    "Expected precipitation cooling"
+]
+# Risk shift each event implies (heatwaves and encroachment raise risk, cooling and reforestation lower it)
+EVENT_RISK_SHIFT = np.array([
+    1.2 if "heatwave" in e.lower() or "encroachment" in e.lower()
+    else -0.8 if "cooling" in e.lower() or "reforestation" in e.lower()
+    else 0.0
+    for e in FORECAST_EVENTS
+])
+FORECAST_DAYS = 7
+
+# Alerts are served by reference; entries must not be mutated
+ALERT_CATALOG = [
+    {"type": "Fire Risk", "severity": "High", "desc": "High thermal anomaly detected in northern sector."},
+    {"type": "Deforestation", "severity": "Medium", "desc": "Unusual canopy loss detected via NDVI temporal analysis."},
+    {"type": "Illegal Logging", "severity": "High", "desc": "Acoustic sensors triggered in protected buffer zone."},
+    {"type": "Extreme Heat", "severity": "Medium", "desc": "Extended dry spell impacting primary growth."},
+    {"type": "Invasive Species", "severity": "Low", "desc": "Suspicious spectral signatures detected in wetland zone."}
+]
+
+# Counter streams of the per-location draws
+INSIGHT_SEED = stable_seed("insights")
+FORECAST_STREAM = 1
+ALERT_STREAM = 2
+
+class InsightEngine:
+    """
+    Short-term risk forecasts and active alerts for many locations at once.
+
+    Every draw is a counter-based hash of (stream, location, draw index), so
+    each location gets the same payload whether it is requested alone or in a
+    batch, and a batch is a handful of (locations x draws) array operations.
+    """
+
+    @staticmethod
+    def location_counters(lats: np.ndarray, lngs: np.ndarray):
+        """
+        Non-negative integer keys for locations, at 1e-7 degree resolution.
+        """
+        lat_key = np.round((np.asarray(lats, dtype=np.float64) + 90.0) * 1e7).astype(np.int64)
+        lng_key = np.round((np.asarray(lngs, dtype=np.float64) + 180.0) * 1e7).astype(np.int64)
+        return lat_key, lng_key
+
+    @staticmethod
+    def forecast_batch(lats: np.ndarray, lngs: np.ndarray, start: datetime = None) -> List[List[Dict[str, Any]]]:
+        """
+        FORECAST_DAYS daily risk outlooks per location.
+        """
+        lat_key, lng_key = InsightEngine.location_counters(lats, lngs)
+        # Draw 0: event offset, 1: base risk, 2..: daily variation
+        draws = counter_uniform(INSIGHT_SEED, FORECAST_STREAM, lat_key[:, None], lng_key[:, None],
+                                np.arange(FORECAST_DAYS + 2))
+        event_offset = (draws[:, 0] * 1000).astype(np.int64)
+        base_risk = 3 + (draws[:, 1] * 4).astype(np.int64)
+        days = np.arange(FORECAST_DAYS)
+        event_idx = (event_offset[:, None] + days) % len(FORECAST_EVENTS)
+        variation = -0.3 + 1.1 * draws[:, 2:] + EVENT_RISK_SHIFT[event_idx]
+        risk = np.clip(base_risk[:, None] + variation + days * 0.2, 0, 10)
+        labels = np.where(risk > 7, "High", np.where(risk > 4, "Medium", "Low"))
+
+        start = start or datetime.now()
+        dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(FORECAST_DAYS)]
+        return [
+            [
+                {"date": day, "risk_score": round(score, 1), "label": label, "event": FORECAST_EVENTS[event]}
+                for day, score, label, event in zip(dates, scores, point_labels, events)
+            ]
+            for scores, point_labels, events in zip(np.round(risk, 1).tolist(), labels.tolist(), event_idx.tolist())
+        ]
+
+    @staticmethod
+    def alerts_batch(lats: np.ndarray, lngs: np.ndarray) -> List[List[Dict[str, str]]]:
+        """
+        Two or three alerts from ALERT_CATALOG per location, stable for that location.
+        """
+        lat_key, lng_key = InsightEngine.location_counters(lats, lngs)
+        # Draw 0: alert count; 1..: sort keys giving a random order of the catalog
+        draws = counter_uniform(INSIGHT_SEED, ALERT_STREAM, lat_key[:, None], lng_key[:, None],
+                                np.arange(len(ALERT_CATALOG) + 1))
+        counts = 2 + (draws[:, 0] < 0.5)
+        order = np.argsort(draws[:, 1:], axis=1)
+        return [
+            [ALERT_CATALOG[i] for i in ranked[:count]]
+            for ranked, count in zip(order.tolist(), counts.tolist())
+        ]
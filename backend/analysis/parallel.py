@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Tuple
+
+import numpy as np
+
+from analysis.pipeline import RegionAnalyzer
+from data_processing.satellite_features import SatelliteProcessor
+from data_processing.raster import RasterSource
+from ml.registry import ModelRegistry
+from ml.risk_model import BiodiversityRiskModel
+from monitoring.metrics import metrics
+
+# Analyzer rebuilt once per worker process by _init_worker
+_worker_analyzer = None
+
+def analyzer_spec(analyzer: RegionAnalyzer) -> Dict[str, Any]:
+    """
+    Picklable description of an analyzer (configuration only, no open files or loaded models).
+    """
+    processor, model = analyzer.processor, analyzer.model
+    return {
+        "grid_size": processor.grid_size,
+        "tile_size": processor.tile_size,
+        "raster_paths": [scene.path for scene in processor.source.scenes] if processor.source is not None else [],
+        "pyramid_path": processor.pyramid.path if processor.pyramid is not None else None,
+        "registry_root": model.registry.root,
+        "registry_verify": model.registry.verify,
+        "artifact_name": model.artifact_name,
+        "engine": model.engine
+    }
+
+def build_analyzer(spec: Dict[str, Any]) -> RegionAnalyzer:
+    pyramid = None
+    if spec["pyramid_path"]:
+        from data_processing.pyramid import TilePyramid
+        pyramid = TilePyramid(spec["pyramid_path"])
+    processor = SatelliteProcessor(
+        grid_size=spec["grid_size"],
+        tile_size=spec["tile_size"],
+        source=RasterSource.from_paths(spec["raster_paths"]) if spec["raster_paths"] else None,
+        pyramid=pyramid
+    )
+    model = BiodiversityRiskModel(ModelRegistry(spec["registry_root"], spec["registry_verify"]), spec["artifact_name"], spec["engine"])
+    return RegionAnalyzer(processor, model)
+
+def _init_worker(spec: Dict[str, Any]) -> None:
+    global _worker_analyzer
+    _worker_analyzer = build_analyzer(spec)
+
+def _analyze_tile(bbox: Tuple[float, float, float, float], grid_size: int, tile_row: int, tile_col: int,
+                  urban_growth_pct: float, temp_increase: float, columnar: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    if columnar:
+        result = _worker_analyzer.analyze_tile_columns(bbox, grid_size, tile_row, tile_col, urban_growth_pct, temp_increase)
+    else:
+        grid, cells = _worker_analyzer.analyze_tile(bbox, grid_size, tile_row, tile_col, urban_growth_pct, temp_increase)
+        # Only the row-major indices travel back, not the feature columns
+        result = ((grid["row"] * grid_size + grid["col"]).tolist(), cells)
+    # Plus the stage timings since the worker's last tile
+    return result, metrics.collect(reset=True)
+
+class TileExecutor:
+    """
+    Runs region analyses tile by tile across a process pool.
+
+    Workers are spawned (not forked) and rebuild the analyzer from its spec, so
+    they share nothing with the API process but the artifact files. Regions
+    of a single tile, or any region with max_workers <= 1, run in the calling
+    thread. Results always come back in grid order, identical to RegionAnalyzer.
+    """
+
+    def __init__(self, analyzer: RegionAnalyzer, max_workers: int = None):
+        self.analyzer = analyzer
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def parallel(self) -> bool:
+        return self.max_workers > 1
+
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(analyzer_spec(self.analyzer),)
+                )
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def analyze(self, bbox: Tuple[float, float, float, float], grid_size: int,
+                urban_growth_pct: float = 0.0, temp_increase: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Same as RegionAnalyzer.analyze, with the tiles computed in parallel.
+        """
+        results = [None] * (grid_size * grid_size)
+        for _, _, indices, cells in self.iter_tiles(bbox, grid_size, urban_growth_pct, temp_increase):
+            for index, cell in zip(indices, cells):
+                results[index] = cell
+        return results
+
+    def iter_tiles(self, bbox: Tuple[float, float, float, float], grid_size: int, urban_growth_pct: float = 0.0,
+                   temp_increase: float = 0.0) -> Iterator[Tuple[int, int, List[int], List[Dict[str, Any]]]]:
+        """
+        Yields (tile_row, tile_col, row_major_indices, cell_results) in tile order.
+        At most 2 * max_workers tiles are in flight, which bounds memory for huge grids.
+        """
+        for tile_row, tile_col, (indices, cells) in self._run_tiles(bbox, grid_size, urban_growth_pct, temp_increase):
+            yield tile_row, tile_col, indices, cells
+
+    def analyze_columns(self, bbox: Tuple[float, float, float, float], grid_size: int,
+                        urban_growth_pct: float = 0.0, temp_increase: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        The whole region as RegionAnalyzer.analyze_tile_columns columns, cells in row-major order.
+        """
+        tiles = [columns for _, _, columns in
+                 self._run_tiles(bbox, grid_size, urban_growth_pct, temp_increase, columnar=True)]
+        if len(tiles) == 1:
+            return tiles[0]
+        grid = {key: np.concatenate([tile[key] for tile in tiles]) for key in tiles[0]}
+        order = np.argsort(grid["row"] * grid_size + grid["col"])
+        return {key: values[order] for key, values in grid.items()}
+
+    def _run_tiles(self, bbox: Tuple[float, float, float, float], grid_size: int, urban_growth_pct: float,
+                   temp_increase: float, columnar: bool = False) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Yields (tile_row, tile_col, _analyze_tile result) in tile order, from the pool when parallel.
+        """
+        tiles_per_side, _ = self.analyzer.processor.tile_layout(grid_size)
+        tiles = [(tile_row, tile_col) for tile_row in range(tiles_per_side) for tile_col in range(tiles_per_side)]
+        if not self.parallel or len(tiles) == 1:
+            for tile_row, tile_col in tiles:
+                args = (bbox, grid_size, tile_row, tile_col, urban_growth_pct, temp_increase)
+                if columnar:
+                    yield tile_row, tile_col, self.analyzer.analyze_tile_columns(*args)
+                else:
+                    grid, cells = self.analyzer.analyze_tile(*args)
+                    yield tile_row, tile_col, ((grid["row"] * grid_size + grid["col"]).tolist(), cells)
+            return
+
+        pool = self.pool()
+        pending = deque()
+        remaining = iter(tiles)
+        try:
+            for tile in remaining:
+                pending.append((tile, pool.submit(_analyze_tile, bbox, grid_size, *tile, urban_growth_pct, temp_increase, columnar)))
+                if len(pending) >= 2 * self.max_workers:
+                    break
+            while pending:
+                (tile_row, tile_col), future = pending.popleft()
+                result, stage_metrics = future.result()
+                metrics.merge(stage_metrics)
+                next_tile = next(remaining, None)
+                if next_tile is not None:
+                    pending.append((next_tile, pool.submit(_analyze_tile, bbox, grid_size, *next_tile, urban_growth_pct, temp_increase, columnar)))
+                yield tile_row, tile_col, result
+        finally:
+            # Abandoned streams (client disconnects) should not keep the workers busy
+            for _, future in pending:
+                future.cancel()
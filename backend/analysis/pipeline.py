@@ -0,0 +1,171 @@
+import numpy as np
+from typing import Dict, List, Any, Iterator, Tuple
+
+from risk_engine.ecological_risk import AdvancedRiskEngine
+from ml.risk_model import BiodiversityRiskModel
+from data_processing.satellite_features import SatelliteProcessor, LAND_USE_CODES
+from data_processing.world_grid import WorldGrid, SCENARIO_DRAW
+from monitoring.metrics import metrics
+
+# Extra SeedSequence word separating the scenario draws from the feature draws of a tile
+SCENARIO_STREAM = 1
+
+class RegionAnalyzer:
+    """
+    Runs the satellite -> scenario -> rule engine -> ML pipeline over a region,
+    either as one grid or tile by tile for large resolutions.
+    """
+    
+    def __init__(self, processor: SatelliteProcessor, model: BiodiversityRiskModel):
+        self.processor = processor
+        self.model = model
+
+    def analyze(self, bbox: Tuple[float, float, float, float], grid_size: int,
+                urban_growth_pct: float = 0.0, temp_increase: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Scores every cell of the region and returns the results in row-major grid order.
+        """
+        results = [None] * (grid_size * grid_size)
+        for _, _, grid, cells in self.iter_tiles(bbox, grid_size, urban_growth_pct, temp_increase):
+            for index, cell in zip((grid["row"] * grid_size + grid["col"]).tolist(), cells):
+                results[index] = cell
+        return results
+
+    def iter_tiles(self, bbox: Tuple[float, float, float, float], grid_size: int,
+                   urban_growth_pct: float = 0.0,
+                   temp_increase: float = 0.0) -> Iterator[Tuple[int, int, Dict[str, np.ndarray], List[Dict[str, Any]]]]:
+        """
+        Yields (tile_row, tile_col, columns, cell_results) as each tile finishes.
+        """
+        tiles_per_side, _ = self.processor.tile_layout(grid_size)
+        for tile_row in range(tiles_per_side):
+            for tile_col in range(tiles_per_side):
+                grid, cells = self.analyze_tile(bbox, grid_size, tile_row, tile_col, urban_growth_pct, temp_increase)
+                yield tile_row, tile_col, grid, cells
+
+    def analyze_tile(self, bbox: Tuple[float, float, float, float], grid_size: int, tile_row: int, tile_col: int,
+                     urban_growth_pct: float = 0.0,
+                     temp_increase: float = 0.0) -> Tuple[Dict[str, np.ndarray], List[Dict[str, Any]]]:
+        """
+        Runs the pipeline for one tile; the result depends only on its arguments,
+        so tiles can be computed in any order or process.
+        """
+        grid = self.tile_features(bbox, grid_size, tile_row, tile_col, urban_growth_pct, temp_increase)
+        return grid, self.score_columns(grid)
+
+    def analyze_tile_columns(self, bbox: Tuple[float, float, float, float], grid_size: int, tile_row: int,
+                             tile_col: int, urban_growth_pct: float = 0.0,
+                             temp_increase: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Columnar analyze_tile: the feature columns plus the score() columns, without per-cell dicts.
+        """
+        grid = self.tile_features(bbox, grid_size, tile_row, tile_col, urban_growth_pct, temp_increase)
+        grid.update(self.score(grid))
+        return grid
+
+    def tile_features(self, bbox: Tuple[float, float, float, float], grid_size: int, tile_row: int, tile_col: int,
+                      urban_growth_pct: float = 0.0, temp_increase: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Feature columns of one tile with the what-if scenario applied.
+        """
+        min_lat, min_lng, max_lat, max_lng = bbox
+        seed = SatelliteProcessor.grid_seed(min_lat, min_lng, max_lat, max_lng, grid_size)
+        grid = self.processor.get_tile_columns(min_lat, min_lng, max_lat, max_lng, grid_size, tile_row, tile_col, seed)
+        # Scenario draws use a sibling stream of the same request seed; they do not depend
+        # on urban_growth_pct, so converted cells are nested as the growth rate increases
+        sim_rng = np.random.default_rng([seed, tile_row, tile_col, SCENARIO_STREAM])
+        with metrics.span("scenario"):
+            self.apply_scenario(grid, sim_rng.random(grid["land_use"].size), urban_growth_pct, temp_increase)
+        return grid
+
+    def analyze_world_cells(self, level: int, rows: np.ndarray, cols: np.ndarray, urban_growth_pct: float = 0.0,
+                            temp_increase: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Runs the pipeline for the given cells of a WorldGrid level; each result
+        carries its world cell id and depends only on that cell and the scenario.
+        """
+        results = self.score_columns(self.world_cell_features(level, rows, cols, urban_growth_pct, temp_increase))
+        for result, cell_id in zip(results, WorldGrid.cell_ids(level, rows, cols)):
+            result["grid_id"] = result["indicators"]["grid_id"] = cell_id
+        return results
+
+    def world_cell_features(self, level: int, rows: np.ndarray, cols: np.ndarray, urban_growth_pct: float = 0.0,
+                            temp_increase: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Feature columns of WorldGrid cells with the what-if scenario applied.
+        """
+        grid = self.processor.world_cell_columns(level, rows, cols)
+        with metrics.span("scenario"):
+            self.apply_scenario(grid, WorldGrid.cell_uniform(level, rows, cols, SCENARIO_DRAW),
+                                urban_growth_pct, temp_increase)
+        return grid
+
+    @staticmethod
+    def apply_scenario(grid: Dict[str, np.ndarray], draws: np.ndarray,
+                       urban_growth_pct: float, temp_increase: float) -> None:
+        """
+        Applies the what-if simulation (warming + urban conversion) to the columns in place.
+        draws holds one uniform [0, 1) value per cell; a cell converts when its draw is below the growth rate.
+        """
+        ndvi, land_use = grid["ndvi"], grid["land_use"]
+        temperature, water_index = grid["temperature"], grid["water_index"]
+        
+        temperature += temp_increase
+        converted = (land_use != LAND_USE_CODES["urban"]) & (draws < (urban_growth_pct / 100.0))
+        land_use[converted] = LAND_USE_CODES["urban"]
+        ndvi[converted] *= 0.4
+        water_index[converted] *= 0.5
+        temperature[converted] += 3.0
+
+    def score_columns(self, grid: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Scores a block of cells and builds the per-cell response dicts.
+        """
+        return self.build_results(grid, self.score(grid))
+
+    def score(self, grid: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        One vectorized rule pass and one model call over a block of cells: risk_score,
+        level_idx, reason_codes, ml_prediction_idx and ml_probabilities columns.
+        """
+        ndvi, land_use = grid["ndvi"], grid["land_use"]
+        temperature, water_index = grid["temperature"], grid["water_index"]
+        
+        with metrics.span("rule_scoring"):
+            scores = AdvancedRiskEngine.score_batch(ndvi, land_use, temperature, water_index)
+        ml_batch = self.model.predict_batch(np.stack([ndvi, land_use, temperature, water_index], axis=1))
+        scores["ml_prediction_idx"] = ml_batch["prediction_idx"]
+        scores["ml_probabilities"] = ml_batch["probabilities"]
+        return scores
+
+    def build_results(self, grid: Dict[str, np.ndarray], scores: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Per-cell response dicts from feature and score() columns.
+        """
+        rule_batch = {
+            "risk_score": scores["risk_score"],
+            "level_idx": scores["level_idx"],
+            "reason_codes": scores["reason_codes"]
+        }
+        ml_batch = {"prediction_idx": scores["ml_prediction_idx"], "probabilities": scores["ml_probabilities"]}
+        
+        # Per-cell dicts are only built here, at the JSON boundary
+        with metrics.span("cell_records"):
+            rule_batch["reasons"] = AdvancedRiskEngine.reasons_for(scores["reason_codes"], grid["temperature"])
+            results = []
+            for cell, rule_results, ml_results in zip(
+                SatelliteProcessor.columns_to_cells(grid),
+                AdvancedRiskEngine.batch_to_records(rule_batch),
+                self.model.batch_to_records(ml_batch)
+            ):
+                # Species Impacts & Interventions come from tables indexed by the reason codes
+                results.append({
+                    "grid_id": cell["grid_id"],
+                    "location": {"lat": cell["lat"], "lng": cell["lng"]},
+                    "indicators": cell,
+                    "rules": rule_results,
+                    "ml": ml_results,
+                    "impacts": AdvancedRiskEngine.impacts_for(rule_results["reason_codes"]),
+                    "interventions": AdvancedRiskEngine.interventions_for(rule_results["reason_codes"])
+                })
+        return results
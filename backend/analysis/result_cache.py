@@ -0,0 +1,209 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+# Bbox corners are snapped to 1e-4 degrees (~11 m) so repeated pans over a region share entries
+BBOX_DECIMALS = 4
+
+class MemoryBackend:
+    """
+    Keeps cached payloads in the worker's own memory.
+    """
+    
+    def __init__(self):
+        self._data: Dict[str, bytes] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._data.get(key)
+
+    def put(self, key: str, value: bytes) -> None:
+        self._data[key] = value
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def stat(self, key: str) -> Optional[Tuple[int, float]]:
+        # Nothing is stored here that the cache's own index does not already know
+        return None
+
+    def entries(self) -> Iterator[Tuple[str, int, float]]:
+        return iter(())
+
+class DiskBackend:
+    """
+    Stores cached payloads as files in a local directory, so they survive
+    restarts and can be shared by several workers on the same host. Each
+    worker's ResultCache indexes the files it has seen: entries another worker
+    wrote are found on a lookup miss (see stat), files another worker evicted
+    read as misses, and the size limits apply per worker.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: bytes) -> None:
+        # Write-then-rename so readers never see a partial file
+        tmp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(value)
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stat(self, key: str) -> Optional[Tuple[int, float]]:
+        """
+        (size, created_at) of a payload on disk, or None if there is none.
+        """
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def entries(self) -> Iterator[Tuple[str, int, float]]:
+        """
+        Yields (key, size, created_at) for payloads already on disk, oldest first.
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.directory, name))
+                found.append((name[:-len(".json")], stat.st_size, stat.st_mtime))
+        return iter(sorted(found, key=lambda entry: entry[2]))
+
+class ResultCache:
+    """
+    LRU + TTL cache of serialized analysis responses.
+    Eviction is by entry count, total payload bytes and age; storage is delegated to a backend.
+    """
+    
+    def __init__(self, backend=None, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 3600.0):
+        self.backend = backend or MemoryBackend()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (size, created_at), least recently used first
+        self._index: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        for key, size, created_at in self.backend.entries():
+            self._index[key] = (size, created_at)
+            self._bytes += size
+        with self._lock:
+            self._evict(time.time())
+
+    @staticmethod
+    def make_key(bbox: Tuple[float, float, float, float], grid_size: int, urban_growth_pct: float, temp_increase: float,
+                 response_format: str = "json") -> str:
+        """
+        Cache key from the quantized bbox, grid resolution, scenario parameters and response format.
+        """
+        parts = [round(v, BBOX_DECIMALS) for v in bbox] + [grid_size, float(urban_growth_pct), float(temp_increase)]
+        # Default-format keys are left as they were, so existing disk caches stay valid
+        if response_format != "json":
+            parts.append(response_format)
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def quantize_bbox(bbox: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+        """
+        Snaps a bbox to the cache grid so cached and freshly computed results agree.
+        """
+        return tuple(round(v, BBOX_DECIMALS) for v in bbox)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                # Stored by another worker sharing the backend since this index was built
+                entry = self.backend.stat(key)
+                if entry is not None:
+                    self._index[key] = entry
+                    self._bytes += entry[0]
+                    self._evict(time.time())
+                    entry = self._index.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl_seconds:
+                self._remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            value = self.backend.get(key)
+            if value is None:
+                # Removed behind our back (e.g. disk cleanup)
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+            self.backend.put(key, value)
+            now = time.time()
+            self._index[key] = (len(value), now)
+            self._bytes += len(value)
+            self._evict(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remove(self, key: str) -> None:
+        size, _ = self._index.pop(key)
+        self._bytes -= size
+        self.backend.delete(key)
+
+    def _evict(self, now: float) -> None:
+        # Expired entries first, then least recently used until within limits
+        for key in [k for k, (_, created_at) in self._index.items() if now - created_at > self.ttl_seconds]:
+            self._remove(key)
+            self.evictions += 1
+        while self._index and (len(self._index) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._index)))
+            self.evictions += 1
@@ -0,0 +1,89 @@
+import numpy as np
+from typing import Dict, List, Any, Tuple
+
+from risk_engine.ecological_risk import AdvancedRiskEngine
+from data_processing.satellite_features import SatelliteProcessor, LAND_USE_CODES
+from analysis.pipeline import SCENARIO_STREAM
+
+class ScenarioSweep:
+    """
+    Scores a whole grid of (urban_growth_pct, temp_increase) scenarios from one
+    base grid.
+
+    The conversion draws are the same per-cell uniforms /simulate uses (common
+    random numbers), so every entry equals the corresponding /simulate result
+    and converted cells are nested as the growth rate increases. The rule
+    score is a sum of per-indicator terms; per scenario only the thermal term
+    is recomputed, plus the precomputed converted-cell terms where a cell flips
+    to urban.
+    """
+
+    def __init__(self, processor: SatelliteProcessor):
+        self.processor = processor
+
+    def run(self, bbox: Tuple[float, float, float, float], grid_size: int,
+            urban_growth_values: List[float], temp_increase_values: List[float]) -> Dict[str, Any]:
+        min_lat, min_lng, max_lat, max_lng = bbox
+        seed = SatelliteProcessor.grid_seed(min_lat, min_lng, max_lat, max_lng, grid_size)
+        growth = np.asarray(urban_growth_values, dtype=float)
+        warming = np.asarray(temp_increase_values, dtype=float)
+        # Scenario order: growth-major, then warming
+        scores = np.empty((growth.size * warming.size, grid_size * grid_size), dtype=np.int8)
+        grid_ids = [None] * (grid_size * grid_size)
+
+        tiles_per_side, _ = self.processor.tile_layout(grid_size)
+        for tile_row in range(tiles_per_side):
+            for tile_col in range(tiles_per_side):
+                grid = self.processor.get_tile_columns(min_lat, min_lng, max_lat, max_lng, grid_size, tile_row, tile_col, seed)
+                draws = np.random.default_rng([seed, tile_row, tile_col, SCENARIO_STREAM]).random(grid["land_use"].size)
+                indices = grid["row"] * grid_size + grid["col"]
+                scores[:, indices] = self.score_tile(grid, draws, growth, warming)
+                for index, i, j in zip(indices.tolist(), grid["row"].tolist(), grid["col"].tolist()):
+                    grid_ids[index] = f"{i}_{j}"
+
+        high = AdvancedRiskEngine.level_index(scores) == 2
+        scenarios = [
+            {
+                "urban_growth_pct": float(g),
+                "temp_increase": float(t),
+                "mean_risk_score": round(float(row_scores.mean()), 3),
+                "high_cells": int(row_high.sum())
+            }
+            for (g, t), row_scores, row_high in zip(
+                ((g, t) for g in growth for t in warming), scores, high
+            )
+        ]
+        return {
+            "grid_size": grid_size,
+            "scenarios": scenarios,
+            "grid_ids": grid_ids,
+            "risk_scores": scores.tolist()
+        }
+
+    @staticmethod
+    def score_tile(grid: Dict[str, np.ndarray], draws: np.ndarray, growth: np.ndarray,
+                   warming: np.ndarray) -> np.ndarray:
+        """
+        (len(growth) * len(warming), cells) rule scores for one tile.
+        """
+        ndvi, land_use = grid["ndvi"], grid["land_use"]
+        temperature, water_index = grid["temperature"], grid["water_index"]
+        urban = np.full_like(land_use, LAND_USE_CODES["urban"])
+        no_heat = np.zeros_like(temperature)
+
+        # 1. Non-thermal terms, for the cell as observed and as converted to urban
+        base_terms = AdvancedRiskEngine.score_batch(ndvi, land_use, no_heat, water_index)["risk_score"]
+        converted_terms = AdvancedRiskEngine.score_batch(ndvi * 0.4, urban, no_heat, water_index * 0.5)["risk_score"]
+        convertible = land_use != LAND_USE_CODES["urban"]
+
+        out = np.empty((growth.size, warming.size, land_use.size), dtype=np.int8)
+        for g, pct in enumerate(growth):
+            converted = convertible & (draws < (pct / 100.0))
+            # 2. Thermal term for every warming level at once; other inputs are neutral so only heat scores
+            scenario_temp = temperature + warming[:, None] + 3.0 * converted
+            heat_terms = AdvancedRiskEngine.score_batch(
+                np.ones_like(scenario_temp), np.full(scenario_temp.shape, LAND_USE_CODES["forest"]),
+                scenario_temp, np.ones_like(scenario_temp)
+            )["risk_score"]
+            out[g] = np.where(converted, converted_terms, base_terms) + heat_terms
+        return out.reshape(growth.size * warming.size, land_use.size)
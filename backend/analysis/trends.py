@@ -0,0 +1,141 @@
+import numpy as np
+from datetime import date
+from typing import Dict, List, Any, Tuple
+
+from data_processing.rng import stable_seed, counter_uniform
+from storage.timeseries import IndicatorSeriesStore, INDICATORS, SOURCE_BASELINE, SOURCE_OBSERVED
+
+# Baseline model: the per-cell NDVI decline and warming are measured from this month
+BASELINE_ANCHOR = np.datetime64("2025-01", "M")
+MAX_TREND_MONTHS = 240
+
+class TrendEngine:
+    """
+    Monthly indicator trends for locations, read from the indicator time series.
+
+    Months with observed analyses use the mean of their observations. Months
+    without any stored row get the cell's baseline model, which is a pure
+    function of (cell, month), appended to the store on first read, so trends
+    never change between calls and later reads are a single range scan.
+    Many locations are computed together as (cells x months) arrays.
+    """
+
+    def __init__(self, store: IndicatorSeriesStore):
+        self.store = store
+
+    def monthly(self, lat: float, lng: float, months: int = 12, window: int = 3,
+                end: date = None) -> List[Dict[str, Any]]:
+        """
+        The last `months` months up to end's month (default: now), oldest first, with
+        `window`-month rolling means and NDVI decline from the first month.
+        """
+        return self.monthly_many([(lat, lng)], months, window, end)[0]
+
+    def monthly_many(self, points: List[Tuple[float, float]], months: int = 12, window: int = 3,
+                     end: date = None) -> List[List[Dict[str, Any]]]:
+        """
+        monthly() for every (lat, lng) point; points in the same cell share one series.
+        """
+        tile_ids, point_tiles = np.unique(
+            np.array([self.store.tile_id(lat, lng) for lat, lng in points], dtype=np.int64), return_inverse=True
+        )
+        last = np.datetime64(end or date.today(), "M")
+        month_range = np.arange(last - (months - 1), last + 1)
+        start_day = month_range[0].astype("datetime64[D]")
+        end_day = (last + 1).astype("datetime64[D]") - 1
+        series = self.store.read(tile_ids.tolist(), start_day.item(), end_day.item())
+
+        # 1. Flat (cell, month) slot of every stored row
+        slots = (np.searchsorted(tile_ids, series["tile_id"]) * months
+                 + (series["date"].astype("datetime64[M]") - month_range[0]).astype(np.int64))
+        n_slots = tile_ids.size * months
+        stored = np.bincount(slots, minlength=n_slots) > 0
+
+        # 2. Fill slots with no rows from the baseline model and persist them
+        baseline = {name: values.ravel() for name, values in self.baseline(tile_ids, month_range).items()}
+        missing = np.flatnonzero(~stored)
+        if missing.size:
+            days = month_range.astype("datetime64[D]").astype(str)
+            self.store.append([
+                (int(tile_ids[i // months]), days[i % months], SOURCE_BASELINE,
+                 baseline["ndvi"][i], baseline["temperature"][i], baseline["water_index"][i])
+                for i in missing.tolist()
+            ])
+
+        # 3. Observed monthly means where there are observations, stored baseline elsewhere;
+        # each observed row is a day's mean, weighted by its number of analyses
+        observed = series["source"] == SOURCE_OBSERVED
+        weights = series["observations"][observed]
+        counts = np.bincount(slots[observed], weights=weights, minlength=n_slots).astype(np.int64)
+        has_obs = counts > 0
+        values = {}
+        for name in INDICATORS:
+            column = baseline[name].copy()
+            column[slots[~observed]] = series[name][~observed]
+            sums = np.bincount(slots[observed], weights=series[name][observed] * weights, minlength=n_slots)
+            column[has_obs] = sums[has_obs] / counts[has_obs]
+            values[name] = column.reshape(tile_ids.size, months)
+        counts = counts.reshape(tile_ids.size, months)
+
+        ndvi, temperature = values["ndvi"], values["temperature"]
+        ndvi_rolling = self.rolling_mean(ndvi, window)
+        temperature_rolling = self.rolling_mean(temperature, window)
+        first = ndvi[:, :1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decline_pct = np.where(first > 0, np.maximum(0, (first - ndvi) / first * 100), 0.0)
+        labels = [m.item().strftime("%b %Y") for m in month_range]
+
+        trends = [
+            [
+                {
+                    "date": label,
+                    "ndvi": round(n, 3),
+                    "temperature": round(t, 1),
+                    "water_index": round(w, 3),
+                    "decline_pct": round(d, 1),
+                    "ndvi_rolling": round(nr, 3),
+                    "temperature_rolling": round(tr, 1),
+                    "observations": c
+                }
+                for label, n, t, w, d, nr, tr, c in zip(labels, *rows)
+            ]
+            for rows in zip(
+                ndvi.tolist(), temperature.tolist(), values["water_index"].tolist(), decline_pct.tolist(),
+                ndvi_rolling.tolist(), temperature_rolling.tolist(), counts.tolist()
+            )
+        ]
+        return [trends[i] for i in point_tiles.tolist()]
+
+    @staticmethod
+    def baseline(tile_ids: np.ndarray, month_range: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Modelled (cells x months) indicators: a per-cell level and trend, a seasonal
+        cycle and per-month noise, all from counter-based draws keyed on (cell, month).
+        """
+        seeds = np.array([stable_seed("trend", int(tile_id)) for tile_id in tile_ids], dtype=np.uint64)[:, None]
+        lats = np.array([IndicatorSeriesStore.tile_center(int(tile_id))[0] for tile_id in tile_ids])[:, None]
+        base_ndvi, ndvi_drift, warming, base_water = (counter_uniform(seeds, k, 0) for k in range(4))
+        months = month_range.astype(np.int64)
+        since_anchor = (month_range - BASELINE_ANCHOR).astype(np.float64)
+        # Growing season peaks mid-year in the northern hemisphere, around January in the southern
+        season = np.sin(2 * np.pi * ((months % 12) - 3) / 12) * np.where(lats >= 0, 1.0, -1.0)
+        noise = [counter_uniform(seeds, months, k) * 2 - 1 for k in range(1, 4)]
+
+        ndvi = 0.6 + 0.2 * base_ndvi - 0.0015 * ndvi_drift * since_anchor + 0.04 * season + 0.02 * noise[0]
+        temperature = 24.0 + 0.03 * warming * since_anchor + 3.0 * season + 0.5 * noise[1]
+        water_index = 0.2 + 0.4 * base_water + 0.1 * season + 0.05 * noise[2]
+        return {
+            "ndvi": np.round(np.clip(ndvi, 0, 1), 4),
+            "temperature": np.round(temperature, 2),
+            "water_index": np.round(np.clip(water_index, 0, 1), 4)
+        }
+
+    @staticmethod
+    def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+        """
+        Trailing mean along the last axis over up to `window` values (fewer at the start).
+        """
+        cumulative = np.concatenate((np.zeros(values.shape[:-1] + (1,)), np.cumsum(values, axis=-1)), axis=-1)
+        ends = np.arange(1, values.shape[-1] + 1)
+        starts = np.maximum(0, ends - window)
+        return (cumulative[..., ends] - cumulative[..., starts]) / (ends - starts)
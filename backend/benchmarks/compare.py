@@ -0,0 +1,67 @@
+"""
+Compares two benchmark result files case by case.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 1.25
+
+Exits with status 1 when any case's p50 latency grew by more than the threshold ratio.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Any, Tuple
+
+DEFAULT_THRESHOLD = 1.25
+
+def case_key(result: Dict[str, Any]) -> Tuple[str, str]:
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    One row per case present in both runs, with p50/p99/peak-memory ratios (current / baseline).
+    """
+    before = {case_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get(case_key(result))
+        if old is None:
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"] if old["p50_ms"] else None
+        memory_ratio = None
+        if old.get("peak_memory_bytes") and result.get("peak_memory_bytes") is not None:
+            memory_ratio = result["peak_memory_bytes"] / old["peak_memory_bytes"]
+        rows.append({
+            "name": result["name"],
+            "params": result["params"],
+            "p50_ratio": ratio,
+            "p99_ratio": result["p99_ms"] / old["p99_ms"] if old["p99_ms"] else None,
+            "memory_ratio": memory_ratio,
+            "regression": ratio is not None and ratio > threshold
+        })
+    return rows
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="p50 ratio above which a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{baseline['meta'].get('commit') or '?'} -> {current['meta'].get('commit') or '?'}")
+    for row in rows:
+        label = " ".join(f"{k}={v}" for k, v in row["params"].items())
+        ratios = "  ".join(
+            f"{name} {'n/a' if value is None else f'{value:.2f}x'}"
+            for name, value in (("p50", row["p50_ratio"]), ("p99", row["p99_ratio"]), ("mem", row["memory_ratio"]))
+        )
+        print(f"{'REGRESSION ' if row['regression'] else '           '}{row['name']:<28} {label:<24} {ratios}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
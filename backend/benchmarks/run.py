@@ -0,0 +1,357 @@
+"""
+Benchmark suite for the scoring pipeline and the API routes.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 5,25,100 --only grid_features,analyze_region
+    python -m benchmarks.compare baseline.json results.json
+
+Runs against a scratch database and job directory, and with one analysis
+worker by default, so results do not depend on the local history or core
+count and tracemalloc sees every allocation.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Callable
+
+import numpy as np
+
+DEFAULT_SIZES = (5, 25, 100, 250, 500, 1000)
+DEFAULT_REPEAT = 20
+# A case stops repeating once its samples add up to this many seconds
+DEFAULT_MAX_SECONDS = 5.0
+# Grids above this many cells skip the warm-up call; a single run dominates any start-up cost
+WARMUP_MAX_CELLS = 250 * 250
+# Region of the sized cases; every timed call shifts it so /analyze-region never hits the result cache
+BENCH_BBOX = (12.80, 80.10, 13.20, 80.50)
+BBOX_SHIFT = 0.001
+REPORT_BATCH_SIZE = 25
+
+FAMILIES = ("grid_features", "rule_engine", "ml_predict", "reports", "analyze_region", "routes")
+
+class BenchmarkRunner:
+    """
+    Times a callable `repeat` times (bounded by max_seconds) and records
+    p50/p99/mean latency, throughput and, in one extra traced call, the peak
+    traced memory.
+    """
+
+    def __init__(self, repeat: int = DEFAULT_REPEAT, max_seconds: float = DEFAULT_MAX_SECONDS, memory: bool = True):
+        self.repeat = repeat
+        self.max_seconds = max_seconds
+        self.memory = memory
+        self.results: List[Dict[str, Any]] = []
+        self._calls = 0
+
+    def next_call(self) -> int:
+        self._calls += 1
+        return self._calls
+
+    def measure(self, name: str, fn: Callable[[int], Any], params: Dict[str, Any] = None,
+                items: int = 1, unit: str = "calls", warmup: bool = True) -> Dict[str, Any]:
+        """
+        fn(i) is called with a fresh call number each time, so it can vary its input.
+        """
+        if warmup:
+            fn(self.next_call())
+        samples = []
+        started = time.perf_counter()
+        while len(samples) < self.repeat and (not samples or time.perf_counter() - started < self.max_seconds):
+            i = self.next_call()
+            gc.collect()
+            t0 = time.perf_counter()
+            fn(i)
+            samples.append(time.perf_counter() - t0)
+
+        peak = None
+        if self.memory:
+            i = self.next_call()
+            gc.collect()
+            tracemalloc.start()
+            try:
+                fn(i)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        latencies = np.array(samples)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        result = {
+            "name": name,
+            "params": params or {},
+            "samples": len(samples),
+            "p50_ms": round(p50 * 1000, 4),
+            "p99_ms": round(p99 * 1000, 4),
+            "mean_ms": round(latencies.mean() * 1000, 4),
+            "min_ms": round(latencies.min() * 1000, 4),
+            "throughput": round(items / latencies.mean(), 2),
+            "throughput_unit": f"{unit}/s",
+            "peak_memory_bytes": peak
+        }
+        self.results.append(result)
+        label = " ".join(f"{k}={v}" for k, v in result["params"].items())
+        print(f"{name:<34} {label:<40} p50 {result['p50_ms']:>11.3f} ms  p99 {result['p99_ms']:>11.3f} ms  "
+              f"{result['throughput']:>12.1f} {result['throughput_unit']}"
+              + (f"  peak {peak / 1e6:.1f} MB" if peak is not None else ""), file=sys.stderr)
+        return result
+
+def shifted_bbox(i: int):
+    min_lat, min_lng, max_lat, max_lng = BENCH_BBOX
+    return (min_lat + i * BBOX_SHIFT, min_lng, max_lat + i * BBOX_SHIFT, max_lng)
+
+def region_body(i: int, grid_size: int, **extra) -> Dict[str, Any]:
+    min_lat, min_lng, max_lat, max_lng = shifted_bbox(i)
+    return dict({
+        "lat": (min_lat + max_lat) / 2, "lng": (min_lng + max_lng) / 2,
+        "min_lat": min_lat, "min_lng": min_lng, "max_lat": max_lat, "max_lng": max_lng,
+        "grid_size": grid_size
+    }, **extra)
+
+def bench_grid_features(runner: BenchmarkRunner, app, sizes: List[int]) -> None:
+    processor = app.processor
+    for size in sizes:
+        runner.measure("grid_features", lambda i: processor.get_grid_features(*shifted_bbox(i), grid_size=size),
+                       {"grid_size": size}, size * size, "cells", size * size <= WARMUP_MAX_CELLS)
+
+def bench_rule_engine(runner: BenchmarkRunner, app, sizes: List[int]) -> None:
+    from risk_engine.ecological_risk import AdvancedRiskEngine
+    runner.measure("rule_engine.evaluate_risk", lambda i: AdvancedRiskEngine.evaluate_risk(0.35, "agriculture", 31.0, 0.2))
+    for size in sizes:
+        grid = app.processor.get_grid_columns(*BENCH_BBOX, grid_size=size)
+        columns = (grid["ndvi"], grid["land_use"], grid["temperature"], grid["water_index"])
+        runner.measure("rule_engine.evaluate_risk_batch", lambda i: AdvancedRiskEngine.evaluate_risk_batch(*columns),
+                       {"grid_size": size}, size * size, "cells", size * size <= WARMUP_MAX_CELLS)
+
+def bench_ml_predict(runner: BenchmarkRunner, app, sizes: List[int]) -> None:
+    model = app.ml_service
+    runner.measure("ml.predict", lambda i: model.predict(0.35, "agriculture", 31.0, 0.2))
+    for size in sizes:
+        grid = app.processor.get_grid_columns(*BENCH_BBOX, grid_size=size)
+        features = np.stack([grid["ndvi"], grid["land_use"], grid["temperature"], grid["water_index"]], axis=1)
+        runner.measure("ml.predict_batch", lambda i: model.predict_batch(features),
+                       {"grid_size": size}, size * size, "cells", size * size <= WARMUP_MAX_CELLS)
+
+def bench_reports(runner: BenchmarkRunner, app, sizes: List[int]) -> None:
+    from reports.builder import ReportBuilder
+    cells = app.analyzer.analyze(BENCH_BBOX, 5)
+    report = dict(cells[len(cells) // 2], grid=cells)
+    batch = [(f"report_{n}.pdf", cells[n % len(cells)]) for n in range(REPORT_BATCH_SIZE)]
+    runner.measure("reports.render", lambda i: ReportBuilder.render(report), unit="reports")
+    runner.measure("reports.iter_zip", lambda i: b"".join(ReportBuilder.iter_zip(batch)),
+                   {"reports": REPORT_BATCH_SIZE}, REPORT_BATCH_SIZE, "reports")
+    runner.measure("reports.render_sections", lambda i: ReportBuilder.render_sections(batch),
+                   {"reports": REPORT_BATCH_SIZE}, REPORT_BATCH_SIZE, "reports")
+
+def bench_analyze_region(runner: BenchmarkRunner, app, client, sizes: List[int]) -> None:
+    """
+    End to end through the ASGI app; grids above the inline limit go through the NDJSON stream.
+    """
+    for size in sizes:
+        if size <= app.MAX_INLINE_GRID_SIZE:
+            def call(i, size=size):
+                response = client.post("/analyze-region", json=region_body(i, size))
+                response.raise_for_status()
+            route = "/analyze-region"
+        else:
+            def call(i, size=size):
+                with client.stream("POST", "/analyze-region/stream", json=region_body(i, size)) as response:
+                    response.raise_for_status()
+                    for _ in response.iter_bytes():
+                        pass
+            route = "/analyze-region/stream"
+
+        def settled_call(i, call=call):
+            call(i)
+            wait_for_history(app)
+        runner.measure("analyze_region", settled_call, {"grid_size": size, "route": route},
+                       size * size, "cells", size * size <= WARMUP_MAX_CELLS)
+
+        if size <= app.MAX_INLINE_GRID_SIZE:
+            def compact_call(i, size=size):
+                client.post("/analyze-region?format=compact", json=region_body(i, size)).raise_for_status()
+                wait_for_history(app)
+            runner.measure("analyze_region", compact_call, {"grid_size": size, "route": route, "format": "compact"},
+                           size * size, "cells", size * size <= WARMUP_MAX_CELLS)
+
+def wait_for_history(app, timeout: float = 120.0) -> None:
+    """
+    Lets the background history writer drain, so its inserts do not bleed into the next sample.
+    """
+    deadline = time.perf_counter() + timeout
+    while app.history_writer.stats()["queued_batches"] and time.perf_counter() < deadline:
+        time.sleep(0.005)
+
+def bench_routes(runner: BenchmarkRunner, app, client) -> List[str]:
+    """
+    One representative request per API route; returns the routes left uncovered.
+    """
+    cells = client.post("/analyze-region", json=region_body(0, 5)).json()
+    report = dict(cells, grid=cells["grid"][:5])
+    lat, lng = cells["location"]["lat"], cells["location"]["lng"]
+    points = [cell["location"] for cell in cells["grid"]]
+    wait_for_history(app)
+
+    def request(method: str, path: str, **kwargs):
+        response = client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    from jobs.manager import TERMINAL_STATES
+
+    def run_job(kind: str, params: Dict[str, Any]) -> str:
+        job_id = request("POST", "/jobs", json={"kind": kind, "params": params}).json()["id"]
+        while request("GET", f"/jobs/{job_id}").json()["status"] not in TERMINAL_STATES:
+            time.sleep(0.002)
+        return job_id
+
+    cases = [
+        ("GET", "/", lambda i: request("GET", "/")),
+        ("POST", "/analyze-region", lambda i: request("POST", "/analyze-region", json=region_body(0, 5))),
+        ("POST", "/analyze-cells", lambda i: request("POST", "/analyze-cells", json=dict(
+            zip(["min_lat", "min_lng", "max_lat", "max_lng"], BENCH_BBOX)))),
+        ("GET", "/history", lambda i: request("GET", "/history", params={
+            "min_lat": BENCH_BBOX[0], "min_lng": BENCH_BBOX[1], "max_lat": BENCH_BBOX[2], "max_lng": BENCH_BBOX[3]})),
+        ("GET", "/history/nearest", lambda i: request("GET", "/history/nearest", params={"lat": lat, "lng": lng})),
+        ("GET", "/history/stats", lambda i: request("GET", "/history/stats")),
+        ("GET", "/cache/stats", lambda i: request("GET", "/cache/stats")),
+        ("GET", "/metrics", lambda i: request("GET", "/metrics")),
+        ("GET", "/metrics/profiler", lambda i: request("GET", "/metrics/profiler")),
+        ("POST", "/metrics/profiler", lambda i: request("POST", "/metrics/profiler", json={"enabled": False})),
+        ("POST", "/analyze-region/stream", lambda i: request("POST", "/analyze-region/stream", json=region_body(i, 25))),
+        ("POST", "/jobs", lambda i: run_job("analyze-region", region_body(i, 25))),
+        ("GET", "/jobs/stats", lambda i: request("GET", "/jobs/stats")),
+        ("POST", "/generate-report", lambda i: request("POST", "/generate-report", json=report)),
+        ("POST", "/generate-report/batch", lambda i: request("POST", "/generate-report/batch",
+                                                             json={"reports": [report] * 10})),
+        ("GET", "/trend-data", lambda i: request("GET", "/trend-data", params={"lat": lat, "lng": lng})),
+        ("GET", "/forecast", lambda i: request("GET", "/forecast", params={"lat": lat, "lng": lng})),
+        ("GET", "/alerts", lambda i: request("GET", "/alerts", params={"lat": lat, "lng": lng})),
+        ("POST", "/insights", lambda i: request("POST", "/insights", json={"points": points})),
+        ("POST", "/simulate", lambda i: request("POST", "/simulate", json=region_body(i, 5, urban_growth_pct=20.0,
+                                                                                       temp_increase=1.5))),
+        ("POST", "/simulate/sweep", lambda i: request("POST", "/simulate/sweep", json=region_body(i, 25))),
+        ("GET", "/mitigation-plan", lambda i: request("GET", "/mitigation-plan", params={"lat": lat, "lng": lng})),
+    ]
+    # Job routes that need an existing job are timed against one finished job
+    job_id = run_job("analyze-region", region_body(0, 5))
+    cases += [
+        ("GET", "/jobs/{job_id}", lambda i: request("GET", f"/jobs/{job_id}")),
+        ("GET", "/jobs/{job_id}/events", lambda i: request("GET", f"/jobs/{job_id}/events")),
+        ("GET", "/jobs/{job_id}/result", lambda i: request("GET", f"/jobs/{job_id}/result")),
+        # Includes running the job it deletes
+        ("DELETE", "/jobs/{job_id}", lambda i: client.delete(f"/jobs/{run_job('analyze-region', region_body(0, 5))}")),
+    ]
+    # Watch routes; the notification stream never ends on its own and is left uncovered
+    watch = {"region_name": "benchmark", "lat": lat, "lng": lng, "threshold": 5.0}
+    cases += [
+        ("POST", "/notifications", lambda i: request("POST", "/notifications", json=watch)),
+        ("GET", "/notifications", lambda i: request("GET", "/notifications")),
+        ("GET", "/notifications/status", lambda i: request("GET", "/notifications/status")),
+        # Includes creating the watch it deletes
+        ("DELETE", "/notifications/{notification_id}", lambda i: request(
+            "DELETE", f"/notifications/{request('POST', '/notifications', json=watch).json()['id']}")),
+    ]
+    if app.processor.pyramid is not None:
+        cases.append(("GET", "/tiles/{z}/{x}/{y}", lambda i: client.get("/tiles/10/736/484")))
+
+    covered = set()
+    for method, path, call in cases:
+        def settled_call(i, call=call):
+            call(i)
+            wait_for_history(app)
+        runner.measure(f"route {method} {path}", settled_call, {}, 1, "requests")
+        covered.add((method, path))
+
+    from fastapi.routing import APIRoute
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.app.routes if isinstance(route, APIRoute)
+        for method in route.methods if method not in ("HEAD", "OPTIONS") and (method, route.path) not in covered
+    )
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring pipeline and the API routes")
+    parser.add_argument("--output", help="Write the JSON results here (default: stdout)")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated grid sizes (cells per side)")
+    parser.add_argument("--only", help=f"Comma-separated families to run, from {', '.join(FAMILIES)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed calls per case")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="Stop repeating a case after this much time")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced call measuring peak memory")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    families = args.only.split(",") if args.only else list(FAMILIES)
+    unknown = set(families) - set(FAMILIES)
+    if unknown:
+        parser.error(f"unknown families: {', '.join(sorted(unknown))}")
+
+    # 1. Scratch state, set before the app (and its storage modules) are imported
+    scratch = tempfile.mkdtemp(prefix="bio-bench-")
+    os.environ.setdefault("BIO_DB_PATH", os.path.join(scratch, "bench.db"))
+    os.environ.setdefault("BIO_JOB_DIR", os.path.join(scratch, "jobs"))
+    os.environ.setdefault("BIO_ANALYSIS_WORKERS", "1")
+
+    from fastapi.testclient import TestClient
+    import main as app
+
+    # 2. Run the families in-process, with the app's lifespan (writer, job workers) started
+    runner = BenchmarkRunner(args.repeat, args.max_seconds, not args.no_memory)
+    uncovered = None
+    with TestClient(app.app) as client:
+        if "grid_features" in families:
+            bench_grid_features(runner, app, sizes)
+        if "rule_engine" in families:
+            bench_rule_engine(runner, app, sizes)
+        if "ml_predict" in families:
+            bench_ml_predict(runner, app, sizes)
+        if "reports" in families:
+            bench_reports(runner, app, sizes)
+        if "analyze_region" in families:
+            bench_analyze_region(runner, app, client, sizes)
+        if "routes" in families:
+            uncovered = bench_routes(runner, app, client)
+
+    # 3. Results with enough context to compare runs across commits and machines
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "analysis_workers": os.environ["BIO_ANALYSIS_WORKERS"],
+            "sizes": sizes,
+            "families": families,
+            "repeat": args.repeat,
+            "max_seconds": args.max_seconds
+        },
+        "results": runner.results,
+        "uncovered_routes": uncovered
+    }
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content + "\n")
+    else:
+        print(content)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import argparse
+import json
+import sqlite3
+import threading
+import zlib
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Iterator, Optional, Tuple
+
+from data_processing.raster import RasterScene, RasterSource
+from data_processing.satellite_features import SatelliteProcessor, BASE_TEMPERATURE
+from risk_engine.ecological_risk import AdvancedRiskEngine
+
+# Geographic (EPSG:4326) quad tiling: zoom z has 2^(z+1) x 2^z square tiles,
+# x counted east from 180°W and y south from 90°N
+TILE_PIXELS = 256
+LAYERS = ["ndvi", "temperature", "water_index", "forest_coverage", "risk_score"]
+# Decoded tiles kept per pyramid (each is len(LAYERS) x 256 x 256 float32, ~1.3 MB)
+TILE_CACHE_SIZE = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+"""
+
+def tile_degrees(zoom: int) -> float:
+    return 180.0 / (1 << zoom)
+
+def pixel_degrees(zoom: int) -> float:
+    return tile_degrees(zoom) / TILE_PIXELS
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    (south, west, north, east) of a tile.
+    """
+    size = tile_degrees(zoom)
+    north = 90.0 - y * size
+    west = -180.0 + x * size
+    return (north - size, west, north, west + size)
+
+def tiles_covering(zoom: int, bounds: Tuple[float, float, float, float]) -> Iterator[Tuple[int, int]]:
+    south, west, north, east = bounds
+    size = tile_degrees(zoom)
+    y0, y1 = int((90.0 - north) // size), int(np.ceil((90.0 - south) / size))
+    x0, x1 = int((west + 180.0) // size), int(np.ceil((east + 180.0) / size))
+    for y in range(max(y0, 0), min(y1, 1 << zoom)):
+        for x in range(max(x0, 0), min(x1, 1 << (zoom + 1))):
+            yield x, y
+
+class PyramidLevel(RasterScene):
+    """
+    One zoom level of a TilePyramid, exposed as a world-spanning scene whose
+    pixels already hold per-pixel index layers; windows are assembled from tiles.
+    Tiles that were never built read as NaN (no data), so SatelliteProcessor
+    simulates the cells under them rather than scoring the gap.
+    """
+
+    REQUIRED_BANDS = ()
+
+    def __init__(self, pyramid: "TilePyramid", zoom: int):
+        super().__init__(
+            f"{pyramid.path}#z{zoom}", pyramid.bounds,
+            (TILE_PIXELS << zoom, TILE_PIXELS << (zoom + 1)),
+            {name: index for index, name in enumerate(LAYERS)},
+            extent=(-90.0, -180.0, 90.0, 180.0)
+        )
+        self.pyramid = pyramid
+        self.zoom = zoom
+
+    def index_layers(self, rows: slice, cols: slice) -> Dict[str, np.ndarray]:
+        window = self._window(rows, cols)
+        return {name: window[index] for index, name in enumerate(LAYERS) if name != "risk_score"}
+
+    def _read(self, band: int, rows: slice, cols: slice) -> np.ndarray:
+        return self._window(rows, cols)[band]
+
+    def _window(self, rows: slice, cols: slice) -> np.ndarray:
+        window = np.full((len(LAYERS), rows.stop - rows.start, cols.stop - cols.start), np.nan, dtype=np.float32)
+        for y in range(rows.start // TILE_PIXELS, (rows.stop - 1) // TILE_PIXELS + 1):
+            for x in range(cols.start // TILE_PIXELS, (cols.stop - 1) // TILE_PIXELS + 1):
+                tile = self.pyramid.read_tile(self.zoom, x, y)
+                if tile is None:
+                    continue
+                # Overlap of the tile with the window, in window and tile coordinates
+                r0, r1 = max(rows.start, y * TILE_PIXELS), min(rows.stop, (y + 1) * TILE_PIXELS)
+                c0, c1 = max(cols.start, x * TILE_PIXELS), min(cols.stop, (x + 1) * TILE_PIXELS)
+                window[:, r0 - rows.start:r1 - rows.start, c0 - cols.start:c1 - cols.start] = \
+                    tile[:, r0 - y * TILE_PIXELS:r1 - y * TILE_PIXELS, c0 - x * TILE_PIXELS:c1 - x * TILE_PIXELS]
+        return window[:, ::rows.step or 1, ::cols.step or 1]
+
+class TilePyramid:
+    """
+    Precomputed indicator tiles (LAYERS at every zoom level) in an MBTiles-style
+    SQLite file. Tiles are zlib-compressed float32 arrays; tile_row counts from
+    the north, unlike TMS. Built offline with `python -m data_processing.pyramid`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._tiles: "OrderedDict[Tuple[int, int, int], Optional[np.ndarray]]" = OrderedDict()
+        self._levels: Dict[int, PyramidLevel] = {}
+
+        meta = dict(self._conn.execute("SELECT name, value FROM metadata"))
+        if json.loads(meta.get("layers", "[]")) != LAYERS:
+            raise ValueError(f"Tile pyramid '{path}' has layers {meta.get('layers')}, expected {LAYERS}")
+        self.bounds = tuple(float(v) for v in meta["bounds"].split(","))
+        self.min_zoom = int(meta["minzoom"])
+        self.max_zoom = int(meta["maxzoom"])
+
+    def covers(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> bool:
+        s, w, n, e = self.bounds
+        return s <= min_lat and w <= min_lng and max_lat <= n and max_lng <= e
+
+    def level_for(self, cell_degrees: float) -> PyramidLevel:
+        """
+        The coarsest level whose pixels are no larger than a grid cell (the finest level otherwise).
+        """
+        zoom = self.max_zoom
+        for z in range(self.min_zoom, self.max_zoom + 1):
+            if pixel_degrees(z) <= cell_degrees:
+                zoom = z
+                break
+        if zoom not in self._levels:
+            self._levels[zoom] = PyramidLevel(self, zoom)
+        return self._levels[zoom]
+
+    def read_tile(self, zoom: int, x: int, y: int) -> Optional[np.ndarray]:
+        """
+        A decoded (len(LAYERS), 256, 256) tile, or None where nothing was built.
+        """
+        key = (zoom, x, y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+            row = self._conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", key
+            ).fetchone()
+            tile = decode_tile(row[0]) if row else None
+            self._tiles[key] = tile
+            if len(self._tiles) > TILE_CACHE_SIZE:
+                self._tiles.popitem(last=False)
+            return tile
+
+def encode_tile(tile: np.ndarray) -> bytes:
+    return zlib.compress(np.ascontiguousarray(tile, dtype="<f4").tobytes(), 6)
+
+def decode_tile(data: bytes) -> np.ndarray:
+    # Read-only, so cached tiles can be shared between requests
+    return np.frombuffer(zlib.decompress(data), dtype="<f4").reshape(len(LAYERS), TILE_PIXELS, TILE_PIXELS)
+
+def render_tile(source: RasterSource, zoom: int, x: int, y: int) -> Optional[np.ndarray]:
+    """
+    Full-resolution tile from the source scenes: each tile pixel is a grid cell
+    reduced from the scene pixels under it, then scored by the rule engine.
+    """
+    south, west, north, east = tile_bounds(zoom, x, y)
+    lat_edges = np.linspace(south, north, TILE_PIXELS + 1)
+    lng_edges = np.linspace(west, east, TILE_PIXELS + 1)
+    lat_centers = (lat_edges[:-1] + lat_edges[1:]) / 2
+    lng_centers = (lng_edges[:-1] + lng_edges[1:]) / 2
+
+    tile = np.full((len(LAYERS), TILE_PIXELS, TILE_PIXELS), np.nan)
+    for scene in source.scenes:
+        s, w, n, e = scene.bounds
+        inside = ((lat_centers >= s) & (lat_centers <= n))[:, None] & ((lng_centers >= w) & (lng_centers <= e))[None, :]
+        if not inside.any():
+            continue
+        cells = RasterSource.cell_columns(scene, np.clip(lat_edges, s, n), np.clip(lng_edges, w, e))
+        # First scene wins where scenes overlap
+        fill = inside & np.isnan(tile[0])
+        for index, name in enumerate(LAYERS[:-1]):
+            if name in cells:
+                tile[index][fill] = cells[name][fill]
+    if np.isnan(tile[0]).all():
+        return None
+
+    # 1. Score every pixel that has data, the same way /analyze-region scores cells
+    valid = ~np.isnan(tile[0])
+    ndvi = tile[0][valid]
+    temperature = np.nan_to_num(tile[1][valid], nan=BASE_TEMPERATURE)
+    water_index = np.nan_to_num(tile[2][valid])
+    land_use = SatelliteProcessor.classify_land_use(ndvi, water_index)
+    tile[4][valid] = AdvancedRiskEngine.evaluate_risk_batch(ndvi, land_use, temperature, water_index)["risk_score"]
+
+    # Tile row 0 is the northern edge
+    return tile[:, ::-1, :]
+
+def downsample_tile(children: List[List[Optional[np.ndarray]]]) -> Optional[np.ndarray]:
+    """
+    Parent tile from its 2x2 children ([[nw, ne], [sw, se]]), averaging 2x2 pixel blocks.
+    """
+    if all(child is None for row in children for child in row):
+        return None
+    full = np.full((len(LAYERS), 2 * TILE_PIXELS, 2 * TILE_PIXELS), np.nan, dtype=np.float32)
+    for dy, row in enumerate(children):
+        for dx, child in enumerate(row):
+            if child is not None:
+                full[:, dy * TILE_PIXELS:(dy + 1) * TILE_PIXELS, dx * TILE_PIXELS:(dx + 1) * TILE_PIXELS] = child
+    blocks = full.reshape(len(LAYERS), TILE_PIXELS, 2, TILE_PIXELS, 2)
+    valid = np.isfinite(blocks)
+    count = valid.sum(axis=(2, 4))
+    with np.errstate(invalid='ignore'):
+        return np.where(count > 0, np.where(valid, blocks, 0.0).sum(axis=(2, 4)) / count, np.nan).astype(np.float32)
+
+def build_pyramid(source: RasterSource, path: str, min_zoom: int, max_zoom: int,
+                  bounds: Tuple[float, float, float, float] = None) -> Dict[str, int]:
+    """
+    Renders the finest level from the source scenes, then each coarser level
+    from the one below it. Returns the number of tiles written per zoom.
+    """
+    if bounds is None:
+        bounds = (
+            min(scene.bounds[0] for scene in source.scenes), min(scene.bounds[1] for scene in source.scenes),
+            max(scene.bounds[2] for scene in source.scenes), max(scene.bounds[3] for scene in source.scenes)
+        )
+    conn = sqlite3.connect(path)
+    written = {}
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("DELETE FROM tiles")
+            conn.executemany("INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)", [
+                ("name", "bio-risk-indicators"),
+                ("format", "float32-layers"),
+                ("layers", json.dumps(LAYERS)),
+                ("tile_size", str(TILE_PIXELS)),
+                ("bounds", ",".join(str(v) for v in bounds)),
+                ("minzoom", str(min_zoom)),
+                ("maxzoom", str(max_zoom))
+            ])
+
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            count = 0
+            with conn:
+                for x, y in tiles_covering(zoom, bounds):
+                    if zoom == max_zoom:
+                        tile = render_tile(source, zoom, x, y)
+                    else:
+                        tile = downsample_tile([
+                            [_stored_tile(conn, zoom + 1, 2 * x + dx, 2 * y + dy) for dx in (0, 1)]
+                            for dy in (0, 1)
+                        ])
+                    if tile is not None:
+                        conn.execute("INSERT INTO tiles VALUES (?, ?, ?, ?)", (zoom, x, y, encode_tile(tile)))
+                        count += 1
+            written[zoom] = count
+    finally:
+        conn.close()
+    return written
+
+def _stored_tile(conn: sqlite3.Connection, zoom: int, x: int, y: int) -> Optional[np.ndarray]:
+    row = conn.execute(
+        "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", (zoom, x, y)
+    ).fetchone()
+    return decode_tile(row[0]) if row else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the indicator tile pyramid from local rasters.")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--rasters", nargs="*", help="scenes to read (defaults to BIO_RASTER_PATHS)")
+    parser.add_argument("--min-zoom", type=int, default=6)
+    parser.add_argument("--max-zoom", type=int, default=12)
+    args = parser.parse_args()
+
+    source = RasterSource.from_paths(args.rasters) if args.rasters else RasterSource.from_env()
+    if source is None or not source.scenes:
+        parser.error("no rasters given and BIO_RASTER_PATHS is not set")
+    written = build_pyramid(source, args.output, args.min_zoom, args.max_zoom)
+    for zoom, count in sorted(written.items()):
+        print(f"z{zoom}: {count} tiles")
+    print(f"Saved tile pyramid to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import json
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Band roles a scene can provide; red + nir are required for NDVI
+BAND_ROLES = ["red", "green", "nir", "swir", "thermal"]
+# Pixels are subsampled so a grid cell never reduces more than this many per side
+MAX_CELL_PIXELS = 32
+
+# Pixels at or above this NDVI count towards forest_coverage
+FOREST_NDVI = 0.6
+
+class RasterScene:
+    """
+    A georeferenced band stack in EPSG:4326, row 0 at the northern edge.
+    Subclasses only implement windowed reads; nothing outside the window is decoded.
+    `bounds` is where the scene has data, `extent` what its pixel grid spans (the same unless given).
+    """
+
+    REQUIRED_BANDS = ("red", "nir")
+
+    def __init__(self, path: str, bounds: Tuple[float, float, float, float], shape: Tuple[int, int],
+                 bands: Dict[str, int], nodata: float = None, extent: Tuple[float, float, float, float] = None):
+        missing = set(self.REQUIRED_BANDS) - set(bands)
+        if missing:
+            raise ValueError(f"Raster '{path}' has no {sorted(missing)} band mapping")
+        self.path = path
+        self.bounds = tuple(float(v) for v in bounds)
+        self.extent = tuple(float(v) for v in extent) if extent is not None else self.bounds
+        self.height, self.width = int(shape[0]), int(shape[1])
+        self.bands = bands
+        self.nodata = nodata
+
+    def covers(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> bool:
+        s, w, n, e = self.bounds
+        return s <= min_lat and w <= min_lng and max_lat <= n and max_lng <= e
+
+    def pixel_rows(self, lat: np.ndarray) -> np.ndarray:
+        """
+        Fractional pixel row of each latitude.
+        """
+        s, _, n, _ = self.extent
+        return (n - lat) / (n - s) * self.height
+
+    def pixel_cols(self, lng: np.ndarray) -> np.ndarray:
+        _, w, _, e = self.extent
+        return (lng - w) / (e - w) * self.width
+
+    def read(self, role: str, rows: slice, cols: slice) -> np.ndarray:
+        """
+        One band over a (possibly strided) pixel window, as float32 with nodata as NaN.
+        """
+        data = np.asarray(self._read(self.bands[role], rows, cols), dtype=np.float32)
+        if self.nodata is not None:
+            data = np.where(data == self.nodata, np.float32(np.nan), data)
+        return data
+
+    def index_layers(self, rows: slice, cols: slice) -> Dict[str, np.ndarray]:
+        """
+        Per-pixel ndvi, water_index (open water 0/1), forest_coverage (0/100) and,
+        with a thermal band, temperature (LST in °C) over a window. NaN is no data.
+        """
+        red, nir = self.read("red", rows, cols), self.read("nir", rows, cols)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ndvi = (nir - red) / (nir + red)
+            layers = {
+                "ndvi": ndvi,
+                "forest_coverage": np.where(np.isfinite(ndvi), 100.0 * (ndvi >= FOREST_NDVI), np.nan)
+            }
+            if "green" in self.bands:
+                other = self.read("swir", rows, cols) if "swir" in self.bands else nir
+                green = self.read("green", rows, cols)
+                # MNDWI with a SWIR band, NDWI otherwise; positive values are open water
+                mndwi = (green - other) / (green + other)
+                layers["water_index"] = np.where(np.isfinite(mndwi), (mndwi > 0).astype(np.float32), np.nan)
+        if "thermal" in self.bands:
+            layers["temperature"] = self.read("thermal", rows, cols)
+        return layers
+
+    def _read(self, band: int, rows: slice, cols: slice) -> np.ndarray:
+        raise NotImplementedError
+
+class NpyScene(RasterScene):
+    """
+    A (bands, height, width) .npy stack, memory-mapped, with a JSON sidecar
+    (`<path>.json`) holding bounds [south, west, north, east], band indices and nodata.
+    """
+
+    def __init__(self, path: str):
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.stack = np.load(path, mmap_mode='r')
+        if self.stack.ndim != 3:
+            raise ValueError(f"Raster '{path}' must be a (bands, height, width) array")
+        super().__init__(path, meta["bounds"], self.stack.shape[1:], meta["bands"], meta.get("nodata"))
+
+    def _read(self, band: int, rows: slice, cols: slice) -> np.ndarray:
+        # Slicing the memmap only pages in the rows of the window
+        return self.stack[band, rows, cols]
+
+class GeoTiffScene(RasterScene):
+    """
+    A GeoTIFF / COG read through rasterio windows. Strided reads are served
+    from overviews when the file has them.
+    Bands are mapped from their descriptions (e.g. "red", "nir") unless given.
+    """
+
+    def __init__(self, path: str, bands: Dict[str, int] = None):
+        try:
+            import rasterio
+        except ImportError as e:
+            raise RuntimeError("Reading GeoTIFF scenes requires rasterio (pip install rasterio)") from e
+        self.dataset = rasterio.open(path)
+        if self.dataset.crs is None or self.dataset.crs.to_epsg() != 4326:
+            raise ValueError(f"Raster '{path}' must be in EPSG:4326, found {self.dataset.crs}")
+        if bands is None:
+            bands = {
+                (description or "").lower(): index
+                for index, description in enumerate(self.dataset.descriptions)
+                if (description or "").lower() in BAND_ROLES
+            }
+        b = self.dataset.bounds
+        super().__init__(path, (b.bottom, b.left, b.top, b.right), (self.dataset.height, self.dataset.width),
+                         bands, self.dataset.nodata)
+
+    def _read(self, band: int, rows: slice, cols: slice) -> np.ndarray:
+        from rasterio.windows import Window
+        step = rows.step or 1
+        window = Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+        out_shape = (-(-(rows.stop - rows.start) // step), -(-(cols.stop - cols.start) // step))
+        return self.dataset.read(band + 1, window=window, out_shape=out_shape)
+
+def open_scene(path: str) -> RasterScene:
+    """
+    Opens a scene by file extension (.npy stack or GeoTIFF).
+    """
+    if path.lower().endswith(".npy"):
+        return NpyScene(path)
+    return GeoTiffScene(path)
+
+class RasterSource:
+    """
+    Derives the grid feature columns from real band rasters.
+
+    For each tile, only the pixel window under the tile is read, subsampled so
+    no cell spans more than MAX_CELL_PIXELS per side, and every index is a
+    block reduction (np.add.reduceat) over each cell's pixels.
+    """
+
+    def __init__(self, scenes: List[RasterScene]):
+        self.scenes = scenes
+
+    @classmethod
+    def from_paths(cls, paths: List[str]) -> "RasterSource":
+        return cls([open_scene(path) for path in paths if path])
+
+    @classmethod
+    def from_env(cls, variable: str = "BIO_RASTER_PATHS") -> Optional["RasterSource"]:
+        """
+        Scenes listed in the environment (os.pathsep separated), or None when unset.
+        """
+        paths = [p for p in os.environ.get(variable, "").split(os.pathsep) if p]
+        return cls.from_paths(paths) if paths else None
+
+    def find(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> Optional[RasterScene]:
+        """
+        First scene that fully covers the bbox.
+        """
+        for scene in self.scenes:
+            if scene.covers(min_lat, min_lng, max_lat, max_lng):
+                return scene
+        return None
+
+    @staticmethod
+    def cell_columns(scene: RasterScene, lat_edges: np.ndarray, lng_edges: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Per-cell means of the scene's index layers (see index_layers) for the cells
+        between consecutive lat_edges (ascending, south to north) and lng_edges.
+        Returned arrays are (n_rows, n_cols), row 0 southernmost; NaN where a cell has no data.
+        """
+        # Pixel rows run north to south, so walk the cell rows in reverse
+        row_edges = np.clip(np.floor(scene.pixel_rows(lat_edges[::-1])).astype(np.int64), 0, scene.height)
+        col_edges = np.clip(np.floor(scene.pixel_cols(lng_edges)).astype(np.int64), 0, scene.width)
+        r0, r1 = int(row_edges[0]), max(int(row_edges[-1]), int(row_edges[0]) + 1)
+        c0, c1 = int(col_edges[0]), max(int(col_edges[-1]), int(col_edges[0]) + 1)
+        r1, c1 = min(r1, scene.height), min(c1, scene.width)
+        r0, c0 = min(r0, r1 - 1), min(c0, c1 - 1)
+
+        # 1. Subsample large cells; strided reads on a memmap (or overviews) keep the window small
+        cell_px = max(np.diff(row_edges).max(), np.diff(col_edges).max(), 1)
+        step = int(-(-cell_px // MAX_CELL_PIXELS))
+        rows, cols = slice(r0, r1, step), slice(c0, c1, step)
+
+        # Cell starts within the strided window; a cell narrower than a pixel samples the pixel under it
+        n_win_rows, n_win_cols = -(-(r1 - r0) // step), -(-(c1 - c0) // step)
+        row_starts = np.clip((row_edges[:-1] - r0) // step, 0, n_win_rows - 1)
+        col_starts = np.clip((col_edges[:-1] - c0) // step, 0, n_win_cols - 1)
+
+        def block_sum(values: np.ndarray) -> np.ndarray:
+            return np.add.reduceat(np.add.reduceat(values, row_starts, axis=0), col_starts, axis=1)
+
+        # 2. Per-pixel indices over the window, then a NaN-aware mean per cell
+        columns = {}
+        for name, values in scene.index_layers(rows, cols).items():
+            valid = np.isfinite(values)
+            count = block_sum(valid.astype(np.float64))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns[name] = np.where(count > 0, block_sum(np.where(valid, values, 0.0)) / count, np.nan)
+            if name == "ndvi":
+                columns["valid_pixels"] = count
+
+        # Back to row 0 = south
+        return {key: values[::-1] for key, values in columns.items()}
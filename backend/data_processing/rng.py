@@ -0,0 +1,43 @@
+import hashlib
+import random
+import numpy as np
+
+def stable_seed(*parts) -> int:
+    """
+    64-bit seed from a process-independent hash of the given values.
+    Floats are rounded to 1e-7 degrees so tiny representation noise does not change the seed.
+    """
+    normalized = tuple(round(p, 7) if isinstance(p, float) else p for p in parts)
+    digest = hashlib.blake2b(repr(normalized).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def request_rng(*parts) -> np.random.Generator:
+    """
+    Private NumPy generator for one request, never touching global random state.
+    """
+    return np.random.default_rng(stable_seed(*parts))
+
+def request_random(*parts) -> random.Random:
+    """
+    Private stdlib Random instance for one request, never touching global random state.
+    """
+    return random.Random(stable_seed(*parts))
+
+def counter_uniform(seed: int, *counters) -> np.ndarray:
+    """
+    Uniform [0, 1) floats that depend only on seed and the counters (a splitmix64 hash),
+    so any element can be computed on its own, in any order, without a generator's state.
+    seed is a 64-bit integer or an array of them; seed and counters (non-negative
+    integers or integer arrays) broadcast together.
+    """
+    x = np.asarray(seed, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for counter in counters:
+            x = _splitmix64(x + np.asarray(counter).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+    return (x >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
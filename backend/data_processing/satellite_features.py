@@ -1,96 +1,296 @@
 import numpy as np
-import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Tuple
+
+from data_processing.rng import stable_seed
+from data_processing.raster import RasterSource, FOREST_NDVI
+from data_processing.world_grid import WorldGrid
+from monitoring.metrics import metrics
+
+# Numeric land-use codes shared by the rule engine and the ML feature vector
+LAND_USE_CLASSES = ["forest", "agriculture", "urban", "water"]
+LAND_USE_CODES = {name: code for code, name in enumerate(LAND_USE_CLASSES)}
+
+# Simulated feature distributions, one row per land-use code
+LAND_USE_PROBS = [0.4, 0.3, 0.2, 0.1]
+BASE_TEMPERATURE = 25.0
+NDVI_RANGE = np.array([[0.6, 0.9], [0.4, 0.7], [0.1, 0.3], [0.0, 0.1]])
+TEMP_OFFSET_RANGE = np.array([[-2.0, 2.0], [0.0, 5.0], [5.0, 10.0], [0.0, 5.0]])
+WATER_INDEX_RANGE = np.array([[0.1, 0.3], [0.0, 0.1], [0.0, 0.1], [0.8, 1.0]])
+BIOMASS_PER_NDVI = np.array([450.0, 200.0, 50.0, 10.0])
+BIOMASS_NOISE = np.array([[-10.0, 10.0], [-5.0, 5.0], [0.0, 5.0], [0.0, 2.0]])
+COVERAGE_RANGE = np.array([[75.0, 98.0], [20.0, 45.0], [5.0, 15.0], [0.0, 5.0]])
+
+# Land use classified from raster-derived indices
+WATER_PRESENCE_THRESHOLD = 0.5
+AGRICULTURE_NDVI = 0.3
 
 class SatelliteProcessor:
     """
     Simulates or integrates real satellite data ingestion.
     Calculates NDVI, Land Use, Temperature, and Water Index for a given region.
+    
+    Regions covered by a precomputed tile pyramid (data_processing.pyramid) are
+    aggregated from its nearest zoom level, those covered by a RasterSource scene
+    are read from its bands, and everywhere else the features are simulated.
     """
     
-    def __init__(self, grid_size: int = 5):
+    def __init__(self, grid_size: int = 5, tile_size: int = 64, source: RasterSource = None, pyramid=None):
         self.grid_size = grid_size
+        self.tile_size = tile_size
+        self.source = source
+        self.pyramid = pyramid
+
+    @staticmethod
+    def grid_seed(min_lat: float, min_lng: float, max_lat: float, max_lng: float, grid_size: int) -> int:
+        """
+        Seed that keeps the simulated features consistent for the same bbox and resolution.
+        """
+        return stable_seed("grid", min_lat, min_lng, max_lat, max_lng, grid_size)
 
-    def get_grid_features(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[Dict[str, Any]]:
+    def get_grid_features(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                          grid_size: int = None, seed: int = None) -> List[Dict[str, Any]]:
         """
         Divides the bounding box into a grid and generates features for each cell.
         """
-        # Ensure consistency for the same location
-        seed = int((min_lat + min_lng) * 1000000)
-        random.seed(seed)
+        return self.columns_to_cells(self.get_grid_columns(min_lat, min_lng, max_lat, max_lng, grid_size, seed))
+
+    def get_grid_columns(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                         grid_size: int = None, seed: int = None) -> Dict[str, np.ndarray]:
+        """
+        Columnar variant of get_grid_features: one NumPy array per feature,
+        cells in row-major (i, j) order and land use as LAND_USE_CODES.
+        """
+        grid_size = grid_size or self.grid_size
+        tiles = [columns for _, _, columns in self.iter_tiles(min_lat, min_lng, max_lat, max_lng, grid_size, seed)]
+        if len(tiles) == 1:
+            return tiles[0]
+        
+        grid = {key: np.concatenate([tile[key] for tile in tiles]) for key in tiles[0]}
+        order = np.argsort(grid["row"] * grid_size + grid["col"])
+        return {key: values[order] for key, values in grid.items()}
+
+    def tile_layout(self, grid_size: int = None) -> Tuple[int, int]:
+        """
+        Returns (tiles_per_side, tile_size) for a grid resolution.
+        """
+        grid_size = grid_size or self.grid_size
+        tile_size = min(self.tile_size, grid_size)
+        return -(-grid_size // tile_size), tile_size
+
+    def iter_tiles(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                   grid_size: int = None, seed: int = None) -> Iterator[Tuple[int, int, Dict[str, np.ndarray]]]:
+        """
+        Yields (tile_row, tile_col, columns) one tile at a time, so callers
+        only ever hold tile_size x tile_size cells in memory.
+        """
+        grid_size = grid_size or self.grid_size
+        if seed is None:
+            seed = self.grid_seed(min_lat, min_lng, max_lat, max_lng, grid_size)
+        tiles_per_side, _ = self.tile_layout(grid_size)
+        for tile_row in range(tiles_per_side):
+            for tile_col in range(tiles_per_side):
+                yield tile_row, tile_col, self.get_tile_columns(
+                    min_lat, min_lng, max_lat, max_lng, grid_size, tile_row, tile_col, seed
+                )
+
+    def find_scene(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float, cell_degrees: float):
+        """
+        Where real features for the bbox come from: a pyramid level, a raster scene, or None to simulate.
+        """
+        if self.pyramid is not None and self.pyramid.covers(min_lat, min_lng, max_lat, max_lng):
+            return self.pyramid.level_for(cell_degrees)
+        if self.source is not None:
+            return self.source.find(min_lat, min_lng, max_lat, max_lng)
+        return None
+
+    @metrics.span("grid_features")
+    def get_tile_columns(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                         grid_size: int, tile_row: int, tile_col: int, seed: int) -> Dict[str, np.ndarray]:
+        """
+        Generates the columns for one tile of a grid_size x grid_size grid.
+        Each tile draws from its own generator derived from (seed, tile), so a
+        tile is the same whether it is computed alone, in parallel or as part
+        of the full grid.
+        """
+        _, tile_size = self.tile_layout(grid_size)
+        
+        lat_step = (max_lat - min_lat) / grid_size
+        lng_step = (max_lng - min_lng) / grid_size
+        rows = np.arange(tile_row * tile_size, min((tile_row + 1) * tile_size, grid_size))
+        cols = np.arange(tile_col * tile_size, min((tile_col + 1) * tile_size, grid_size))
+        row = np.repeat(rows, cols.size)
+        col = np.tile(cols, rows.size)
+        
+        scene = self.find_scene(min_lat, min_lng, max_lat, max_lng, min(lat_step, lng_step))
+        if scene is not None:
+            cells = RasterSource.cell_columns(
+                scene,
+                min_lat + np.append(rows, rows[-1] + 1) * lat_step,
+                min_lng + np.append(cols, cols[-1] + 1) * lng_step
+            )
+            valid, features = self.measured_features({key: values.ravel() for key, values in cells.items()})
+            if not valid.all():
+                # Cells the scene has no data for (nodata pixels, unbuilt pyramid tiles) are simulated
+                simulated = self.simulated_tile_features(row.size, seed, tile_row, tile_col)
+                features = tuple(np.where(valid, measured, sim) for measured, sim in zip(features, simulated))
+            return self._finish_columns(row, col, min_lat, min_lng, lat_step, lng_step, *features)
+        
+        return self._finish_columns(row, col, min_lat, min_lng, lat_step, lng_step,
+                                    *self.simulated_tile_features(row.size, seed, tile_row, tile_col))
+
+    @staticmethod
+    def simulated_tile_features(n_cells: int, seed: int, tile_row: int, tile_col: int) -> Tuple[np.ndarray, ...]:
+        """
+        Simulated (ndvi, land_use, temperature, water_index, biomass, coverage) for the cells of one tile.
+        """
+        rng = np.random.default_rng([seed, tile_row, tile_col])
+        
+        # Logic: In a real app, this calls Sentinel Hub / Google Earth Engine
+        # Here we simulate realistic distributions, drawn for every cell at once
+        
+        # 1. Land Use (Forest, Agriculture, Urban, Water)
+        land_use = rng.choice(len(LAND_USE_CLASSES), size=n_cells, p=LAND_USE_PROBS)
         
-        grid_cells = []
-        lat_step = (max_lat - min_lat) / self.grid_size
-        lng_step = (max_lng - min_lng) / self.grid_size
+        # 2. NDVI (Vegetation Health)
+        ndvi = rng.uniform(NDVI_RANGE[land_use, 0], NDVI_RANGE[land_use, 1])
         
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                cell_lat = min_lat + (i + 0.5) * lat_step
-                cell_lng = min_lng + (j + 0.5) * lng_step
-                
-                # Logic: In a real app, this calls Sentinel Hub / Google Earth Engine
-                # Here we simulate realistic distributions
-                
-                # 1. Land Use (Forest, Urban, Water, Agriculture)
-                land_use_probs = [0.4, 0.2, 0.1, 0.3] # Forest, Urban, Water, Agri
-                land_use = random.choices(["forest", "urban", "water", "agriculture"], weights=land_use_probs)[0]
-                
-                # 2. NDVI (Vegetation Health)
-                if land_use == "forest":
-                    ndvi = random.uniform(0.6, 0.9)
-                elif land_use == "agriculture":
-                    ndvi = random.uniform(0.4, 0.7)
-                elif land_use == "urban":
-                    ndvi = random.uniform(0.1, 0.3)
-                else: # water
-                    ndvi = random.uniform(0, 0.1)
-                
-                # 3. Temperature (Land Surface Temp)
-                # Urban areas are usually hotter (Heat Island Effect)
-                base_temp = 25.0
-                if land_use == "urban":
-                    temp = base_temp + random.uniform(5, 10)
-                elif land_use == "forest":
-                    temp = base_temp + random.uniform(-2, 2)
-                else:
-                    temp = base_temp + random.uniform(0, 5)
-                
-                # 4. Water Presence Index (0.0 - 1.0)
-                if land_use == "water":
-                    water_index = random.uniform(0.8, 1.0)
-                elif land_use == "forest":
-                    water_index = random.uniform(0.1, 0.3)
-                else:
-                    water_index = random.uniform(0, 0.1)
-                
-                # 5. Biomass Estimation (Metric Tons per Hectare)
-                # Forest has highest biomass, urban lowest
-                if land_use == "forest":
-                    biomass = ndvi * 450 + random.uniform(-10, 10)
-                    coverage = random.uniform(75, 98)
-                elif land_use == "agriculture":
-                    biomass = ndvi * 200 + random.uniform(-5, 5)
-                    coverage = random.uniform(20, 45)
-                elif land_use == "urban":
-                    biomass = ndvi * 50 + random.uniform(0, 5)
-                    coverage = random.uniform(5, 15)
-                else: # water
-                    biomass = ndvi * 10 + random.uniform(0, 2)
-                    coverage = random.uniform(0, 5)
-
-                grid_cells.append({
-                    "grid_id": f"{i}_{j}",
-                    "lat": round(cell_lat, 5),
-                    "lng": round(cell_lng, 5),
-                    "ndvi": round(ndvi, 3),
-                    "land_use": land_use,
-                    "temperature": round(temp, 1),
-                    "water_index": round(water_index, 2),
-                    "biomass": round(max(0, biomass), 1),
-                    "forest_coverage": round(max(0, coverage), 1)
-                })
-                
-        return grid_cells
+        # 3. Temperature (Land Surface Temp)
+        # Urban areas are usually hotter (Heat Island Effect)
+        temperature = BASE_TEMPERATURE + rng.uniform(TEMP_OFFSET_RANGE[land_use, 0], TEMP_OFFSET_RANGE[land_use, 1])
+        
+        # 4. Water Presence Index (0.0 - 1.0)
+        water_index = rng.uniform(WATER_INDEX_RANGE[land_use, 0], WATER_INDEX_RANGE[land_use, 1])
+        
+        # 5. Biomass Estimation (Metric Tons per Hectare)
+        # Forest has highest biomass, urban lowest
+        biomass = ndvi * BIOMASS_PER_NDVI[land_use] + rng.uniform(BIOMASS_NOISE[land_use, 0], BIOMASS_NOISE[land_use, 1])
+        coverage = rng.uniform(COVERAGE_RANGE[land_use, 0], COVERAGE_RANGE[land_use, 1])
+        return ndvi, land_use, temperature, water_index, biomass, coverage
+
+    @metrics.span("grid_features")
+    def world_cell_columns(self, level: int, rows: np.ndarray, cols: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Columns for arbitrary cells of a WorldGrid level, in the given order.
+        Simulated values come from per-cell counters rather than a generator,
+        so a cell is the same whichever viewport or batch it is requested in.
+        """
+        d = WorldGrid.cell_degrees(level)
+
+        # Real data is read for the rectangle spanning the requested cells
+        r0, r1, c0, c1 = int(rows.min()), int(rows.max()) + 1, int(cols.min()), int(cols.max()) + 1
+        scene = self.find_scene(-90.0 + r0 * d, -180.0 + c0 * d, -90.0 + r1 * d, -180.0 + c1 * d, d)
+        if scene is not None:
+            cells = RasterSource.cell_columns(scene, -90.0 + np.arange(r0, r1 + 1) * d, -180.0 + np.arange(c0, c1 + 1) * d)
+            index = (rows - r0, cols - c0)
+            valid, features = self.measured_features({key: values[index] for key, values in cells.items()})
+            if not valid.all():
+                # As in get_tile_columns, cells without data are simulated
+                simulated = self.simulated_world_features(level, rows[~valid], cols[~valid])
+                for measured, sim in zip(features, simulated):
+                    measured[~valid] = sim
+            return self._finish_columns(rows, cols, -90.0, -180.0, d, d, *features)
+
+        return self._finish_columns(rows, cols, -90.0, -180.0, d, d, *self.simulated_world_features(level, rows, cols))
+
+    @staticmethod
+    def simulated_world_features(level: int, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Simulated (ndvi, land_use, temperature, water_index, biomass, coverage) for world cells.
+        """
+        # Same distributions as simulated_tile_features; land use by inverting the cumulative LAND_USE_PROBS
+        draws = [WorldGrid.cell_uniform(level, rows, cols, k) for k in range(6)]
+        land_use = np.minimum(np.searchsorted(np.cumsum(LAND_USE_PROBS), draws[0], side="right"),
+                              len(LAND_USE_CLASSES) - 1)
+
+        def between(ranges: np.ndarray, u: np.ndarray) -> np.ndarray:
+            return ranges[land_use, 0] + (ranges[land_use, 1] - ranges[land_use, 0]) * u
+
+        ndvi = between(NDVI_RANGE, draws[1])
+        temperature = BASE_TEMPERATURE + between(TEMP_OFFSET_RANGE, draws[2])
+        water_index = between(WATER_INDEX_RANGE, draws[3])
+        biomass = ndvi * BIOMASS_PER_NDVI[land_use] + between(BIOMASS_NOISE, draws[4])
+        coverage = between(COVERAGE_RANGE, draws[5])
+        return ndvi, land_use, temperature, water_index, biomass, coverage
+
+    @staticmethod
+    def measured_features(cells: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        """
+        (valid, features) from RasterSource.cell_columns values flattened to the requested cells.
+        A cell is valid where the scene measured its NDVI; only then are its features usable.
+        Optional bands a valid cell lacks fall back to neutral values (no water, BASE_TEMPERATURE).
+        """
+        valid = np.isfinite(cells["ndvi"])
+        missing = np.full(valid.size, np.nan)
+        ndvi = np.nan_to_num(cells["ndvi"])
+        water_index = np.nan_to_num(cells.get("water_index", missing))
+        temperature = np.nan_to_num(cells.get("temperature", missing), nan=BASE_TEMPERATURE)
+        coverage = np.nan_to_num(cells["forest_coverage"])
+        land_use = SatelliteProcessor.classify_land_use(ndvi, water_index)
+        biomass = ndvi * BIOMASS_PER_NDVI[land_use]
+        return valid, (ndvi, land_use, temperature, water_index, biomass, coverage)
+
+    @staticmethod
+    def classify_land_use(ndvi: np.ndarray, water_index: np.ndarray) -> np.ndarray:
+        """
+        LAND_USE_CODES from measured indices: open water, then forest, agriculture, urban by NDVI.
+        """
+        return np.select(
+            [water_index >= WATER_PRESENCE_THRESHOLD, ndvi >= FOREST_NDVI, ndvi >= AGRICULTURE_NDVI],
+            [LAND_USE_CODES["water"], LAND_USE_CODES["forest"], LAND_USE_CODES["agriculture"]],
+            default=LAND_USE_CODES["urban"]
+        )
+
+    @staticmethod
+    def cell_centers(row: np.ndarray, col: np.ndarray, min_lat: float, min_lng: float, lat_step: float,
+                     lng_step: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rounded cell centre coordinates, as served in each cell's location.
+        """
+        return np.round(min_lat + (row + 0.5) * lat_step, 5), np.round(min_lng + (col + 0.5) * lng_step, 5)
+
+    @staticmethod
+    def _finish_columns(row: np.ndarray, col: np.ndarray, min_lat: float, min_lng: float, lat_step: float,
+                        lng_step: float, ndvi: np.ndarray, land_use: np.ndarray, temperature: np.ndarray,
+                        water_index: np.ndarray, biomass: np.ndarray, coverage: np.ndarray) -> Dict[str, np.ndarray]:
+        lat, lng = SatelliteProcessor.cell_centers(row, col, min_lat, min_lng, lat_step, lng_step)
+        return {
+            "row": row,
+            "col": col,
+            "lat": lat,
+            "lng": lng,
+            "ndvi": np.round(ndvi, 3),
+            "land_use": land_use,
+            "temperature": np.round(temperature, 1),
+            "water_index": np.round(water_index, 2),
+            "biomass": np.round(np.maximum(0, biomass), 1),
+            "forest_coverage": np.round(np.maximum(0, coverage), 1)
+        }
+
+    @staticmethod
+    def columns_to_cells(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Builds the per-cell dicts served as JSON from get_grid_columns output.
+        """
+        return [
+            {
+                "grid_id": f"{i}_{j}",
+                "lat": lat,
+                "lng": lng,
+                "ndvi": ndvi,
+                "land_use": LAND_USE_CLASSES[lu],
+                "temperature": temp,
+                "water_index": water,
+                "biomass": biomass,
+                "forest_coverage": coverage
+            }
+            for i, j, lat, lng, ndvi, lu, temp, water, biomass, coverage in zip(
+                columns["row"].tolist(), columns["col"].tolist(),
+                columns["lat"].tolist(), columns["lng"].tolist(),
+                columns["ndvi"].tolist(), columns["land_use"].tolist(),
+                columns["temperature"].tolist(), columns["water_index"].tolist(),
+                columns["biomass"].tolist(), columns["forest_coverage"].tolist()
+            )
+        ]
 
     @staticmethod
     def map_to_risk_engine(cell: Dict[str, Any]) -> Dict[str, Any]:
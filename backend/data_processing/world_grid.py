@@ -0,0 +1,91 @@
+import math
+import numpy as np
+from typing import List, Tuple
+
+from data_processing.rng import stable_seed, counter_uniform
+
+# Cells of level L are 2**-L degrees on a side, counted from (-90, -180); level 0 is one-degree cells
+MIN_LEVEL = 0
+MAX_LEVEL = 20
+# level_for picks the coarsest level with at least this many cells across the bbox's shorter side
+TARGET_CELLS_PER_SIDE = 5
+
+# Simulated world cells draw from counter_uniform(WORLD_SEED, level, row, col, draw):
+# draws 0-5 are the features, SCENARIO_DRAW the what-if urban conversion
+WORLD_SEED = stable_seed("world-grid")
+SCENARIO_DRAW = 6
+
+class WorldGrid:
+    """
+    A fixed lat/lng grid over the whole globe, one per level.
+
+    Unlike the per-request grids of /analyze-region, a cell's id
+    ("{level}/{row}/{col}") and its features do not depend on the bbox it
+    was requested with, so overlapping viewports share cells and a client
+    can cache them by id.
+    """
+
+    @staticmethod
+    def cell_degrees(level: int) -> float:
+        return 2.0 ** -level
+
+    @staticmethod
+    def level_for(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> int:
+        """
+        The coarsest level giving TARGET_CELLS_PER_SIDE cells across the bbox.
+        """
+        span = min(max_lat - min_lat, max_lng - min_lng)
+        level = math.ceil(math.log2(TARGET_CELLS_PER_SIDE / span))
+        return min(max(level, MIN_LEVEL), MAX_LEVEL)
+
+    @staticmethod
+    def shape(level: int) -> Tuple[int, int]:
+        """
+        (rows, cols) of the whole level.
+        """
+        return 180 * 2 ** level, 360 * 2 ** level
+
+    @staticmethod
+    def cell_range(min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                   level: int) -> Tuple[int, int, int, int]:
+        """
+        Half-open (row_start, row_stop, col_start, col_stop) of the cells the bbox touches.
+        """
+        # Scaling by a power of two is exact, so a cell edge on the bbox border is never off by one
+        scale = 2.0 ** level
+        n_rows, n_cols = WorldGrid.shape(level)
+        row_start = min(max(math.floor((min_lat + 90.0) * scale), 0), n_rows - 1)
+        col_start = min(max(math.floor((min_lng + 180.0) * scale), 0), n_cols - 1)
+        row_stop = min(max(math.ceil((max_lat + 90.0) * scale), row_start + 1), n_rows)
+        col_stop = min(max(math.ceil((max_lng + 180.0) * scale), col_start + 1), n_cols)
+        return row_start, row_stop, col_start, col_stop
+
+    @staticmethod
+    def cells_in(row_start: int, row_stop: int, col_start: int, col_stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row and column arrays of a cell range, in row-major order.
+        """
+        rows, cols = np.arange(row_start, row_stop), np.arange(col_start, col_stop)
+        return np.repeat(rows, cols.size), np.tile(cols, rows.size)
+
+    @staticmethod
+    def cell_ids(level: int, rows: np.ndarray, cols: np.ndarray) -> List[str]:
+        return [f"{level}/{row}/{col}" for row, col in zip(rows.tolist(), cols.tolist())]
+
+    @staticmethod
+    def parse_ids(cell_ids: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (levels, rows, cols) arrays for "{level}/{row}/{col}" ids; raises ValueError for malformed ones.
+        """
+        if not cell_ids:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, empty
+        levels, rows, cols = np.array([list(map(int, cell_id.split("/"))) for cell_id in cell_ids], dtype=np.int64).T
+        return levels, rows, cols
+
+    @staticmethod
+    def cell_uniform(level: int, rows: np.ndarray, cols: np.ndarray, draw: int) -> np.ndarray:
+        """
+        One uniform [0, 1) value per cell, fixed for (level, row, col, draw).
+        """
+        return counter_uniform(WORLD_SEED, level, rows, cols, draw)
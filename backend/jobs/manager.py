@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, BinaryIO, Optional
+
+JOB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "job_results")
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+class JobQueueFull(RuntimeError):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    """
+    One submitted unit of work and its progress. Runners report progress through
+    report_progress, which is also where a cancellation request takes effect.
+    """
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.done = 0
+        self.total = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.expires_at = None
+        self.result_path = None
+        # Bumped on every change, so watchers only emit real updates
+        self.version = 0
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def report_progress(self, done: int, total: int = None) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done = done
+        if total is not None:
+            self.total = total
+        self.version += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at
+        }
+
+class JobManager:
+    """
+    Runs long analyses and reports in the background.
+
+    A bounded thread pool executes jobs; at most max_pending jobs may wait
+    beyond those running, after which submit raises JobQueueFull. Results are
+    written to files under result_dir and, like the job records, expire
+    ttl_seconds after the job finishes. Job records live in memory only.
+    """
+
+    def __init__(self, result_dir: str = JOB_DIR, max_workers: int = 2, max_pending: int = 16,
+                 ttl_seconds: float = 86400):
+        self.result_dir = result_dir
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._kinds: Dict[str, Dict[str, Any]] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self.rejected = 0
+
+    def register(self, kind: str, runner: Callable[[Dict[str, Any], Job, BinaryIO], None],
+                 media_type: str, extension: str) -> None:
+        """
+        Declares a job kind; runner(params, job, out) writes the result to the binary file out.
+        """
+        self._kinds[kind] = {"runner": runner, "media_type": media_type, "extension": extension}
+
+    def start(self) -> None:
+        os.makedirs(self.result_dir, exist_ok=True)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+        self.sweep()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        if kind not in self._kinds:
+            raise KeyError(kind)
+        self.sweep()
+        job = Job(kind, params)
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.finished)
+            if active >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull(f"{active} jobs already queued or running")
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.sweep()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Queued jobs are dropped at once; running ones stop at their next progress report.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            self._finish(job, "cancelled")
+        return job
+
+    def media_type(self, job: Job) -> str:
+        return self._kinds[job.kind]["media_type"]
+
+    def filename(self, job: Job) -> str:
+        return f"{job.kind}_{job.id}.{self._kinds[job.kind]['extension']}"
+
+    def sweep(self) -> None:
+        """
+        Drops expired jobs and their result files, including files left by earlier runs.
+        Partial (.part) files of runs that crashed or were interrupted expire the same way,
+        ttl_seconds after they were last written; those of jobs still running here are kept.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.expires_at is not None and job.expires_at <= now]
+            for job in expired:
+                del self._jobs[job.id]
+            known = {os.path.basename(job.result_path) for job in self._jobs.values() if job.result_path}
+            known.update(
+                f"{job.id}.{self._kinds[job.kind]['extension']}.part" for job in self._jobs.values() if not job.finished
+            )
+        for job in expired:
+            self._remove_file(job.result_path)
+        try:
+            names = os.listdir(self.result_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.result_dir, name)
+            if name not in known:
+                try:
+                    if os.path.getmtime(path) + self.ttl_seconds <= now:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states = {}
+            for job in self._jobs.values():
+                states[job.status] = states.get(job.status, 0) + 1
+        return {
+            "jobs": states,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def _run(self, job: Job) -> None:
+        if job._cancel.is_set():
+            self._finish(job, "cancelled")
+            return
+        kind = self._kinds[job.kind]
+        job.status = "running"
+        job.started_at = time.time()
+        job.version += 1
+
+        path = os.path.join(self.result_dir, f"{job.id}.{kind['extension']}")
+        tmp_path = path + ".part"
+        try:
+            with open(tmp_path, 'wb') as out:
+                kind["runner"](job.params, job, out)
+            os.replace(tmp_path, path)
+            job.result_path = path
+            self._finish(job, "succeeded")
+        except JobCancelled:
+            self._remove_file(tmp_path)
+            self._finish(job, "cancelled")
+        except Exception as e:
+            self._remove_file(tmp_path)
+            job.error = str(e) or type(e).__name__
+            self._finish(job, "failed")
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + self.ttl_seconds
+        job.version += 1
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
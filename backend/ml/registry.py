@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+# Bump when the header layout or payload format changes incompatibly
+SCHEMA_VERSION = 1
+FEATURE_NAMES = ["ndvi", "land_use_code", "temperature", "water_index"]
+ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
+
+class ModelArtifactError(RuntimeError):
+    """
+    Raised when a model artifact is missing, corrupt or built for another schema.
+    """
+
+class ModelRegistry:
+    """
+    Stores fitted models as versioned artifacts: a small JSON header describing
+    the schema, features and classes, next to an uncompressed joblib payload
+    whose arrays can be memory-mapped on load. A model can also carry a compiled
+    form (ml.inference.CompiledForest) stored as plain .npy arrays, which
+    workers memory-map and share through the OS page cache.
+    
+    Artifacts are produced offline (python -m ml.train). The compiled form is
+    derived from the payload, so it is not versioned with it: train writes it,
+    and serving processes build it on first load when it is missing or stale.
+    
+    Checksums are computed when files are written. Loads only compare file
+    sizes, since hashing would page in every memory-mapped array; with
+    verify=True they check the full checksums as well.
+    """
+    
+    def __init__(self, root: str = ARTIFACT_DIR, verify: bool = False):
+        self.root = root
+        self.verify = verify
+
+    def header_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.json")
+
+    def payload_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.joblib")
+
+    def compiled_dir(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.forest")
+
+    def compiled_header_path(self, name: str) -> str:
+        return os.path.join(self.compiled_dir(name), "compiled.json")
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.header_path(name)) and os.path.exists(self.payload_path(name))
+
+    def save(self, name: str, model: Any, classes: list, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Writes the payload and then its header, so a header always describes a complete payload.
+        """
+        import joblib
+        import sklearn
+        
+        os.makedirs(self.root, exist_ok=True)
+        payload_path = self.payload_path(name)
+        joblib.dump(model, payload_path, compress=0)
+        
+        header = {
+            "schema_version": SCHEMA_VERSION,
+            "name": name,
+            "format": "joblib",
+            "payload": os.path.basename(payload_path),
+            "payload_sha256": self._sha256(payload_path),
+            "payload_bytes": os.path.getsize(payload_path),
+            "sklearn_version": sklearn.__version__,
+            "feature_names": FEATURE_NAMES,
+            "classes": classes,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **(metadata or {})
+        }
+        self._write_json(self.header_path(name), header)
+        return header
+
+    def save_compiled(self, name: str, forest) -> Dict[str, Any]:
+        """
+        Writes the packed arrays of a CompiledForest for an existing artifact; returns
+        the compiled header. Every file is replaced atomically, so processes that
+        compile the same artifact at once leave one consistent copy.
+        """
+        header = self.read_header(name)
+        directory = self.compiled_dir(name)
+        os.makedirs(directory, exist_ok=True)
+        
+        arrays = {}
+        for array_name, array in forest.arrays().items():
+            path = os.path.join(directory, f"{array_name}.npy")
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            arrays[array_name] = {"sha256": self._sha256(tmp_path), "bytes": os.path.getsize(tmp_path)}
+            os.replace(tmp_path, path)
+        
+        compiled = {
+            "format": "packed-forest",
+            # The payload it was compiled from; a retrained payload makes it stale
+            "payload_sha256": header["payload_sha256"],
+            "max_depth": forest.max_depth,
+            "arrays": arrays
+        }
+        self._write_json(self.compiled_header_path(name), compiled)
+        return compiled
+
+    def read_header(self, name: str) -> Dict[str, Any]:
+        """
+        Reads and validates an artifact header without touching the payload.
+        """
+        if not self.exists(name):
+            raise ModelArtifactError(
+                f"Model artifact '{name}' not found in {self.root}; build it with `python -m ml.train`"
+            )
+        with open(self.header_path(name)) as f:
+            header = json.load(f)
+        
+        if header.get("schema_version") != SCHEMA_VERSION:
+            raise ModelArtifactError(
+                f"Model artifact '{name}' has schema {header.get('schema_version')}, expected {SCHEMA_VERSION}"
+            )
+        if header.get("feature_names") != FEATURE_NAMES:
+            raise ModelArtifactError(f"Model artifact '{name}' was trained on features {header.get('feature_names')}")
+        return header
+
+    def load(self, name: str, mmap: bool = True) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Loads (model, header), verifying the payload checksum against the header.
+        """
+        # scikit-learn is only imported when the estimator itself is needed, so
+        # workers serving from the compiled arrays never pay for it at startup
+        import joblib
+        import sklearn
+        
+        header = self.read_header(name)
+        payload_path = self.payload_path(name)
+        if not self._matches(payload_path, header["payload_sha256"], header.get("payload_bytes")):
+            raise ModelArtifactError(f"Model artifact '{name}' payload does not match its header checksum")
+        if header["sklearn_version"] != sklearn.__version__:
+            warnings.warn(
+                f"Model artifact '{name}' was built with scikit-learn {header['sklearn_version']}, "
+                f"running {sklearn.__version__}; rebuild it with `python -m ml.train`"
+            )
+        
+        model = joblib.load(payload_path, mmap_mode='r' if mmap else None)
+        return model, header
+
+    def load_compiled(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Memory-maps the compiled arrays of an artifact; returns (arrays, header), the
+        compiled header under header["compiled"]. Returns ({}, header) when the
+        artifact has no compiled form, or one compiled from another payload.
+        """
+        header = self.read_header(name)
+        try:
+            with open(self.compiled_header_path(name)) as f:
+                compiled = json.load(f)
+        except FileNotFoundError:
+            return {}, header
+        if compiled.get("payload_sha256") != header["payload_sha256"]:
+            return {}, header
+        
+        arrays = {}
+        for array_name, expected in compiled["arrays"].items():
+            path = os.path.join(self.compiled_dir(name), f"{array_name}.npy")
+            if not os.path.exists(path) or not self._matches(path, expected["sha256"], expected["bytes"]):
+                raise ModelArtifactError(f"Compiled array '{array_name}' of '{name}' is missing or does not match its header")
+            arrays[array_name] = np.load(path, mmap_mode='r')
+        return arrays, {**header, "compiled": compiled}
+
+    def _matches(self, path: str, sha256: str, size: int = None) -> bool:
+        """
+        Size check, plus the checksum with verify=True (or for headers that predate sizes).
+        """
+        if size is not None:
+            if os.path.getsize(path) != size:
+                return False
+            if not self.verify:
+                return True
+        return self._sha256(path) == sha256
+
+    @staticmethod
+    def _write_json(path: str, data: Dict[str, Any]) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -1,91 +1,137 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-import pickle
 import os
-from typing import Dict, Any
+import threading
+import warnings
+from typing import Dict, Any, List
+
+from data_processing.satellite_features import LAND_USE_CODES
+from ml.registry import ModelRegistry
+from ml.inference import CompiledForest
+from monitoring.metrics import metrics
+
+# "numpy" scores with the compiled forest (ml.inference), "sklearn" with the fitted estimator
+ENGINES = ("numpy", "sklearn")
 
 class BiodiversityRiskModel:
     """
     ML Classifier for biodiversity risk using Random Forest.
     Trained on synthetic ecological patterns to provide data-driven predictions.
+    
+    The fitted forest comes from the model registry and is loaded lazily on the
+    first prediction; training happens offline via `python -m ml.train`. The
+    first process to need the compiled forest builds and saves it if it is missing.
+    The inference engine defaults to RISK_MODEL_ENGINE (numpy unless set).
     """
     
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
-        self.is_trained = False
-        self.model_path = os.path.join(os.path.dirname(__file__), "risk_classifier.pkl")
+    def __init__(self, registry: ModelRegistry = None, artifact_name: str = "risk_classifier", engine: str = None):
+        self.registry = registry or ModelRegistry()
+        self.artifact_name = artifact_name
+        self.engine = engine or os.environ.get("RISK_MODEL_ENGINE", "numpy")
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown risk model engine '{self.engine}', expected one of {ENGINES}")
         self.classes = ["Low Risk", "Medium Risk", "High Risk"]
-        
-        # Load or train
-        if os.path.exists(self.model_path):
-            try:
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                    self.is_trained = True
-            except Exception:
-                self._train_and_save()
-        else:
-            self._train_and_save()
+        self.header = None
+        self._model = None
+        self._forest = None
+        # Reentrant: compiling a forest in memory loads the fitted model under the same lock
+        self._load_lock = threading.RLock()
+
+    @property
+    def is_trained(self) -> bool:
+        return self._model is not None or self._forest is not None
 
-    def _train_and_save(self):
+    @property
+    def forest(self) -> CompiledForest:
         """
-        Generates synthetic data and trains the classifier.
-        Features: [NDVI, LandUse_Code, Temperature, WaterIndex]
-        LandUse_Code: 0: Forest, 1: Agriculture, 2: Urban, 3: Water
+        The compiled forest, memory-mapped from the registry on first access.
         """
-        np.random.seed(42)
-        n_samples = 1000
-        
-        # Features
-        ndvi = np.random.uniform(0.1, 0.9, n_samples)
-        land_use = np.random.randint(0, 4, n_samples)
-        temp = np.random.uniform(20, 40, n_samples)
-        water = np.random.uniform(0, 1, n_samples)
-        
-        X = np.stack([ndvi, land_use, temp, water], axis=1)
-        
-        # Labels (Simplified ecological logic for synthetic training)
-        y = []
-        for row in X:
-            score = 0
-            # Logic similar to Risk Engine but with different weights for ML patterns
-            if row[0] < 0.3: score += 2 # Low NDVI
-            if row[1] == 2: score += 3  # Urban
-            if row[2] > 33: score += 2   # High Temp
-            if row[3] < 0.2: score += 2  # Low Water
-            
-            if score >= 6: y.append(2)   # High
-            elif score >= 3: y.append(1) # Medium
-            else: y.append(0)            # Low
-            
-        self.model.fit(X, y)
-        self.is_trained = True
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        with open(self.model_path, 'wb') as f:
-            pickle.dump(self.model, f)
+        if self._forest is None:
+            with self._load_lock:
+                if self._forest is None:
+                    arrays, header = self.registry.load_compiled(self.artifact_name)
+                    if arrays:
+                        forest = CompiledForest(arrays, header["compiled"]["max_depth"])
+                    else:
+                        forest = self._compile()
+                    self.classes = header["classes"]
+                    self.header = header
+                    self._forest = forest
+        return self._forest
+
+    def _compile(self) -> CompiledForest:
+        """
+        Compiles the fitted model and saves the arrays, so later processes memory-map them.
+        """
+        forest = CompiledForest.from_sklearn(self.model)
+        try:
+            self.registry.save_compiled(self.artifact_name, forest)
+        except OSError as e:
+            warnings.warn(f"Could not save the compiled form of '{self.artifact_name}' ({e}); using it from memory")
+        return forest
+
+    @property
+    def model(self):
+        """
+        The fitted classifier, loaded from the registry on first access.
+        """
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    model, header = self.registry.load(self.artifact_name)
+                    self.classes = header["classes"]
+                    self.header = header
+                    self._model = model
+        return self._model
+
+    def load(self) -> None:
+        """
+        Loads the artifact for the configured engine now instead of on the first prediction.
+        """
+        if self.engine == "numpy":
+            self.forest
+        else:
+            self.model
 
     def predict(self, ndvi: float, land_use: str, temperature: float, water_index: float) -> Dict[str, Any]:
         """
         Provides risk classification and confidence score.
         """
         # Map land use to numeric codes
-        lu_map = {"forest": 0, "agriculture": 1, "urban": 2, "water": 3}
-        lu_code = lu_map.get(land_use.lower(), 0)
+        lu_code = LAND_USE_CODES.get(land_use.lower(), 0)
         
         features = np.array([[ndvi, lu_code, temperature, water_index]])
-        
-        prediction_idx = self.model.predict(features)[0]
-        probabilities = self.model.predict_proba(features)[0]
-        confidence = float(np.max(probabilities))
+        return self.batch_to_records(self.predict_batch(features))[0]
+
+    @metrics.span("ml_inference")
+    def predict_batch(self, features: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Scores a whole (n_cells, 4) feature matrix in a single pass over the forest.
+        Columns: [NDVI, LandUse_Code, Temperature, WaterIndex]
+        """
+        if self.engine == "numpy":
+            prediction_idx, probabilities = self.forest.predict(features)
+        else:
+            probabilities = self.model.predict_proba(features)
+            # Same as RandomForestClassifier.predict, without a second pass over the trees
+            prediction_idx = self.model.classes_.take(np.argmax(probabilities, axis=1))
         
         return {
-            "prediction": self.classes[prediction_idx],
-            "confidence": round(confidence, 2),
-            "probabilities": {
-                self.classes[i]: round(float(probabilities[i]), 2) 
-                for i in range(len(self.classes))
-            }
+            "prediction_idx": prediction_idx,
+            "probabilities": probabilities
         }
+
+    def batch_to_records(self, batch: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Expands predict_batch columns into predict-shaped dicts.
+        """
+        return [
+            {
+                "prediction": self.classes[idx],
+                "confidence": round(max(probs), 2),
+                "probabilities": {
+                    self.classes[i]: round(probs[i], 2) 
+                    for i in range(len(self.classes))
+                }
+            }
+            for idx, probs in zip(batch["prediction_idx"].tolist(), batch["probabilities"].tolist())
+        ]
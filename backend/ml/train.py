@@ -0,0 +1,72 @@
+import argparse
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from typing import Tuple
+
+from ml.registry import ModelRegistry, ARTIFACT_DIR
+from ml.inference import CompiledForest
+
+CLASSES = ["Low Risk", "Medium Risk", "High Risk"]
+
+def build_training_data(n_samples: int = 1000, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generates the synthetic training set.
+    Features: [NDVI, LandUse_Code, Temperature, WaterIndex]
+    LandUse_Code: 0: Forest, 1: Agriculture, 2: Urban, 3: Water
+    """
+    np.random.seed(seed)
+    
+    # Features
+    ndvi = np.random.uniform(0.1, 0.9, n_samples)
+    land_use = np.random.randint(0, 4, n_samples)
+    temp = np.random.uniform(20, 40, n_samples)
+    water = np.random.uniform(0, 1, n_samples)
+    
+    X = np.stack([ndvi, land_use, temp, water], axis=1)
+    
+    # Labels (Simplified ecological logic for synthetic training)
+    y = []
+    for row in X:
+        score = 0
+        # Logic similar to Risk Engine but with different weights for ML patterns
+        if row[0] < 0.3: score += 2 # Low NDVI
+        if row[1] == 2: score += 3  # Urban
+        if row[2] > 33: score += 2   # High Temp
+        if row[3] < 0.2: score += 2  # Low Water
+        
+        if score >= 6: y.append(2)   # High
+        elif score >= 3: y.append(1) # Medium
+        else: y.append(0)            # Low
+        
+    return X, np.array(y)
+
+def train_classifier(n_estimators: int = 100, max_depth: int = 10) -> RandomForestClassifier:
+    """
+    Trains the biodiversity risk classifier on the synthetic ecological patterns.
+    """
+    X, y = build_training_data()
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42)
+    model.fit(X, y)
+    return model
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the risk classifier and publish it to the model registry.")
+    parser.add_argument("--name", default="risk_classifier")
+    parser.add_argument("--output", default=ARTIFACT_DIR)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=10)
+    args = parser.parse_args()
+    
+    model = train_classifier(args.n_estimators, args.max_depth)
+    registry = ModelRegistry(args.output)
+    header = registry.save(args.name, model, CLASSES, {
+        "n_estimators": args.n_estimators,
+        "max_depth": args.max_depth
+    })
+    registry.save_compiled(args.name, CompiledForest.from_sklearn(model))
+    # Checksums are only compared in full here; serving processes check sizes
+    ModelRegistry(args.output, verify=True).load_compiled(args.name)
+    print(f"Saved {header['name']} (schema {header['schema_version']}) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Tuple
+
+# Upper bounds (seconds) of the latency histograms; whole requests run up to minutes for streamed grids
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Route label of requests that matched no route, so unknown paths cannot blow up the series count
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricFamily:
+    """
+    One counter or histogram and its labelled series.
+
+    A counter series is [value]; a histogram series is one count per bucket
+    (the last one +Inf, not cumulative) followed by the sum of observations.
+    """
+
+    def __init__(self, name: str, kind: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = None):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def empty_series(self) -> List[float]:
+        return [0.0] if self.kind == "counter" else [0] * (len(self.buckets) + 1) + [0.0]
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, rendered in the Prometheus text
+    exposition format (version 0.0.4).
+
+    Updates take one lock and a bisect, so spans are cheap enough for every
+    request stage. Worker processes keep their own registry; their
+    histograms travel back with the results via collect() and merge().
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> None:
+        self._families[name] = MetricFamily(name, "counter", help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = REQUEST_BUCKETS) -> None:
+        self._families[name] = MetricFamily(name, "histogram", help_text, label_names, tuple(sorted(buckets)))
+
+    def inc(self, name: str, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        family = self._families[name]
+        with self._lock:
+            series = family.series.get(labels)
+            if series is None:
+                series = family.series[labels] = family.empty_series()
+            series[0] += amount
+
+    def observe(self, name: str, labels: Tuple[str, ...], value: float) -> None:
+        family = self._families[name]
+        # Buckets are "less than or equal" bounds, so bisect_left finds the first bound >= value
+        index = bisect.bisect_left(family.buckets, value)
+        with self._lock:
+            series = family.series.get(labels)
+            if series is None:
+                series = family.series[labels] = family.empty_series()
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Times the enclosed block into bio_stage_duration_seconds{stage=...};
+        also usable as a function decorator.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("bio_stage_duration_seconds", (stage,), time.perf_counter() - start)
+
+    def collect(self, reset: bool = False) -> Dict[str, Dict[Tuple[str, ...], List[float]]]:
+        """
+        Picklable copy of every series, optionally zeroing them (for deltas shipped between processes).
+        """
+        with self._lock:
+            snapshot = {name: {labels: list(series) for labels, series in family.series.items()}
+                        for name, family in self._families.items() if family.series}
+            if reset:
+                for family in self._families.values():
+                    family.series = {}
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Dict[Tuple[str, ...], List[float]]]) -> None:
+        """
+        Adds a collect() snapshot from another process into this registry.
+        """
+        with self._lock:
+            for name, all_series in snapshot.items():
+                family = self._families.get(name)
+                if family is None:
+                    continue
+                for labels, values in all_series.items():
+                    series = family.series.get(labels)
+                    if series is None:
+                        series = family.series[labels] = family.empty_series()
+                    for i, value in enumerate(values):
+                        series[i] += value
+
+    def render(self) -> str:
+        lines = []
+        for name, all_series in sorted(self.collect().items()):
+            family = self._families[name]
+            lines.append(f"# HELP {name} {family.help}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for labels, series in sorted(all_series.items()):
+                pairs = [f'{key}="{self.escape(value)}"' for key, value in zip(family.label_names, labels)]
+                if family.kind == "counter":
+                    lines.append(f"{name}{self.label_text(pairs)} {self.number(series[0])}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(family.buckets + (float("inf"),), series[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else self.number(bound)
+                    bucket_pairs = pairs + [f'le="{le}"']
+                    lines.append(f"{name}_bucket{self.label_text(bucket_pairs)} {cumulative}")
+                lines.append(f"{name}_sum{self.label_text(pairs)} {self.number(series[-1])}")
+                lines.append(f"{name}_count{self.label_text(pairs)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def label_text(pairs: List[str]) -> str:
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @staticmethod
+    def escape(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    @staticmethod
+    def number(value: float) -> str:
+        return repr(float(value)) if value != int(value) else str(int(value))
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and counts per route template.
+
+    The clock stops when the last body chunk is sent, so streamed responses
+    are timed to completion rather than to their first byte.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        finished = [False]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished[0] = True
+                self.record(scope, status[0], start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Errors and client disconnects never send a final chunk
+            if not finished[0]:
+                self.record(scope, status[0], start)
+
+    def record(self, scope, status: int, start: float) -> None:
+        route = scope.get("route")
+        path = getattr(route, "path", None) or UNMATCHED_ROUTE
+        method = scope.get("method", "")
+        self.registry.observe("bio_http_request_duration_seconds", (method, path), time.perf_counter() - start)
+        self.registry.inc("bio_http_requests_total", (method, path, str(status)))
+
+# Registry of this process; modules time their stages with `with metrics.span("stage"):`
+metrics = MetricsRegistry()
+metrics.histogram("bio_http_request_duration_seconds", "HTTP request latency by route template.",
+                  ("method", "route"), REQUEST_BUCKETS)
+metrics.counter("bio_http_requests_total", "HTTP requests by route template and status code.",
+                ("method", "route", "status"))
+metrics.histogram("bio_stage_duration_seconds", "Time spent in each pipeline stage.",
+                  ("stage",), STAGE_BUCKETS)
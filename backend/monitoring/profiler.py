@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+from typing import Dict, Any
+
+DEFAULT_INTERVAL = 0.01
+MAX_STACK_DEPTH = 64
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the API process, switched on and off at runtime.
+
+    While running, a daemon thread snapshots the stack of every other thread
+    each `interval` seconds and counts identical stacks. The counts come out
+    in the collapsed ("folded") format read by flamegraph.pl and speedscope.
+    Tiles analyzed in the worker processes are not sampled; their stage
+    timings are in the metrics instead.
+    """
+
+    def __init__(self, max_depth: int = MAX_STACK_DEPTH):
+        self.max_depth = max_depth
+        self.interval = DEFAULT_INTERVAL
+        self.samples = 0
+        self._stacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = None) -> None:
+        with self._lock:
+            if interval:
+                self.interval = interval
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, stop = self._thread, self._stop
+            self._thread = None
+        if thread is not None:
+            stop.set()
+            thread.join()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks = {}
+            self.samples = 0
+
+    def _run(self, stop: threading.Event) -> None:
+        own_id = threading.get_ident()
+        while not stop.wait(self.interval):
+            stacks = [self.fold(frame) for thread_id, frame in sys._current_frames().items() if thread_id != own_id]
+            with self._lock:
+                self.samples += 1
+                for stack in stacks:
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+    def fold(self, frame) -> str:
+        """
+        One stack as "outermost;...;innermost" frames of function (file:line).
+        """
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def collapsed(self, limit: int = None) -> str:
+        """
+        The most frequent stacks first, one "stack count" line each.
+        """
+        with self._lock:
+            ranked = sorted(self._stacks.items(), key=lambda item: item[1], reverse=True)
+        if limit:
+            ranked = ranked[:limit]
+        return "".join(f"{stack} {count}\n" for stack, count in ranked)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self.interval,
+                "samples": self.samples,
+                "stacks": len(self._stacks)
+            }
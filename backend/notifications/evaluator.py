@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+from analysis.pipeline import RegionAnalyzer
+from data_processing.world_grid import WorldGrid
+from storage.notifications import NotificationStore
+from storage.history import utc_timestamp
+from monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# A watch covers the ~5 km window /analyze-region uses around a point, on one world-grid level,
+# so watches whose windows overlap share cells
+WATCH_HALF_SIZE = 0.025
+WATCH_LEVEL = WorldGrid.level_for(-WATCH_HALF_SIZE, -WATCH_HALF_SIZE, WATCH_HALF_SIZE, WATCH_HALF_SIZE)
+# Watches are scored in batches of about this many cell references, sorted by location
+# so that neighbouring (overlapping) watches land in the same batch
+MAX_BATCH_CELLS = 250000
+HIGH_RISK_CLASS = "High Risk"
+
+DEFAULT_INTERVAL = 300.0
+# Events a slow stream subscriber can fall behind by; further events are dropped for it
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    One server-sent event, named after the event type.
+    """
+    return f"id: {event['sequence']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+class NotificationEvaluator:
+    """
+    Background evaluation of the active watch regions in the notifications table.
+
+    Every `interval` seconds (or right after wake()) a thread scores all watches
+    in one batched pass: the world-grid cells under every watch window are
+    deduplicated, run once through the rule engine and the ML model, and
+    aggregated per watch. A watch's risk_score is the mean rule score of its
+    cells. When it rises to the threshold an "alert" event is published, when
+    it drops below again a "cleared" event; subscribers (the SSE stream)
+    receive them on their event loop.
+    """
+
+    def __init__(self, analyzer: RegionAnalyzer, store: NotificationStore, interval: float = DEFAULT_INTERVAL):
+        self.analyzer = analyzer
+        self.store = store
+        self.interval = interval
+        self.passes = 0
+        self.dropped_events = 0
+        self.last_pass: Dict[str, Any] = {}
+        # Latest summary of every evaluated watch, and the alert events of those over their threshold
+        self._latest: Dict[int, Dict[str, Any]] = {}
+        self._alerts: Dict[int, Dict[str, Any]] = {}
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="notification-evaluator", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def wake(self) -> None:
+        """
+        Runs the next pass now, e.g. after a watch was added or removed.
+        """
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                self.evaluate()
+            except Exception:
+                logger.exception("Notification evaluation failed")
+            self._wake.wait(self.interval)
+
+    @metrics.span("notification_pass")
+    def evaluate(self) -> List[Dict[str, Any]]:
+        """
+        One pass over all active watches; publishes and returns the threshold-crossing events.
+        """
+        started = time.perf_counter()
+        watches = self.store.active()
+        summaries, unique_cells = self.score_watches(watches)
+        evaluated_at = utc_timestamp()
+
+        events = []
+        with self._lock:
+            alerts = {}
+            for summary in summaries:
+                watch_id = summary["notification_id"]
+                if summary["risk_score"] >= summary["threshold"]:
+                    alerts[watch_id] = {"type": "alert", **summary, "evaluated_at": evaluated_at}
+                    if watch_id not in self._alerts:
+                        events.append(alerts[watch_id])
+                elif watch_id in self._alerts:
+                    events.append({"type": "cleared", **summary, "evaluated_at": evaluated_at})
+            # Watches deactivated since the last pass drop out without an event
+            self._alerts = alerts
+            self._latest = {summary["notification_id"]: summary for summary in summaries}
+            for event in events:
+                self._sequence += 1
+                event["sequence"] = self._sequence
+            self.passes += 1
+            self.last_pass = {
+                "evaluated_at": evaluated_at,
+                "watches": len(watches),
+                "cells": sum(summary["cells"] for summary in summaries),
+                "unique_cells": unique_cells,
+                "events": len(events),
+                "seconds": round(time.perf_counter() - started, 4)
+            }
+        self._publish(events)
+        return events
+
+    def score_watches(self, watches: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Per-watch risk summaries, in the order given, and the number of distinct cells scored.
+        """
+        _, n_cols = WorldGrid.shape(WATCH_LEVEL)
+        # 1. World cells under every watch window, as row * n_cols + col keys
+        keys = []
+        for watch in watches:
+            rows, cols = WorldGrid.cells_in(*WorldGrid.cell_range(
+                watch["lat"] - WATCH_HALF_SIZE, watch["lng"] - WATCH_HALF_SIZE,
+                watch["lat"] + WATCH_HALF_SIZE, watch["lng"] + WATCH_HALF_SIZE, WATCH_LEVEL
+            ))
+            keys.append(rows * n_cols + cols)
+
+        # 2. Batches of neighbouring watches, each scoring its distinct cells once
+        order = sorted(range(len(watches)), key=lambda i: (watches[i]["lat"], watches[i]["lng"]))
+        summaries = [None] * len(watches)
+        unique_cells = 0
+        batch, batch_cells = [], 0
+        for position, index in enumerate(order):
+            batch.append(index)
+            batch_cells += keys[index].size
+            if batch_cells >= MAX_BATCH_CELLS or position == len(order) - 1:
+                batch_summaries, batch_unique = self._score_batch([watches[i] for i in batch], [keys[i] for i in batch])
+                for i, summary in zip(batch, batch_summaries):
+                    summaries[i] = summary
+                unique_cells += batch_unique
+                batch, batch_cells = [], 0
+        return summaries, unique_cells
+
+    def _score_batch(self, watches: List[Dict[str, Any]], keys: List[np.ndarray]) -> Tuple[List[Dict[str, Any]], int]:
+        _, n_cols = WorldGrid.shape(WATCH_LEVEL)
+        counts = np.array([k.size for k in keys])
+        unique, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+
+        # 3. One rule-engine and model pass over the distinct cells (baseline scenario)
+        grid = self.analyzer.world_cell_features(WATCH_LEVEL, unique // n_cols, unique % n_cols)
+        scores = self.analyzer.score(grid)
+        high_class = self.analyzer.model.classes.index(HIGH_RISK_CLASS)
+
+        # 4. Back to one entry per (watch, cell), then per-watch aggregates
+        risk = scores["risk_score"][inverse]
+        watch_of = np.repeat(np.arange(len(watches)), counts)
+        offsets = np.cumsum(counts) - counts
+        mean_risk = np.bincount(watch_of, weights=risk, minlength=len(watches)) / counts
+        max_risk = np.maximum.reduceat(risk, offsets)
+        high_cells = np.bincount(watch_of, weights=scores["level_idx"][inverse] == 2, minlength=len(watches))
+        ml_high = np.bincount(watch_of, weights=scores["ml_probabilities"][inverse, high_class],
+                              minlength=len(watches)) / counts
+        summaries = [
+            {
+                "notification_id": watch["id"],
+                "region_name": watch["region_name"],
+                "lat": watch["lat"],
+                "lng": watch["lng"],
+                "threshold": watch["threshold"],
+                "risk_score": round(mean, 2),
+                "max_risk_score": peak,
+                "high_cells": int(high),
+                "cells": n_cells,
+                "ml_high_risk": round(ml, 3)
+            }
+            for watch, mean, peak, high, n_cells, ml in zip(
+                watches, mean_risk.tolist(), max_risk.tolist(), high_cells.tolist(), counts.tolist(), ml_high.tolist()
+            )
+        ]
+        return summaries, unique.size
+
+    def latest(self, notification_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return self._latest.get(notification_id)
+
+    def subscribe(self) -> Tuple[asyncio.Queue, List[Dict[str, Any]]]:
+        """
+        Registers a queue on the running event loop; returns it with the alerts active right now.
+        """
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+            return queue, list(self._alerts.values())
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def _publish(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, events)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(queue)
+
+    def _offer(self, queue: asyncio.Queue, events: List[Dict[str, Any]]) -> None:
+        # Runs on the subscriber's loop; the counter is shared with other loops and stats()
+        dropped = 0
+        for event in events:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                dropped += 1
+        if dropped:
+            with self._lock:
+                self.dropped_events += dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self.interval,
+                "level": WATCH_LEVEL,
+                "passes": self.passes,
+                "last_pass": self.last_pass,
+                "active_alerts": len(self._alerts),
+                "subscribers": len(self._subscribers),
+                "dropped_events": self.dropped_events
+            }
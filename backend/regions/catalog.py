@@ -0,0 +1,153 @@
+import json
+import math
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "protected_areas.geojson")
+# Side of the lookup buckets; each region is listed in every bucket its bbox touches
+BUCKET_DEGREES = 0.5
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+class Region:
+    """
+    One catalog polygon (or multipolygon) with its pre-serialized plan fields.
+    """
+
+    def __init__(self, region_id: str, name: str, polygons: List[List[np.ndarray]], plan_json: str):
+        self.id = region_id
+        self.name = name
+        # Each polygon: exterior ring first, then holes; rings are (n, 2) [lng, lat] arrays
+        self.polygons = polygons
+        points = np.concatenate([polygon[0] for polygon in polygons])
+        self.bbox = (points[:, 1].min(), points[:, 0].min(), points[:, 1].max(), points[:, 0].max())
+        self.area = sum(self.ring_area(polygon[0]) - sum(self.ring_area(hole) for hole in polygon[1:])
+                        for polygon in polygons)
+        self.plan_json = plan_json
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """
+        Strict interior test: points on any ring's boundary are outside, matching the
+        open lat/lng ranges the plans were first defined with.
+        """
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        if not (min_lat < lat < max_lat and min_lng < lng < max_lng):
+            return False
+        for exterior, *holes in self.polygons:
+            if any(self.on_boundary(ring, lat, lng) for ring in (exterior, *holes)):
+                continue
+            if self.ring_contains(exterior, lat, lng) and not any(self.ring_contains(h, lat, lng) for h in holes):
+                return True
+        return False
+
+    @staticmethod
+    def on_boundary(ring: np.ndarray, lat: float, lng: float, tolerance: float = 1e-12) -> bool:
+        """
+        Whether the point lies on one of the ring's edges (collinear and within the edge's extent).
+        """
+        x, y = ring[:, 0], ring[:, 1]
+        x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+        cross = (x_next - x) * (lat - y) - (y_next - y) * (lng - x)
+        within = ((np.minimum(x, x_next) <= lng) & (lng <= np.maximum(x, x_next))
+                  & (np.minimum(y, y_next) <= lat) & (lat <= np.maximum(y, y_next)))
+        return bool(np.any(within & (np.abs(cross) <= tolerance)))
+
+    @staticmethod
+    def ring_contains(ring: np.ndarray, lat: float, lng: float) -> bool:
+        """
+        Even-odd ray casting over all edges of the ring at once.
+        """
+        x, y = ring[:, 0], ring[:, 1]
+        x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+        straddles = (y > lat) != (y_next > lat)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = x + (lat - y) * (x_next - x) / (y_next - y)
+        return bool(np.count_nonzero(straddles & (lng < crossing_x)) % 2)
+
+    @staticmethod
+    def ring_area(ring: np.ndarray) -> float:
+        x, y = ring[:, 0], ring[:, 1]
+        return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+
+class RegionCatalog:
+    """
+    Protected-area catalog for /mitigation-plan, loaded once from a GeoJSON
+    FeatureCollection.
+
+    Each feature is a Polygon or MultiPolygon whose properties give the
+    region's name, focus, threats and strategies; the collection's "default"
+    member holds the plan used outside every region (and for any field a
+    feature leaves out). Lookups go through a grid of BUCKET_DEGREES buckets,
+    so only the few regions near a point are tested exactly; where regions
+    overlap, the smallest one wins. Plan fields are serialized at load time.
+    """
+
+    def __init__(self, regions: List[Region], default_plan_json: str, bucket_degrees: float = BUCKET_DEGREES):
+        self.regions = regions
+        self.default_plan_json = default_plan_json
+        self.bucket_degrees = bucket_degrees
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        for index, region in enumerate(regions):
+            min_lat, min_lng, max_lat, max_lng = region.bbox
+            for i in range(self.bucket(min_lat), self.bucket(max_lat) + 1):
+                for j in range(self.bucket(min_lng), self.bucket(max_lng) + 1):
+                    self._buckets.setdefault((i, j), []).append(index)
+        # Smallest regions first, so the first hit in a bucket is the most specific
+        for indices in self._buckets.values():
+            indices.sort(key=lambda index: regions[index].area)
+
+    @staticmethod
+    def load(path: str = CATALOG_PATH, bucket_degrees: float = BUCKET_DEGREES) -> "RegionCatalog":
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+        default = collection.get("default", {})
+        regions = []
+        for index, feature in enumerate(collection.get("features", [])):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            props = feature.get("properties") or {}
+            name = props.get("name") or str(feature.get("id", index))
+            plan = {key: props.get(key, default.get(key)) for key in ("focus", "threats", "strategies")}
+            regions.append(Region(
+                str(feature.get("id", index)),
+                name,
+                [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in polygons],
+                f'"location":{_dumps(name)},{RegionCatalog.plan_fields(plan)}'
+            ))
+        return RegionCatalog(regions, RegionCatalog.plan_fields(default), bucket_degrees)
+
+    @staticmethod
+    def plan_fields(plan: Dict[str, Any]) -> str:
+        return ",".join(f'"{key}":{_dumps(plan.get(key))}' for key in ("focus", "threats", "strategies"))
+
+    def bucket(self, degrees: float) -> int:
+        return math.floor(degrees / self.bucket_degrees)
+
+    def find(self, lat: float, lng: float) -> Optional[Region]:
+        for index in self._buckets.get((self.bucket(lat), self.bucket(lng)), ()):
+            region = self.regions[index]
+            if region.contains(lat, lng):
+                return region
+        return None
+
+    def plan_json(self, lat: float, lng: float, reduction_forecast: float) -> bytes:
+        """
+        The /mitigation-plan response body for a point.
+        """
+        region = self.find(lat, lng)
+        if region is not None:
+            fields = region.plan_json
+        else:
+            fields = f'"location":{_dumps(f"Regional Sector [{lat:.2f}N, {lng:.2f}E]")},{self.default_plan_json}'
+        return (
+            f'{{{fields},"coords":{{"lat":{_dumps(lat)},"lng":{_dumps(lng)}}},'
+            f'"reduction_forecast":{_dumps(reduction_forecast)}}}'
+        ).encode("utf-8")
@@ -0,0 +1,405 @@
+import io
+import random
+import zipfile
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, Iterator, Tuple
+
+from fpdf import FPDF
+from fpdf.enums import PDFResourceType
+
+from monitoring.metrics import metrics
+
+# Static layout, shared by every report
+REPORT_TITLE = "BIO-RISK INTELLIGENCE"
+REPORT_SUBTITLE = "Advanced Geospatial Biodiversity Risk Assessment Report"
+SECTION_TITLES = [
+    "1. PROJECT METADATA",
+    "2. ECOSYSTEM VITALS (TELEMETRY)",
+    "3. AI RISK INTELLIGENCE & REASONING",
+    "4. BIODIVERSITY IMPACT PROJECTION",
+    "5. RECOMMENDED CONSERVATION STRATEGY"
+]
+FOOTER_LINES = [
+    "This report is generated using AI-driven geospatial analysis of multispectral satellite data.",
+    "Bio-Risk AI Platform © 2026 | Conservation Intelligence Division"
+]
+# Risk box (fill, text) colors per level
+RISK_BOX_COLORS = {
+    "High": ((255, 230, 230), (200, 0, 0)),
+    "Medium": ((255, 245, 220), (200, 100, 0)),
+    "Low": ((230, 255, 230), (0, 150, 0))
+}
+# Fonts of the layout, registered in this order by every ReportDocument so their
+# resource names (/F1, /F2, ...) are the same in all documents
+LAYOUT_FONTS = [("Helvetica", "B"), ("Helvetica", ""), ("Helvetica", "I")]
+# Cursor moves of the old ln=True: back to the left margin, on the next line
+NEXT_LINE = {"new_x": "LMARGIN", "new_y": "NEXT"}
+# PDFs already deflate their page streams; recompressing them in the ZIP gains little
+ZIP_COMPRESSION = zipfile.ZIP_STORED
+
+class ReportDocument(FPDF):
+    """
+    FPDF for the eco-intelligence reports. A document can hold any number of
+    reports (one per section), which then share its fonts and resources.
+
+    The static layout (header band, section headings, table header, footer)
+    is drawn through static_block(): rendered once per process, then replayed
+    from its recorded content-stream operators. Other single-line cells go
+    through line_cell(), which draws the box and text directly instead of
+    running FPDF.cell's line-breaking machinery.
+    """
+
+    # name -> (operators, fonts used, origin, cursor movement) of each static block
+    _static_blocks: Dict[str, Tuple[bytes, Dict[str, int], Tuple[float, float], Tuple[float, float]]] = {}
+    # (family, style, size, text) -> width of the static layout strings
+    _static_widths: Dict[Tuple[str, str, float, str], float] = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for family, style in LAYOUT_FONTS:
+            self.set_font(family, style)
+        self._block_fonts = None
+
+    def header_band(self) -> None:
+        self.static_block("header", 40, self._draw_header_band)
+
+    def _draw_header_band(self) -> None:
+        self.set_fill_color(27, 67, 50) # Dark forest green
+        self.rect(0, 0, 210, 40, 'F')
+        self.set_text_color(255, 255, 255)
+        self.set_font("Helvetica", 'B', 24)
+        self.line_cell(190, 20, REPORT_TITLE, next_line=True, static=True)
+        self.set_font("Helvetica", size=10)
+        self.line_cell(190, 5, REPORT_SUBTITLE, next_line=True, static=True)
+        self.ln(15)
+
+    def static_block(self, name: str, h: float, draw: Callable[[], None]) -> None:
+        """
+        Draws a part of the layout that is the same in every report at the cursor.
+        The first time, draw() runs and the operators it writes are kept; after
+        that (in any document) they are replayed, translated to the cursor.
+        The block has its own graphics state (q/Q): colors and fonts it sets do
+        not carry over, on the page or in FPDF's state.
+        """
+        if self.will_page_break(h):
+            self.add_page()
+        x, y, page = self.x, self.y, self.page
+        block = self._static_blocks.get(name)
+        if block is not None and all(
+            fontkey in self.fonts and self.fonts[fontkey].i == i for fontkey, i in block[1].items()
+        ):
+            operators, fonts, (origin_x, origin_y), (dx, dy) = block
+            for i in fonts.values():
+                self._resource_catalog.add(PDFResourceType.FONT, i, self.page)
+            # FPDF's own state is untouched, so a plain q/Q around the operators is enough here
+            translate = f"q 1 0 0 1 {(x - origin_x) * self.k:.4f} {(origin_y - y) * self.k:.4f} cm\n"
+            self._out(translate.encode("latin1") + operators + b"Q")
+            self.x, self.y = x + dx, y + dy
+            return
+
+        # Record: FPDF only writes colors and fonts when they change, so the operators start
+        # by setting the current ones; then they do not depend on where they are replayed
+        contents = self.pages[self.page].contents
+        self._block_fonts = {}
+        with self.local_context(current_font_is_set_on_page=False):
+            start = len(contents)
+            self._out(f"{self.fill_color.serialize().lower()} {self.draw_color.serialize().upper()} "
+                      f"{self.line_width * self.k:.2f} w")
+            draw()
+            operators = bytes(contents[start:])
+        fonts, self._block_fonts = self._block_fonts, None
+        if self.page == page:
+            self._static_blocks[name] = (operators, fonts, (x, y), (self.x - x, self.y - y))
+
+    def _set_font_for_page(self, font, font_size_pt: float, wrap_in_text_object: bool = True) -> str:
+        # Fonts a static block being recorded selects; replays register them on their page
+        if self._block_fonts is not None:
+            self._block_fonts[font.fontkey] = font.i
+        return super()._set_font_for_page(font, font_size_pt, wrap_in_text_object)
+
+    def line_cell(self, w: float, h: float, text: str, border: bool = False, fill: bool = False, align: str = 'L',
+             next_line: bool = False, static: bool = False) -> None:
+        """
+        Same geometry as cell(w, h, text, border, align=align, fill=fill) for one line of text.
+        next_line moves to the left margin of the next line, like ln=True.
+        """
+        if self.will_page_break(h):
+            x = self.x
+            self.add_page()
+            self.x = x
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+
+        if fill or border:
+            self.rect(self.x, self.y, w, h, ('D' if border else '') + ('F' if fill else ''))
+        if text:
+            if align == 'C':
+                dx = (w - self.text_width(text, static)) / 2
+            else:
+                dx = self.c_margin
+            self.text(self.x + dx, self.y + 0.5 * h + 0.3 * self.font_size, text)
+
+        if next_line:
+            self.x = self.l_margin
+            self.y += h
+        else:
+            self.x += w
+
+    def fits_line(self, text: str, w: float = 0) -> bool:
+        """
+        True if text fits a line() of width w without wrapping.
+        """
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+        return self.get_string_width(text) <= w - 2 * self.c_margin
+
+    def text_width(self, text: str, static: bool = False) -> float:
+        if not static:
+            return self.get_string_width(text)
+        key = (self.font_family, self.font_style, self.font_size_pt, text)
+        width = self._static_widths.get(key)
+        if width is None:
+            width = self._static_widths[key] = self.get_string_width(text)
+        return width
+
+class _ChunkWriter(io.RawIOBase):
+    """
+    Write-only, non-seekable sink that zipfile writes into; drained after every member.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+class ReportBuilder:
+    """
+    Renders the eco-intelligence PDF for analysis results, one at a time or in batches.
+
+    Batches come out either as one multi-section PDF (a section and outline
+    entry per report, all in a single document) or as a ZIP of individual PDFs
+    streamed member by member, so only one report is in memory at a time.
+    """
+
+    @staticmethod
+    def check(data: Any) -> None:
+        """
+        Raises ValueError when a report payload has fields add_report cannot lay out;
+        every field is optional, but present ones must have the analysis result's types.
+        """
+        def number(value: Any) -> bool:
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+        if not isinstance(data, dict):
+            raise ValueError("report data must be an object")
+        for key in ("location", "indicators", "rules"):
+            if not isinstance(data.get(key, {}), dict):
+                raise ValueError(f"{key} must be an object")
+        for key, fields in (("location", ("lat", "lng")),
+                            ("indicators", ("ndvi", "forest_coverage", "biomass", "temperature"))):
+            for field in fields:
+                if field in data.get(key, {}) and not number(data[key][field]):
+                    raise ValueError(f"{key}.{field} must be a number")
+        if not isinstance(data.get("rules", {}).get("risk_level", ""), str):
+            raise ValueError("rules.risk_level must be a string")
+        for key, value in (("rules.reasons", data.get("rules", {}).get("reasons", [])),
+                           ("impacts", data.get("impacts", [])),
+                           ("interventions", data.get("interventions", []))):
+            if not isinstance(value, list):
+                raise ValueError(f"{key} must be a list")
+        if any(not isinstance(imp, dict) or "group" not in imp or "impact" not in imp for imp in data.get("impacts", [])):
+            raise ValueError("each impact must be an object with group and impact")
+
+    @staticmethod
+    def render(data: Dict[str, Any]) -> bytes:
+        pdf = ReportDocument()
+        ReportBuilder.add_report(pdf, data)
+        with metrics.span("pdf_output"):
+            return bytes(pdf.output())
+
+    @staticmethod
+    def render_sections(reports: Iterable[Tuple[str, Dict[str, Any]]]) -> bytes:
+        """
+        One PDF with a section per (title, data) pair.
+        """
+        pdf = ReportDocument()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for title, data in reports:
+            ReportBuilder.add_report(pdf, data, timestamp, section=title)
+        with metrics.span("pdf_output"):
+            return bytes(pdf.output())
+
+    @staticmethod
+    def iter_zip(reports: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[bytes]:
+        """
+        ZIP archive chunks, one PDF member per (filename, data) pair, yielded as each report is rendered.
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sink = _ChunkWriter()
+        with zipfile.ZipFile(sink, 'w', compression=ZIP_COMPRESSION) as archive:
+            for name, data in reports:
+                pdf = ReportDocument()
+                ReportBuilder.add_report(pdf, data, timestamp)
+                with metrics.span("pdf_output"):
+                    content = bytes(pdf.output())
+                archive.writestr(name, content)
+                yield sink.drain()
+        # Central directory
+        yield sink.drain()
+
+    @staticmethod
+    @metrics.span("report_layout")
+    def add_report(pdf: ReportDocument, data: Dict[str, Any], timestamp: str = None, section: str = None) -> None:
+        """
+        Appends one report, starting on a new page, to pdf.
+        """
+        pdf.add_page()
+        pdf.header_band()
+        if section is not None:
+            pdf.start_section(section)
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        # --- Section 1: Geospatial Metadata ---
+        ReportBuilder.section_heading(pdf, 0)
+        pdf.set_font("Helvetica", size=10)
+
+        lat = data.get('location', {}).get('lat', 0)
+        lng = data.get('location', {}).get('lng', 0)
+
+        pdf.line_cell(95, 8, f"Analysis ID: BR-AI-{random.randint(1000, 9999)}", border=True)
+        pdf.line_cell(95, 8, f"Timestamp: {timestamp}", border=True, next_line=True)
+        pdf.line_cell(95, 8, f"Latitude: {lat:.6f}", border=True)
+        pdf.line_cell(95, 8, f"Longitude: {lng:.6f}", border=True, next_line=True)
+        pdf.line_cell(190, 8, "Monitoring Resolution: 30m Multispectral Baseline", border=True, next_line=True)
+        pdf.ln(10)
+
+        # --- Section 2: Ecosystem Vitals ---
+        ReportBuilder.section_heading(pdf, 1)
+        pdf.set_font("Helvetica", size=10)
+
+        indicators = data.get('indicators', {})
+        ndvi = indicators.get('ndvi', 0.0)
+        coverage = indicators.get('forest_coverage', 0.0)
+        biomass = indicators.get('biomass', 0.0)
+        temp = indicators.get('temperature', 0.0)
+
+        # Vitals Table
+        pdf.static_block("vitals-header", 10, lambda: ReportBuilder.vitals_header(pdf))
+
+        rows = [
+            ("NDVI (Veg. Health)", f"{ndvi:.3f}", ReportBuilder.status(ndvi, 0.4, 0.6)),
+            ("Canopy Coverage", f"{coverage:.1f}%", ReportBuilder.status(coverage, 30, 60)),
+            ("Biomass Density", f"{biomass:.1f} t/ha", "Active Carbon Sink"),
+            ("Avg. Temperature", f"{temp:.1f} C", "Thermal Baseline")
+        ]
+        for label, value, status in rows:
+            pdf.line_cell(63, 8, label, border=True)
+            pdf.line_cell(63, 8, value, border=True, align='C')
+            pdf.line_cell(64, 8, status, border=True, align='C', next_line=True)
+        pdf.ln(10)
+
+        # --- Section 3: AI Risk Intelligence ---
+        ReportBuilder.section_heading(pdf, 2)
+
+        rules = data.get('rules', {})
+        risk_level = rules.get('risk_level', 'Unknown')
+        risk_score = rules.get('risk_score', 0)
+
+        # Risk Box
+        fill_color, text_color = RISK_BOX_COLORS.get(risk_level, RISK_BOX_COLORS["Low"])
+        pdf.set_fill_color(*fill_color)
+        pdf.set_text_color(*text_color)
+        pdf.set_font("Helvetica", 'B', 12)
+        pdf.line_cell(190, 12, f"CALCULATED RISK LEVEL: {risk_level.upper()} ({risk_score}/10)", border=True, fill=True, align='C', next_line=True)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("Helvetica", size=10)
+
+        pdf.ln(3)
+        pdf.set_font("Helvetica", 'B', 11)
+        pdf.line_cell(0, 8, "Ecological Reasoning (Neural Chain):", next_line=True)
+        pdf.set_font("Helvetica", size=10)
+        reasons = rules.get('reasons', [])
+        for reason in reasons:
+            ReportBuilder.paragraph(pdf, 6, f"> {reason}")
+        if not reasons:
+            pdf.line_cell(0, 6, "> Current satellite snapshots show no immediate anthropogenic or thermal threats.", next_line=True)
+        pdf.ln(10)
+
+        # --- Section 4: Biodiversity Impact Projection ---
+        ReportBuilder.section_heading(pdf, 3)
+        pdf.set_font("Helvetica", size=10)
+
+        impacts = data.get('impacts', [])
+        for imp in impacts:
+            pdf.set_font("Helvetica", 'B', 10)
+            pdf.line_cell(0, 6, f"Target Indicator: {imp['group']}", next_line=True)
+            pdf.set_font("Helvetica", size=9)
+            ReportBuilder.paragraph(pdf, 5, f"Risk Context: {imp['impact']}")
+            pdf.ln(2)
+        if not impacts:
+            pdf.line_cell(0, 6, "Impact on indicator species is currently projected to be within baseline seasonal variance.", next_line=True)
+        pdf.ln(10)
+
+        # --- Section 5: Strategic Interventions ---
+        ReportBuilder.section_heading(pdf, 4)
+        pdf.set_font("Helvetica", size=10)
+
+        actions = data.get('interventions', [])
+        for action in actions:
+            pdf.set_font("Helvetica", 'B', 10)
+            pdf.line_cell(0, 7, f"[PRIORITY ACTION] {action}", next_line=True)
+        if not actions:
+            pdf.line_cell(0, 7, "Standard surveillance protocols and boundary enforcement recommended.", next_line=True)
+
+        pdf.ln(20)
+        # --- Footer ---
+        pdf.static_block("footer", 15, lambda: ReportBuilder.footer(pdf))
+
+    @staticmethod
+    def section_heading(pdf: ReportDocument, index: int) -> None:
+        def draw() -> None:
+            pdf.set_text_color(0, 0, 0)
+            pdf.set_font("Helvetica", 'B', 14)
+            pdf.line_cell(0, 10, SECTION_TITLES[index], next_line=True)
+        pdf.static_block(f"section-{index}", 10, draw)
+
+    @staticmethod
+    def vitals_header(pdf: ReportDocument) -> None:
+        pdf.set_font("Helvetica", size=10)
+        pdf.set_fill_color(240, 240, 240)
+        pdf.line_cell(63, 10, "Indicator", border=True, fill=True, align='C', static=True)
+        pdf.line_cell(63, 10, "Value", border=True, fill=True, align='C', static=True)
+        pdf.line_cell(64, 10, "Status", border=True, fill=True, align='C', static=True, next_line=True)
+
+    @staticmethod
+    def footer(pdf: ReportDocument) -> None:
+        pdf.set_font("Helvetica", 'I', 8)
+        pdf.set_text_color(120, 120, 120)
+        pdf.line_cell(0, 10, FOOTER_LINES[0], align='C', next_line=True, static=True)
+        pdf.line_cell(0, 5, FOOTER_LINES[1], align='C', static=True)
+
+    @staticmethod
+    def paragraph(pdf: ReportDocument, h: float, text: str) -> None:
+        """
+        Full-width text that only goes through multi_cell when it actually wraps.
+        """
+        if pdf.fits_line(text):
+            pdf.line_cell(0, h, text, next_line=True)
+        else:
+            pdf.multi_cell(0, h, text, **NEXT_LINE)
+
+    @staticmethod
+    def status(val: float, low: float, high: float) -> str:
+        if val < low: return "Critical"
+        if val < high: return "Warning"
+        return "Optimal"
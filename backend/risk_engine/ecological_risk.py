@@ -1,5 +1,75 @@
+import numpy as np
 from typing import List, Dict, Any
 
+from data_processing.satellite_features import LAND_USE_CODES
+
+RISK_LEVELS = ["Low", "Medium", "High"]
+RISK_COLORS = ["green", "orange", "red"]
+# Highest score the rules can add up to (NDVI 3 + urban 3 + heat 2 + water 2)
+MAX_RISK_SCORE = 10
+
+# Reason codes: one bit per rule evaluate_risk can trigger
+REASON_NDVI_CRITICAL = 1 << 0
+REASON_NDVI_MINOR = 1 << 1
+REASON_URBAN = 1 << 2
+REASON_HEAT_HIGH = 1 << 3
+REASON_HEAT_MODERATE = 1 << 4
+REASON_WATER_LOSS = 1 << 5
+N_REASON_MASKS = 1 << 6
+
+# Threat family of each rule, in the order evaluate_risk reports them
+REASON_FAMILIES = [
+    (REASON_NDVI_CRITICAL, "vegetation"),
+    (REASON_NDVI_MINOR, "vegetation"),
+    (REASON_URBAN, "urban"),
+    (REASON_HEAT_HIGH, "thermal"),
+    (REASON_HEAT_MODERATE, "thermal"),
+    (REASON_WATER_LOSS, "water"),
+]
+
+# Reason text of each rule as evaluate_risk words it; "{temperature}" stands for the cell's temperature
+REASON_TEXTS = [
+    (REASON_NDVI_CRITICAL, "Low vegetation health (Critical NDVI)"),
+    (REASON_NDVI_MINOR, "Minor vegetation stress"),
+    (REASON_URBAN, "Urban expansion detected in grid"),
+    (REASON_HEAT_HIGH, "High thermal stress ({temperature}°C)"),
+    (REASON_HEAT_MODERATE, "Moderate heat stress"),
+    (REASON_WATER_LOSS, "Potential water body loss / drought stress"),
+]
+
+SPECIES_IMPACTS = {
+    "vegetation": {"group": "Mammals & Insects", "impact": "Loss of canopy cover and primary foraging sites."},
+    "urban": {"group": "Terrestrial Fauna", "impact": "Habitat fragmentation and increased human-wildlife conflict."},
+    "thermal": {"group": "Pollinators", "impact": "Heat stress and disruption of plant-pollinator phenology."},
+    "water": {"group": "Birds & Amphibians", "impact": "Loss of seasonal wetlands and hydration sources."}
+}
+
+INTERVENTIONS = {
+    "vegetation": "Reforestation with native species to restore canopy.",
+    "urban": "Strict enforcement of buffer zones around protected habitats.",
+    "thermal": "Implementation of heat-tolerant vegetation corridors.",
+    "water": "Restoration of riparian zones and natural drainage systems."
+}
+DEFAULT_INTERVENTION = "Preventative monitoring and maintenance of ecosystem health."
+
+# Keyword -> family lookup used for free-text reasons (legacy callers)
+REASON_KEYWORDS = [("vegetation", "vegetation"), ("urban", "urban"), ("thermal", "thermal"), ("heat", "thermal"), ("water", "water")]
+
+def _mask_families(mask: int) -> List[str]:
+    families = []
+    for bit, family in REASON_FAMILIES:
+        if mask & bit and family not in families:
+            families.append(family)
+    return families
+
+# Every possible reason mask is resolved once at import; scoring only indexes these tables.
+# Entries are shared between cells and must not be mutated.
+IMPACT_TABLE = [[SPECIES_IMPACTS[f] for f in _mask_families(mask)] for mask in range(N_REASON_MASKS)]
+INTERVENTION_TABLE = [
+    [INTERVENTIONS[f] for f in _mask_families(mask)] or [DEFAULT_INTERVENTION]
+    for mask in range(N_REASON_MASKS)
+]
+
 class AdvancedRiskEngine:
     """
     Production-level biodiversity risk engine using weighted scoring 
@@ -19,32 +89,39 @@ class AdvancedRiskEngine:
         """
         risk_score = 0
         reasons = []
+        reason_codes = 0
         
         # 1. Vegetation Health (NDVI)
         if ndvi < 0.3:
             risk_score += 3
             reasons.append("Low vegetation health (Critical NDVI)")
+            reason_codes |= REASON_NDVI_CRITICAL
         elif ndvi < 0.5:
             risk_score += 1
             reasons.append("Minor vegetation stress")
+            reason_codes |= REASON_NDVI_MINOR
             
         # 2. Habitat Loss (Urbanization)
         if land_use.lower() == "urban":
             risk_score += 3
             reasons.append("Urban expansion detected in grid")
+            reason_codes |= REASON_URBAN
             
         # 3. Thermal Stress (Temperature)
         if temperature > 33.0:
             risk_score += 2
             reasons.append(f"High thermal stress ({temperature}°C)")
+            reason_codes |= REASON_HEAT_HIGH
         elif temperature > 30.0:
             risk_score += 1
             reasons.append("Moderate heat stress")
+            reason_codes |= REASON_HEAT_MODERATE
             
         # 4. Hydrological Stress (Water Presence)
         if water_index < 0.2:
             risk_score += 2
             reasons.append("Potential water body loss / drought stress")
+            reason_codes |= REASON_WATER_LOSS
             
         # Classification of risk levels
         if risk_score >= 8:
@@ -61,27 +138,125 @@ class AdvancedRiskEngine:
             "risk_score": risk_score,
             "risk_level": risk_level,
             "color": color,
-            "reasons": reasons
+            "reasons": reasons,
+            "reason_codes": reason_codes
         }
 
     @staticmethod
-    def estimate_species_impact(reasons: List[str]) -> List[Dict[str, str]]:
+    def evaluate_risk_batch(ndvi: np.ndarray, land_use: np.ndarray, temperature: np.ndarray, water_index: np.ndarray) -> Dict[str, Any]:
+        """
+        Vectorized evaluate_risk over whole grid columns.
+        land_use holds LAND_USE_CODES; returns per-cell columns instead of dicts.
+        """
+        temperature = np.asarray(temperature, dtype=float)
+        batch = AdvancedRiskEngine.score_batch(ndvi, land_use, temperature, water_index)
+        batch["reasons"] = AdvancedRiskEngine.reasons_for(batch["reason_codes"], temperature)
+        return batch
+
+    @staticmethod
+    def reasons_for(reason_codes: np.ndarray, temperature: np.ndarray) -> List[List[str]]:
+        """
+        evaluate_risk's reason strings for a column of reason-code masks.
+        """
+        # Reason strings are the only per-cell Python work; rules are appended in evaluate_risk order
+        reasons = [[] for _ in range(len(reason_codes))]
+        for bit, text in REASON_TEXTS:
+            if "{temperature}" in text:
+                for i in np.flatnonzero(reason_codes & bit):
+                    reasons[i].append(text.format(temperature=float(temperature[i])))
+            else:
+                for i in np.flatnonzero(reason_codes & bit):
+                    reasons[i].append(text)
+        return reasons
+
+    @staticmethod
+    def level_index(risk_score: np.ndarray) -> np.ndarray:
+        """
+        Index into RISK_LEVELS for each score (same thresholds as evaluate_risk).
+        """
+        return np.where(risk_score >= 8, 2, np.where(risk_score >= 4, 1, 0))
+
+    @staticmethod
+    def score_batch(ndvi: np.ndarray, land_use: np.ndarray, temperature: np.ndarray, water_index: np.ndarray) -> Dict[str, np.ndarray]:
         """
-        Maps risk reasons to ecologically affected species groups.
+        Risk scores, level indices and reason codes only, for arrays of any (matching) shape.
+        Used directly where reason strings are not needed, e.g. scenario ensembles.
         """
-        impact_map = {
-            "vegetation": {"group": "Mammals & Insects", "impact": "Loss of canopy cover and primary foraging sites."},
-            "urban": {"group": "Terrestrial Fauna", "impact": "Habitat fragmentation and increased human-wildlife conflict."},
-            "thermal": {"group": "Pollinators", "impact": "Heat stress and disruption of plant-pollinator phenology."},
-            "heat": {"group": "Pollinators", "impact": "Heat stress and disruption of plant-pollinator phenology."},
-            "water": {"group": "Birds & Amphibians", "impact": "Loss of seasonal wetlands and hydration sources."}
+        ndvi = np.asarray(ndvi, dtype=float)
+        temperature = np.asarray(temperature, dtype=float)
+        water_index = np.asarray(water_index, dtype=float)
+
+        ndvi_critical = ndvi < 0.3
+        ndvi_minor = ~ndvi_critical & (ndvi < 0.5)
+        urban = np.asarray(land_use) == LAND_USE_CODES["urban"]
+        heat_high = temperature > 33.0
+        heat_moderate = ~heat_high & (temperature > 30.0)
+        water_stress = water_index < 0.2
+
+        risk_score = (
+            3 * ndvi_critical + ndvi_minor
+            + 3 * urban
+            + 2 * heat_high + heat_moderate
+            + 2 * water_stress
+        ).astype(int)
+        level_idx = AdvancedRiskEngine.level_index(risk_score)
+        reason_codes = (
+            REASON_NDVI_CRITICAL * ndvi_critical + REASON_NDVI_MINOR * ndvi_minor
+            + REASON_URBAN * urban
+            + REASON_HEAT_HIGH * heat_high + REASON_HEAT_MODERATE * heat_moderate
+            + REASON_WATER_LOSS * water_stress
+        ).astype(np.uint8)
+
+        return {
+            "risk_score": risk_score,
+            "level_idx": level_idx,
+            "reason_codes": reason_codes
         }
-        
+
+    @staticmethod
+    def batch_to_records(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Expands evaluate_risk_batch columns into evaluate_risk-shaped dicts.
+        """
+        return [
+            {
+                "risk_score": score,
+                "risk_level": RISK_LEVELS[idx],
+                "color": RISK_COLORS[idx],
+                "reasons": reasons,
+                "reason_codes": codes
+            }
+            for score, idx, reasons, codes in zip(
+                batch["risk_score"].tolist(), batch["level_idx"].tolist(),
+                batch["reasons"], batch["reason_codes"].tolist()
+            )
+        ]
+
+    @staticmethod
+    def impacts_for(reason_codes: int) -> List[Dict[str, str]]:
+        """
+        Species impacts for a reason-code mask, from the precomputed table.
+        """
+        return IMPACT_TABLE[reason_codes]
+
+    @staticmethod
+    def interventions_for(reason_codes: int) -> List[str]:
+        """
+        Conservation interventions for a reason-code mask, from the precomputed table.
+        """
+        return INTERVENTION_TABLE[reason_codes]
+
+    @staticmethod
+    def estimate_species_impact(reasons: List[str]) -> List[Dict[str, str]]:
+        """
+        Maps free-text risk reasons to ecologically affected species groups.
+        Prefer impacts_for when the reason codes are available.
+        """
         impacts = []
         for reason in reasons:
-            for key, val in impact_map.items():
+            for key, family in REASON_KEYWORDS:
                 if key in reason.lower():
-                    impacts.append(val)
+                    impacts.append(SPECIES_IMPACTS[family])
                     
         # Filter duplicates
         unique_impacts = {i['group']: i for i in impacts}.values()
@@ -90,21 +265,22 @@ class AdvancedRiskEngine:
     @staticmethod
     def get_interventions(reasons: List[str]) -> List[str]:
         """
-        Suggests conservation interventions based on risk factors.
+        Suggests conservation interventions based on free-text risk factors.
+        Prefer interventions_for when the reason codes are available.
         """
         interventions = []
         for reason in reasons:
             r = reason.lower()
             if "vegetation" in r or "ndvi" in r:
-                interventions.append("Reforestation with native species to restore canopy.")
+                interventions.append(INTERVENTIONS["vegetation"])
             if "urban" in r:
-                interventions.append("Strict enforcement of buffer zones around protected habitats.")
+                interventions.append(INTERVENTIONS["urban"])
             if "thermal" in r or "heat" in r:
-                interventions.append("Implementation of heat-tolerant vegetation corridors.")
+                interventions.append(INTERVENTIONS["thermal"])
             if "water" in r or "drought" in r:
-                interventions.append("Restoration of riparian zones and natural drainage systems.")
+                interventions.append(INTERVENTIONS["water"])
         
         if not interventions:
-            interventions.append("Preventative monitoring and maintenance of ecosystem health.")
+            interventions.append(DEFAULT_INTERVENTION)
             
-        return list(set(interventions))
+        return list(dict.fromkeys(interventions))
@@ -0,0 +1,130 @@
+import numpy as np
+from typing import Dict, List, Any, Tuple
+
+from data_processing.satellite_features import LAND_USE_CLASSES
+from risk_engine.ecological_risk import (
+    RISK_LEVELS, RISK_COLORS, REASON_TEXTS, SPECIES_IMPACTS, INTERVENTIONS, DEFAULT_INTERVENTION,
+    IMPACT_TABLE, INTERVENTION_TABLE, N_REASON_MASKS
+)
+
+COMPACT_FORMAT_VERSION = 1
+# Indicator columns copied from the analysis as they are
+FEATURE_COLUMNS = ["lat", "lng", "ndvi", "land_use", "temperature", "water_index", "biomass", "forest_coverage"]
+
+# Reason, impact and intervention ids are positions in these lists; reason_masks maps
+# every reason-code mask to the ids it implies, so cells only carry their mask
+REASON_ENTRIES = [text for _, text in REASON_TEXTS]
+IMPACT_ENTRIES = list(SPECIES_IMPACTS.values())
+INTERVENTION_ENTRIES = list(INTERVENTIONS.values()) + [DEFAULT_INTERVENTION]
+REASON_MASKS = {
+    "reasons": [[i for i, (bit, _) in enumerate(REASON_TEXTS) if mask & bit] for mask in range(N_REASON_MASKS)],
+    "impacts": [[IMPACT_ENTRIES.index(impact) for impact in IMPACT_TABLE[mask]] for mask in range(N_REASON_MASKS)],
+    "interventions": [
+        [INTERVENTION_ENTRIES.index(text) for text in INTERVENTION_TABLE[mask]] for mask in range(N_REASON_MASKS)
+    ]
+}
+
+def round_like_python(values: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    np.round, except that values close to a tie are rounded by Python's round,
+    so the results match the default response exactly (np.round scales by
+    10**decimals first, which can flip those).
+    """
+    rounded = np.round(values, decimals)
+    scaled = values * 10 ** decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, decimals) for value in values[near_tie].tolist()]
+    return rounded
+
+class CompactGridEncoder:
+    """
+    Opt-in columnar form of the /analyze-region response.
+
+    Every field is one array with an entry per cell, in row-major order, so
+    cell k has grid_id "{k // grid_size}_{k % grid_size}". The center cell,
+    whose fields the default response repeats at the top level, is k = center.
+    Categorical fields hold small integer ids into `tables`. A cell's
+    reasons, impacts and interventions are the ids listed under
+    tables.reason_masks for its reason_codes entry. The "{temperature}" in a
+    reason text is the cell's temperature. ML probabilities are one
+    [n_cells][n_classes] array, rounded to 2 decimals like the default form.
+    """
+
+    @staticmethod
+    def tables(classes: List[str]) -> Dict[str, Any]:
+        return {
+            "land_use": LAND_USE_CLASSES,
+            "risk_level": RISK_LEVELS,
+            "risk_color": RISK_COLORS,
+            "ml_class": classes,
+            "reasons": REASON_ENTRIES,
+            "impacts": IMPACT_ENTRIES,
+            "interventions": INTERVENTION_ENTRIES,
+            "reason_masks": REASON_MASKS
+        }
+
+    @staticmethod
+    def payload(columns: Dict[str, np.ndarray], bbox: Tuple[float, float, float, float], grid_size: int,
+                classes: List[str]) -> Dict[str, Any]:
+        """
+        The compact response for TileExecutor.analyze_columns output (NumPy arrays left for the encoder).
+        """
+        probabilities = round_like_python(np.asarray(columns["ml_probabilities"], dtype=np.float64), 2)
+        data = {name: columns[name] for name in FEATURE_COLUMNS}
+        data.update({
+            "risk_score": columns["risk_score"],
+            "risk_level": columns["level_idx"],
+            "reason_codes": columns["reason_codes"],
+            "ml_prediction": columns["ml_prediction_idx"],
+            "ml_confidence": probabilities.max(axis=1),
+            "ml_probabilities": probabilities
+        })
+        n_cells = grid_size * grid_size
+        return {
+            "format": "compact",
+            "version": COMPACT_FORMAT_VERSION,
+            "bbox": dict(zip(["min_lat", "min_lng", "max_lat", "max_lng"], bbox)),
+            "grid_size": grid_size,
+            "cells": n_cells,
+            "center": n_cells // 2,
+            "columns": data,
+            "tables": CompactGridEncoder.tables(classes)
+        }
+
+    @staticmethod
+    def cells(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        The default response's per-cell dicts, rebuilt from a (decoded) compact payload.
+        """
+        columns, tables, grid_size = payload["columns"], payload["tables"], payload["grid_size"]
+        masks = tables["reason_masks"]
+        classes = tables["ml_class"]
+        results = []
+        for k in range(payload["cells"]):
+            grid_id = f"{k // grid_size}_{k % grid_size}"
+            indicators = {"grid_id": grid_id}
+            indicators.update({name: columns[name][k] for name in FEATURE_COLUMNS})
+            indicators["land_use"] = tables["land_use"][indicators["land_use"]]
+            level, mask = columns["risk_level"][k], columns["reason_codes"][k]
+            results.append({
+                "grid_id": grid_id,
+                "location": {"lat": indicators["lat"], "lng": indicators["lng"]},
+                "indicators": indicators,
+                "rules": {
+                    "risk_score": columns["risk_score"][k],
+                    "risk_level": tables["risk_level"][level],
+                    "color": tables["risk_color"][level],
+                    "reasons": [tables["reasons"][i].format(temperature=indicators["temperature"])
+                                for i in masks["reasons"][mask]],
+                    "reason_codes": mask
+                },
+                "ml": {
+                    "prediction": classes[columns["ml_prediction"][k]],
+                    "confidence": columns["ml_confidence"][k],
+                    "probabilities": dict(zip(classes, columns["ml_probabilities"][k]))
+                },
+                "impacts": [tables["impacts"][i] for i in masks["impacts"][mask]],
+                "interventions": [tables["interventions"][i] for i in masks["interventions"][mask]]
+            })
+        return results
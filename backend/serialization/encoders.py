@@ -0,0 +1,52 @@
+import json
+from typing import Any
+
+import numpy as np
+
+# Optional fast encoders; the standard json module is the fallback, MessagePack has none
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def to_builtin(value: Any) -> Any:
+    """
+    Replaces NumPy arrays and scalars (at any depth) with lists and Python numbers.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(item) for item in value]
+    return value
+
+def _orjson_default(value: Any) -> Any:
+    # orjson only encodes plain, C-contiguous arrays itself (not memmaps or strided views)
+    if isinstance(value, np.ndarray):
+        return np.ascontiguousarray(value).view(np.ndarray)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps_json(value: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, with orjson when it is installed. NumPy arrays are
+    encoded natively by orjson and converted to lists otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(to_builtin(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_msgpack(value: Any) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("MessagePack responses require msgpack (pip install msgpack)")
+    return msgpack.packb(to_builtin(value), use_bin_type=True)
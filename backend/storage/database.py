@@ -0,0 +1,117 @@
+import os
+import sqlite3
+
+DB_PATH = os.environ.get("BIO_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "bio_intelligence.db"))
+
+# Mirrors the tables shipped in bio_intelligence.db so a fresh BIO_DB_PATH gets the same layout
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_history (
+	id INTEGER NOT NULL, 
+	grid_id VARCHAR, 
+	lat FLOAT, 
+	lng FLOAT, 
+	risk_score FLOAT, 
+	analysis_data JSON, 
+	timestamp DATETIME, 
+	PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS ix_analysis_history_id ON analysis_history (id);
+CREATE INDEX IF NOT EXISTS ix_analysis_history_timestamp ON analysis_history (timestamp);
+CREATE TABLE IF NOT EXISTS notifications (
+	id INTEGER NOT NULL, 
+	region_name VARCHAR, 
+	lat FLOAT, 
+	lng FLOAT, 
+	threshold FLOAT, 
+	is_active INTEGER, 
+	created_at DATETIME, 
+	PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS ix_notifications_id ON notifications (id);
+CREATE TABLE IF NOT EXISTS community_plans (
+	id INTEGER NOT NULL, 
+	region_name VARCHAR, 
+	lat FLOAT, 
+	lng FLOAT, 
+	strategies JSON, 
+	author VARCHAR, 
+	likes INTEGER, 
+	created_at DATETIME, 
+	PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS ix_community_plans_id ON community_plans (id);
+"""
+
+# R*Tree over analysis_history points, kept in sync by triggers so every writer maintains it
+SPATIAL_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS analysis_history_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng);
+CREATE TRIGGER IF NOT EXISTS analysis_history_rtree_insert AFTER INSERT ON analysis_history
+WHEN new.lat IS NOT NULL AND new.lng IS NOT NULL
+BEGIN
+    INSERT INTO analysis_history_rtree VALUES (new.id, new.lat, new.lat, new.lng, new.lng);
+END;
+CREATE TRIGGER IF NOT EXISTS analysis_history_rtree_delete AFTER DELETE ON analysis_history
+BEGIN
+    DELETE FROM analysis_history_rtree WHERE id = old.id;
+END;
+INSERT INTO analysis_history_rtree
+    SELECT id, lat, lat, lng, lng FROM analysis_history
+    WHERE lat IS NOT NULL AND lng IS NOT NULL AND id NOT IN (SELECT id FROM analysis_history_rtree);
+"""
+
+# Used instead when SQLite was built without the R*Tree module
+FALLBACK_SPATIAL_SCHEMA = """
+CREATE INDEX IF NOT EXISTS ix_analysis_history_lat_lng ON analysis_history (lat, lng);
+"""
+
+# Per-cell indicator history, one row per (cell, day, source). The (tile_id, date) key clusters
+# each cell's series so a trend window is one range scan. source: 0 = baseline model, 1 = observed;
+# observed rows hold the mean of that day's `observations` analyses of the cell
+TIMESERIES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_series (
+    tile_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    source INTEGER NOT NULL,
+    ndvi REAL,
+    temperature REAL,
+    water_index REAL,
+    observations INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (tile_id, date, source)
+) WITHOUT ROWID;
+"""
+
+def connect(path: str = None) -> sqlite3.Connection:
+    """
+    Opens a connection in WAL mode, so the background writer never blocks readers.
+    """
+    conn = sqlite3.connect(path or DB_PATH, timeout=30.0, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def has_rtree(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'analysis_history_rtree'"
+    ).fetchone() is not None
+
+def init_db(path: str = None) -> None:
+    """
+    Creates any missing tables and indexes, including the indicator time series
+    and the spatial index (backfilled for rows written before it existed).
+    """
+    conn = connect(path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executescript(TIMESERIES_SCHEMA)
+        # Series tables created before the per-day observation count
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(indicator_series)")]
+        if "observations" not in columns:
+            conn.execute("ALTER TABLE indicator_series ADD COLUMN observations INTEGER NOT NULL DEFAULT 1")
+        try:
+            conn.executescript(SPATIAL_SCHEMA)
+        except sqlite3.OperationalError:
+            conn.executescript(FALLBACK_SPATIAL_SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
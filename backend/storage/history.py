@@ -0,0 +1,261 @@
+import json
+import math
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from storage.database import connect, has_rtree
+from storage.timeseries import IndicatorSeriesStore
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+def utc_timestamp(moment: datetime = None) -> str:
+    """
+    Timestamps are stored as naive UTC strings, which sort and compare as text.
+    """
+    moment = moment or datetime.now(timezone.utc)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance between two points, in kilometres.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class AnalysisHistoryWriter:
+    """
+    Background writer for analysis_history.
+    
+    Request handlers only enqueue finished results; a single thread drains the
+    queue and inserts whole batches per transaction. When the queue is full,
+    records are dropped (and counted) rather than slowing down requests.
+    Analyses without a what-if scenario also extend the indicator time series.
+    """
+    
+    def __init__(self, db_path: str = None, max_queue: int = 1000, batch_rows: int = 5000, flush_interval: float = 1.0):
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[List[tuple]]]" = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self.rows_written = 0
+        self.batches_written = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="analysis-history-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Flushes everything queued so far and stops the writer thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def record(self, cells: List[Dict[str, Any]], context: Dict[str, Any] = None) -> bool:
+        """
+        Queues one analysis (its per-cell results) for persistence. Never blocks.
+        """
+        timestamp = utc_timestamp()
+        rows = [(cell, context, timestamp) for cell in cells]
+        try:
+            self._queue.put_nowait(rows)
+            return True
+        except queue.Full:
+            self.dropped += len(rows)
+            return False
+
+    def record_deferred(self, build_cells: Callable[[], List[Dict[str, Any]]], n_cells: int,
+                        context: Dict[str, Any] = None) -> bool:
+        """
+        Like record, for responses that never built per-cell dicts: build_cells()
+        is called on the writer thread instead.
+        """
+        timestamp = utc_timestamp()
+        try:
+            self._queue.put_nowait(lambda: [(cell, context, timestamp) for cell in build_cells()])
+            return True
+        except queue.Full:
+            self.dropped += n_cells
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued_batches": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "dropped_rows": self.dropped,
+            "running": self._thread is not None and self._thread.is_alive()
+        }
+
+    def _run(self) -> None:
+        conn = connect(self.db_path)
+        try:
+            stopping = False
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                pending = []
+                # Coalesce whatever else is already queued into the same transaction
+                while True:
+                    if item is None:
+                        stopping = True
+                    else:
+                        pending.extend(item() if callable(item) else item)
+                    if stopping or len(pending) >= self.batch_rows:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if pending:
+                    self._write(conn, pending)
+        finally:
+            conn.close()
+
+    def _write(self, conn, pending: List[tuple]) -> None:
+        # JSON encoding happens here, off the request path
+        rows = [
+            (
+                cell.get("grid_id"),
+                cell["location"]["lat"],
+                cell["location"]["lng"],
+                cell["rules"]["risk_score"],
+                json.dumps({**cell, "context": context} if context else cell, ensure_ascii=False),
+                timestamp
+            )
+            for cell, context, timestamp in pending
+        ]
+        # Scenario runs are hypothetical; only plain analyses are observations
+        observations = [
+            (cell, timestamp[:10]) for cell, context, timestamp in pending
+            if not context or not (context.get("urban_growth_pct") or context.get("temp_increase"))
+        ]
+        with conn:
+            self.insert_rows(conn, rows)
+            IndicatorSeriesStore.add_observations(conn, IndicatorSeriesStore.observation_rows(observations))
+        self.rows_written += len(rows)
+        self.batches_written += 1
+
+    @staticmethod
+    def insert_rows(conn, rows: List[tuple]) -> None:
+        """
+        Inserts (grid_id, lat, lng, risk_score, analysis_data, timestamp) rows inside the caller's transaction.
+        """
+        conn.executemany(
+            "INSERT INTO analysis_history (grid_id, lat, lng, risk_score, analysis_data, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+class AnalysisHistoryStore:
+    """
+    Read side of analysis_history.
+    
+    Spatial filters go through the analysis_history_rtree index when SQLite has
+    the R*Tree module, and through the (lat, lng) B-tree index otherwise.
+    """
+    
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path
+        self._use_rtree = None
+
+    def query(self, bbox: Tuple[float, float, float, float], start: datetime = None, end: datetime = None,
+              limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Stored cell analyses inside the bbox and time range, newest first.
+        """
+        conn = connect(self.db_path)
+        try:
+            sql, params = self._window_sql(conn, bbox, start, end)
+            sql += " ORDER BY h.timestamp DESC, h.id DESC LIMIT ?"
+            params.append(limit)
+            return [self._row_to_dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def nearest(self, lat: float, lng: float, k: int = 10, max_km: float = 50.0, start: datetime = None,
+                end: datetime = None) -> List[Dict[str, Any]]:
+        """
+        The k stored cell analyses closest to (lat, lng), within max_km, nearest first.
+        
+        Searches a window around the point and doubles it until it holds k rows
+        whose distances are all covered by the window.
+        """
+        radius_km = min(1.0, max_km)
+        conn = connect(self.db_path)
+        try:
+            while True:
+                sql, params = self._window_sql(conn, self.window(lat, lng, radius_km), start, end)
+                rows = [self._row_to_dict(row) for row in conn.execute(sql, params)]
+                for row in rows:
+                    row["distance_km"] = round(haversine_km(lat, lng, row["lat"], row["lng"]), 4)
+                rows = [row for row in rows if row["distance_km"] <= radius_km]
+                if len(rows) >= k or radius_km >= max_km:
+                    break
+                radius_km = min(radius_km * 2, max_km)
+        finally:
+            conn.close()
+        # Nearest first; for repeated analyses of the same spot, newest first
+        rows.sort(key=lambda row: (row["distance_km"], -row["id"]))
+        return rows[:k]
+
+    @staticmethod
+    def window(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+        """
+        Lat/lng bbox that contains every point within radius_km of (lat, lng).
+        """
+        d_lat = radius_km / KM_PER_DEGREE
+        widest = min(abs(lat) + d_lat, 89.9)
+        d_lng = min(radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest))), 180.0)
+        return (lat - d_lat, lng - d_lng, lat + d_lat, lng + d_lng)
+
+    def _window_sql(self, conn, bbox: Tuple[float, float, float, float], start: datetime = None,
+                    end: datetime = None) -> Tuple[str, List[Any]]:
+        if self._use_rtree is None:
+            self._use_rtree = has_rtree(conn)
+        min_lat, min_lng, max_lat, max_lng = bbox
+        if self._use_rtree:
+            # R*Tree boxes are stored as float32 rounded outwards, so match by overlap, then on the exact columns
+            sql = ("SELECT h.id, h.grid_id, h.lat, h.lng, h.risk_score, h.analysis_data, h.timestamp "
+                   "FROM analysis_history_rtree r JOIN analysis_history h ON h.id = r.id "
+                   "WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lng >= ? AND r.min_lng <= ? "
+                   "AND h.lat BETWEEN ? AND ? AND h.lng BETWEEN ? AND ?")
+            params = [min_lat, max_lat, min_lng, max_lng, min_lat, max_lat, min_lng, max_lng]
+        else:
+            sql = ("SELECT h.id, h.grid_id, h.lat, h.lng, h.risk_score, h.analysis_data, h.timestamp "
+                   "FROM analysis_history h WHERE h.lat BETWEEN ? AND ? AND h.lng BETWEEN ? AND ?")
+            params = [min_lat, max_lat, min_lng, max_lng]
+        if start is not None:
+            sql += " AND h.timestamp >= ?"
+            params.append(utc_timestamp(start))
+        if end is not None:
+            sql += " AND h.timestamp <= ?"
+            params.append(utc_timestamp(end))
+        return sql, params
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "grid_id": row["grid_id"],
+            "lat": row["lat"],
+            "lng": row["lng"],
+            "risk_score": row["risk_score"],
+            "timestamp": row["timestamp"],
+            "analysis": json.loads(row["analysis_data"]) if row["analysis_data"] else None
+        }
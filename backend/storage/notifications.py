@@ -0,0 +1,55 @@
+from typing import Dict, List, Any, Optional
+
+from storage.database import connect
+from storage.history import utc_timestamp
+
+class NotificationStore:
+    """
+    Watch regions in the notifications table: a point, a risk-score threshold
+    and an is_active flag. Deleting a watch only deactivates it.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path
+
+    def active(self) -> List[Dict[str, Any]]:
+        conn = connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT id, region_name, lat, lng, threshold, created_at FROM notifications "
+                "WHERE is_active = 1 AND lat IS NOT NULL AND lng IS NOT NULL AND threshold IS NOT NULL ORDER BY id"
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def add(self, region_name: str, lat: float, lng: float, threshold: float) -> Dict[str, Any]:
+        created_at = utc_timestamp()
+        conn = connect(self.db_path)
+        try:
+            cursor = conn.execute(
+                "INSERT INTO notifications (region_name, lat, lng, threshold, is_active, created_at) "
+                "VALUES (?, ?, ?, ?, 1, ?)",
+                (region_name, lat, lng, threshold, created_at)
+            )
+            conn.commit()
+            notification_id = cursor.lastrowid
+        finally:
+            conn.close()
+        return {"id": notification_id, "region_name": region_name, "lat": lat, "lng": lng,
+                "threshold": threshold, "created_at": created_at}
+
+    def deactivate(self, notification_id: int) -> Optional[bool]:
+        """
+        True if the watch was active, False if it already was not, None if it does not exist.
+        """
+        conn = connect(self.db_path)
+        try:
+            row = conn.execute("SELECT is_active FROM notifications WHERE id = ?", (notification_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE notifications SET is_active = 0 WHERE id = ?", (notification_id,))
+            conn.commit()
+            return bool(row["is_active"])
+        finally:
+            conn.close()
@@ -0,0 +1,119 @@
+import math
+from datetime import date
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+from storage.database import connect
+
+# Series are kept per cell of a fixed world grid (~1 km), independent of analysis resolution
+SERIES_CELL_DEGREES = 0.01
+TILE_COLUMNS = round(360 / SERIES_CELL_DEGREES)
+SOURCE_BASELINE = 0
+SOURCE_OBSERVED = 1
+INDICATORS = ["ndvi", "temperature", "water_index"]
+READ_BATCH = 500
+
+class IndicatorSeriesStore:
+    """
+    Per-cell indicator history in the indicator_series table.
+
+    (tile_id, date, source) is the key. Baseline rows are written once and
+    duplicates ignored; observed rows are aggregated on write, each holding the
+    running mean of that day's analyses and their count. Reads return one
+    window of many cells' series as NumPy columns.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path
+
+    @staticmethod
+    def tile_id(lat: float, lng: float) -> int:
+        row = min(math.floor((lat + 90.0) / SERIES_CELL_DEGREES), round(180 / SERIES_CELL_DEGREES) - 1)
+        col = math.floor(((lng + 180.0) % 360.0) / SERIES_CELL_DEGREES) % TILE_COLUMNS
+        return row * TILE_COLUMNS + col
+
+    @staticmethod
+    def tile_center(tile_id: int) -> Tuple[float, float]:
+        row, col = divmod(tile_id, TILE_COLUMNS)
+        return ((row + 0.5) * SERIES_CELL_DEGREES - 90.0, (col + 0.5) * SERIES_CELL_DEGREES - 180.0)
+
+    def read(self, tile_ids: List[int], start: date, end: date) -> Dict[str, np.ndarray]:
+        """
+        Rows of the given cells with start <= date <= end, ordered by cell and date, as columns
+        (tile_id, date as datetime64[D], source, observations, and one float column per indicator).
+        """
+        rows = []
+        conn = connect(self.db_path)
+        try:
+            # One indexed range scan per cell, batched under SQLite's bound-parameter limit
+            for i in range(0, len(tile_ids), READ_BATCH):
+                batch = list(tile_ids[i:i + READ_BATCH])
+                rows.extend(conn.execute(
+                    "SELECT tile_id, date, source, observations, ndvi, temperature, water_index FROM indicator_series "
+                    f"WHERE tile_id IN ({','.join('?' * len(batch))}) AND date BETWEEN ? AND ? "
+                    "ORDER BY tile_id, date, source",
+                    batch + [start.isoformat(), end.isoformat()]
+                ).fetchall())
+        finally:
+            conn.close()
+        columns = list(zip(*rows)) if rows else [()] * 7
+        series = {
+            "tile_id": np.array(columns[0], dtype=np.int64),
+            "date": np.array(columns[1], dtype="datetime64[D]"),
+            "source": np.array(columns[2], dtype=np.int8),
+            "observations": np.array(columns[3], dtype=np.int64)
+        }
+        for name, values in zip(INDICATORS, columns[4:]):
+            series[name] = np.array(values, dtype=np.float64)
+        return series
+
+    def append(self, rows: List[tuple]) -> None:
+        """
+        Appends (tile_id, date, source, ndvi, temperature, water_index) baseline rows in one
+        transaction; rows already stored are kept as they are.
+        """
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO indicator_series (tile_id, date, source, ndvi, temperature, water_index) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def add_observations(conn, rows: List[tuple]) -> None:
+        """
+        Adds observation_rows output inside the caller's transaction. A second analysis of
+        a cell on the same day updates that day's row to the mean of all of them.
+        """
+        conn.executemany(
+            "INSERT INTO indicator_series (tile_id, date, source, ndvi, temperature, water_index, observations) "
+            "VALUES (?, ?, ?, ?, ?, ?, 1) "
+            "ON CONFLICT (tile_id, date, source) DO UPDATE SET "
+            "ndvi = (ndvi * observations + excluded.ndvi) / (observations + 1), "
+            "temperature = (temperature * observations + excluded.temperature) / (observations + 1), "
+            "water_index = (water_index * observations + excluded.water_index) / (observations + 1), "
+            "observations = observations + 1",
+            rows
+        )
+
+    @staticmethod
+    def observation_rows(observations: List[Tuple[Dict[str, Any], str]]) -> List[tuple]:
+        """
+        Series rows for (analyzed cell, day as YYYY-MM-DD) pairs.
+        """
+        return [
+            (
+                IndicatorSeriesStore.tile_id(cell["location"]["lat"], cell["location"]["lng"]),
+                day,
+                SOURCE_OBSERVED,
+                cell["indicators"]["ndvi"],
+                cell["indicators"]["temperature"],
+                cell["indicators"]["water_index"]
+            )
+            for cell, day in observations
+        ]
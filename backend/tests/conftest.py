@@ -0,0 +1,43 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# main reads its configuration at import time: point it at scratch storage and one worker
+SCRATCH_DIR = tempfile.mkdtemp(prefix="bio-tests-")
+os.environ["BIO_DB_PATH"] = os.path.join(SCRATCH_DIR, "bio_intelligence.db")
+os.environ["BIO_JOB_DIR"] = os.path.join(SCRATCH_DIR, "job_results")
+os.environ["BIO_ANALYSIS_WORKERS"] = "1"
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    return main
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+    with TestClient(app.app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def db_path():
+    return os.environ["BIO_DB_PATH"]
+
+@pytest.fixture
+def flush_history(app, client):
+    """
+    Flushes the background history writer, so rows recorded so far are queryable.
+    """
+    def flush() -> None:
+        app.history_writer.stop()
+        app.history_writer.start()
+    return flush
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
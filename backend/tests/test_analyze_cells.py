@@ -0,0 +1,50 @@
+import pytest
+
+VIEWPORT = {"min_lat": 12.9, "min_lng": 80.2, "max_lat": 12.95, "max_lng": 80.25}
+# The same viewport panned by about half its width; the two overlap
+PANNED = {"min_lat": 12.9, "min_lng": 80.225, "max_lat": 12.95, "max_lng": 80.275}
+
+def cells_of(client, body):
+    response = client.post("/analyze-cells", json=body)
+    assert response.status_code == 200
+    return response.json()
+
+def test_overlapping_viewports_share_cells(client):
+    first = cells_of(client, {**VIEWPORT, "level": 7})
+    second = cells_of(client, {**PANNED, "level": 7})
+    first_cells = {cell["grid_id"]: cell for cell in first["cells"]}
+    second_cells = {cell["grid_id"]: cell for cell in second["cells"]}
+    shared = set(first_cells) & set(second_cells)
+    assert shared
+    for grid_id in shared:
+        assert first_cells[grid_id] == second_cells[grid_id]
+
+def test_known_ids_are_not_returned(client):
+    first = cells_of(client, {**VIEWPORT, "level": 7})
+    known = [cell["grid_id"] for cell in first["cells"]]
+    panned_all = cells_of(client, {**PANNED, "level": 7})
+    panned_new = cells_of(client, {**PANNED, "level": 7, "known_ids": known})
+    assert panned_new["visible"] == panned_all["visible"] == len(panned_all["cells"])
+    expected = [cell for cell in panned_all["cells"] if cell["grid_id"] not in set(known)]
+    assert expected and panned_new["cells"] == expected
+
+def test_known_ids_of_other_levels_are_ignored(client):
+    level_7 = cells_of(client, {**VIEWPORT, "level": 7})
+    known = [cell["grid_id"].replace("7/", "8/", 1) for cell in level_7["cells"]]
+    assert cells_of(client, {**VIEWPORT, "level": 7, "known_ids": known})["cells"] == level_7["cells"]
+
+def test_default_level_matches_bbox(client):
+    from data_processing.world_grid import WorldGrid
+    response = cells_of(client, VIEWPORT)
+    assert response["level"] == WorldGrid.level_for(*VIEWPORT.values())
+    assert len(response["cells"]) == response["visible"]
+
+@pytest.mark.parametrize("body", [
+    {**VIEWPORT, "known_ids": ["7/abc/1"]},
+    {**VIEWPORT, "known_ids": ["7/1"]},
+    {**VIEWPORT, "level": 21},
+    {**VIEWPORT, "level": 20},
+    {"min_lat": 13.0, "min_lng": 80.2, "max_lat": 12.9, "max_lng": 80.25}
+])
+def test_invalid_requests_are_rejected(client, body):
+    assert client.post("/analyze-cells", json=body).status_code == 400
@@ -0,0 +1,54 @@
+import pytest
+
+def decode(payload):
+    """
+    Rebuilds the default response's per-cell dicts from a compact payload.
+    """
+    columns, tables, grid_size = payload["columns"], payload["tables"], payload["grid_size"]
+    masks = tables["reason_masks"]
+    cells = []
+    for k in range(payload["cells"]):
+        mask = columns["reason_codes"][k]
+        temperature = columns["temperature"][k]
+        indicators = {"grid_id": f"{k // grid_size}_{k % grid_size}"}
+        for name in ["lat", "lng", "ndvi", "land_use", "temperature", "water_index", "biomass", "forest_coverage"]:
+            indicators[name] = columns[name][k]
+        indicators["land_use"] = tables["land_use"][indicators["land_use"]]
+        level = columns["risk_level"][k]
+        cells.append({
+            "grid_id": indicators["grid_id"],
+            "location": {"lat": indicators["lat"], "lng": indicators["lng"]},
+            "indicators": indicators,
+            "rules": {
+                "risk_score": columns["risk_score"][k],
+                "risk_level": tables["risk_level"][level],
+                "color": tables["risk_color"][level],
+                "reasons": [tables["reasons"][i].format(temperature=temperature) for i in masks["reasons"][mask]],
+                "reason_codes": mask
+            },
+            "ml": {
+                "prediction": tables["ml_class"][columns["ml_prediction"][k]],
+                "confidence": columns["ml_confidence"][k],
+                "probabilities": dict(zip(tables["ml_class"], columns["ml_probabilities"][k]))
+            },
+            "impacts": [tables["impacts"][i] for i in masks["impacts"][mask]],
+            "interventions": [tables["interventions"][i] for i in masks["interventions"][mask]]
+        })
+    return cells
+
+@pytest.mark.parametrize("request_body", [
+    {"lat": 12.9, "lng": 80.2},
+    {"lat": -3.4, "lng": -62.2, "urban_growth_pct": 40, "temp_increase": 2.5},
+    # Larger than one tile, so the columns are stitched from several
+    {"lat": 51.5, "lng": -0.1, "grid_size": 70, "temp_increase": 1.5}
+])
+def test_compact_decodes_to_default_response(client, request_body):
+    default = client.post("/analyze-region", json=request_body).json()
+    compact = client.post("/analyze-region", params={"format": "compact"}, json=request_body).json()
+    assert compact["format"] == "compact"
+    cells = decode(compact)
+    assert cells == default["grid"]
+    assert cells[compact["center"]]["grid_id"] == default["grid_id"]
+
+def test_unknown_format_is_rejected(client):
+    assert client.post("/analyze-region", params={"format": "xml"}, json={"lat": 12.9, "lng": 80.2}).status_code == 400
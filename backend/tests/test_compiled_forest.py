@@ -0,0 +1,23 @@
+import numpy as np
+
+from ml.inference import CompiledForest
+from ml.risk_model import BiodiversityRiskModel
+
+def random_features(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(-0.1, 1.1, n), rng.integers(0, 4, n), rng.uniform(15, 45, n), rng.uniform(-0.1, 1.1, n)
+    ])
+
+def test_served_forest_matches_sklearn():
+    model = BiodiversityRiskModel(engine="sklearn").model
+    X = random_features(20000, 1)
+    assert np.array_equal(BiodiversityRiskModel(engine="numpy").forest.predict_proba(X), model.predict_proba(X))
+
+def test_compiled_in_memory_matches_sklearn():
+    model = BiodiversityRiskModel(engine="sklearn").model
+    X = random_features(20000, 2)
+    forest = CompiledForest.from_sklearn(model)
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+    prediction_idx, _ = forest.predict(X)
+    assert np.array_equal(prediction_idx, model.predict(X))
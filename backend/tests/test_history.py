@@ -0,0 +1,67 @@
+import pytest
+
+# A spot no other test analyzes, so the region's rows are the only ones around it
+REGION = {"lat": -33.1, "lng": 150.4}
+BBOX = {"min_lat": -33.125, "min_lng": 150.375, "max_lat": -33.075, "max_lng": 150.425}
+
+@pytest.fixture
+def analyzed(client, flush_history):
+    response = client.post("/analyze-region", json=REGION)
+    assert response.status_code == 200
+    flush_history()
+    return response.json()["grid"]
+
+def test_history_returns_recorded_cells(client, analyzed):
+    rows = client.get("/history", params=BBOX).json()
+    latest = {}
+    for row in rows:
+        latest.setdefault(row["grid_id"], row)
+    assert set(latest) == {cell["grid_id"] for cell in analyzed}
+    for cell in analyzed:
+        row = latest[cell["grid_id"]]
+        assert (row["lat"], row["lng"]) == (cell["location"]["lat"], cell["location"]["lng"])
+        assert row["risk_score"] == cell["rules"]["risk_score"]
+        assert row["analysis"]["rules"] == cell["rules"]
+
+def test_history_bbox_excludes_outside_rows(client, analyzed):
+    center = analyzed[12]["location"]
+    rows = client.get("/history", params={"min_lat": center["lat"] - 1e-6, "max_lat": center["lat"] + 1e-6,
+                                          "min_lng": center["lng"] - 1e-6, "max_lng": center["lng"] + 1e-6}).json()
+    assert rows and all(row["grid_id"] == analyzed[12]["grid_id"] for row in rows)
+
+def test_history_limit_is_validated(client):
+    assert client.get("/history", params={**BBOX, "limit": 0}).status_code == 400
+
+def test_nearest_matches_brute_force(client, analyzed):
+    from storage.history import haversine_km
+    lat, lng = analyzed[7]["location"]["lat"] + 0.001, analyzed[7]["location"]["lng"] - 0.002
+    rows = client.get("/history", params=BBOX).json()
+    expected = sorted(((round(haversine_km(lat, lng, row["lat"], row["lng"]), 4), -row["id"]) for row in rows))[:5]
+
+    nearest = client.get("/history/nearest", params={"lat": lat, "lng": lng, "k": 5}).json()
+    assert [(row["distance_km"], -row["id"]) for row in nearest] == expected
+    assert nearest[0]["grid_id"] == analyzed[7]["grid_id"]
+
+def test_nearest_respects_max_km(client, analyzed):
+    # About 11 km north of the region: nothing within 5 km
+    assert client.get("/history/nearest", params={"lat": -33.0, "lng": 150.4, "max_km": 5}).json() == []
+    assert client.get("/history/nearest", params={"lat": -33.0, "lng": 150.4, "k": 0}).status_code == 400
+
+@pytest.mark.parametrize("response_format", ["json", "compact"])
+def test_cached_responses_are_recorded(client, flush_history, response_format):
+    # A fresh spot per format, viewed twice: the second response comes from the result cache
+    region = {"lat": -20.0, "lng": 140.0 + (response_format == "compact")}
+    bbox = {"min_lat": region["lat"] - 0.025, "min_lng": region["lng"] - 0.025,
+            "max_lat": region["lat"] + 0.025, "max_lng": region["lng"] + 0.025}
+    hits = client.get("/cache/stats").json()["hits"]
+    for _ in range(2):
+        assert client.post("/analyze-region", params={"format": response_format}, json=region).status_code == 200
+    assert client.get("/cache/stats").json()["hits"] == hits + 1
+    flush_history()
+
+    rows = client.get("/history", params=bbox).json()
+    assert len(rows) == 50
+    views = {}
+    for row in rows:
+        views.setdefault(row["grid_id"], []).append(row["analysis"])
+    assert all(len(analyses) == 2 and analyses[0] == analyses[1] for analyses in views.values())
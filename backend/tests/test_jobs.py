@@ -0,0 +1,38 @@
+import os
+import time
+
+import pytest
+
+from jobs.manager import JobManager, TERMINAL_STATES
+
+@pytest.mark.parametrize("kind, params", [
+    ("report", {"location": "Chennai"}),
+    ("report", {"indicators": {"ndvi": "high"}}),
+    ("report", {"impacts": [{"group": "Birds"}]}),
+    ("report-batch", {"reports": [{"rules": []}]}),
+    ("simulate", {"lat": 12.9, "lng": 80.2, "realizations": 100}),
+    ("analyze-region", {"lat": 12.9, "lng": 80.2, "grid_size": 0}),
+    ("unknown", {}),
+])
+def test_bad_jobs_are_rejected_at_submit(client, kind, params):
+    assert client.post("/jobs", json={"kind": kind, "params": params}).status_code == 400
+
+def test_report_job_from_an_analysis_succeeds(client):
+    cell = client.post("/analyze-region", json={"lat": 12.9, "lng": 80.2}).json()
+    response = client.post("/jobs", json={"kind": "report", "params": cell})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    deadline = time.time() + 60
+    while (status := client.get(f"/jobs/{job_id}").json()["status"]) not in TERMINAL_STATES and time.time() < deadline:
+        time.sleep(0.05)
+    assert status == "succeeded"
+    assert client.get(f"/jobs/{job_id}/result").content.startswith(b"%PDF")
+
+def test_sweep_expires_orphaned_partial_files(tmp_path):
+    manager = JobManager(result_dir=str(tmp_path), ttl_seconds=60)
+    stale, fresh = tmp_path / "crashed.pdf.part", tmp_path / "writing.pdf.part"
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    os.utime(stale, (time.time() - 120, time.time() - 120))
+    manager.sweep()
+    assert not stale.exists() and fresh.exists()
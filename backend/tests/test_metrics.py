@@ -0,0 +1,10 @@
+def test_profiler_can_be_switched_on_and_off(client):
+    started = client.post("/metrics/profiler", json={"enabled": True, "interval": 0.005, "reset": True}).json()
+    assert started["running"]
+    client.post("/analyze-region", json={"lat": 12.9, "lng": 80.2})
+    stopped = client.post("/metrics/profiler", json={"enabled": False}).json()
+    assert not stopped["running"]
+    assert client.get("/metrics/profiler").status_code == 200
+
+def test_profiler_interval_is_validated(client):
+    assert client.post("/metrics/profiler", json={"enabled": True, "interval": 5}).status_code == 400
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from ml.inference import CompiledForest
+from ml.registry import ModelRegistry, ModelArtifactError
+from ml.risk_model import BiodiversityRiskModel
+from ml.train import train_classifier, CLASSES
+
+@pytest.fixture(scope="module")
+def model():
+    return train_classifier(n_estimators=5, max_depth=4)
+
+@pytest.fixture
+def registry(tmp_path, model):
+    registry = ModelRegistry(str(tmp_path))
+    registry.save("risk", model, CLASSES)
+    registry.save_compiled("risk", CompiledForest.from_sklearn(model))
+    return registry
+
+def corrupt(path: str) -> None:
+    # Same size, different bytes: only a checksum can tell
+    with open(path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+def test_loads_do_not_hash(registry, monkeypatch):
+    def fail(path):
+        raise AssertionError(f"hashed {path}")
+    monkeypatch.setattr(ModelRegistry, "_sha256", staticmethod(fail))
+    arrays, _ = registry.load_compiled("risk")
+    assert arrays
+    registry.load("risk")
+
+def test_truncated_arrays_are_rejected(registry):
+    with open(os.path.join(registry.compiled_dir("risk"), "threshold.npy"), 'ab') as f:
+        f.write(b"\0")
+    with pytest.raises(ModelArtifactError):
+        registry.load_compiled("risk")
+
+def test_verify_checks_checksums(registry):
+    corrupt(os.path.join(registry.compiled_dir("risk"), "threshold.npy"))
+    registry.load_compiled("risk")
+    with pytest.raises(ModelArtifactError):
+        ModelRegistry(registry.root, verify=True).load_compiled("risk")
+
+def test_verify_checks_the_payload(registry):
+    corrupt(registry.payload_path("risk"))
+    with pytest.raises(ModelArtifactError):
+        ModelRegistry(registry.root, verify=True).load("risk")
+
+def test_missing_compiled_form_is_built_on_first_load(tmp_path, model):
+    registry = ModelRegistry(str(tmp_path))
+    registry.save("risk", model, CLASSES)
+    assert registry.load_compiled("risk")[0] == {}
+
+    X = np.array([[0.2, 2, 35.0, 0.1], [0.8, 0, 22.0, 0.9]])
+    served = BiodiversityRiskModel(registry, "risk", "numpy")
+    assert np.array_equal(served.forest.predict_proba(X), model.predict_proba(X))
+    arrays, header = registry.load_compiled("risk")
+    assert arrays and header["compiled"]["max_depth"] == served.forest.max_depth
+
+def test_retrained_payload_makes_the_compiled_form_stale(registry):
+    registry.save("risk", train_classifier(n_estimators=3, max_depth=3), CLASSES)
+    assert registry.load_compiled("risk")[0] == {}
+    BiodiversityRiskModel(registry, "risk", "numpy").forest
+    assert registry.load_compiled("risk")[0]
@@ -0,0 +1,56 @@
+import asyncio
+
+from notifications.evaluator import NotificationEvaluator
+
+class StubStore:
+    def __init__(self, watches):
+        self.watches = watches
+
+    def active(self):
+        return list(self.watches)
+
+def watch(watch_id, lat, lng, threshold):
+    return {"id": watch_id, "region_name": f"watch {watch_id}", "lat": lat, "lng": lng, "threshold": threshold}
+
+def test_shared_cells_score_like_separate_passes(app):
+    # Overlapping windows: together they score fewer distinct cells than apart
+    watches = [watch(1, 12.9, 80.2, 5), watch(2, 12.91, 80.21, 5), watch(3, -3.4, -62.2, 5)]
+    evaluator = NotificationEvaluator(app.analyzer, StubStore(watches))
+    together, unique_cells = evaluator.score_watches(watches)
+    apart = [evaluator.score_watches([w])[0][0] for w in watches]
+    assert together == apart
+    assert unique_cells < sum(summary["cells"] for summary in apart)
+
+def test_alert_then_cleared(app):
+    store = StubStore([watch(1, 12.9, 80.2, 0)])
+    evaluator = NotificationEvaluator(app.analyzer, store)
+    first = evaluator.evaluate()
+    assert [event["type"] for event in first] == ["alert"]
+    # Still over the threshold: no new event
+    assert evaluator.evaluate() == []
+    store.watches = [watch(1, 12.9, 80.2, 1000)]
+    second = evaluator.evaluate()
+    assert [event["type"] for event in second] == ["cleared"]
+    assert second[0]["sequence"] == first[0]["sequence"] + 1
+    assert evaluator.stats()["active_alerts"] == 0
+
+def test_subscribers_receive_events_and_count_drops(app):
+    store = StubStore([])
+    evaluator = NotificationEvaluator(app.analyzer, store)
+
+    async def run():
+        queue, active = evaluator.subscribe()
+        assert active == []
+        store.watches = [watch(1, 12.9, 80.2, 0)]
+        await asyncio.get_running_loop().run_in_executor(None, evaluator.evaluate)
+        event = await asyncio.wait_for(queue.get(), 5)
+        # A full queue drops further events and counts them
+        while not queue.full():
+            queue.put_nowait(event)
+        evaluator._offer(queue, [event, event])
+        evaluator.unsubscribe(queue)
+        return event
+
+    event = asyncio.run(run())
+    assert event["type"] == "alert" and event["notification_id"] == 1
+    assert evaluator.stats()["dropped_events"] == 2
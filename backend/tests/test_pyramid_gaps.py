@@ -0,0 +1,56 @@
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+from data_processing.pyramid import TilePyramid, build_pyramid, tile_degrees
+from data_processing.raster import RasterSource, NpyScene
+from data_processing.satellite_features import SatelliteProcessor, LAND_USE_CODES
+from data_processing.world_grid import WorldGrid
+
+ZOOM = 8
+BBOX = (0.1, 0.1, 0.9, 0.9)
+
+@pytest.fixture
+def pyramid_with_gap(tmp_path):
+    """
+    A one-level pyramid of a forest scene over (0, 0)-(1, 1), with the tile at its south-west corner removed.
+    """
+    stack = np.empty((2, 100, 100), dtype=np.float32)
+    stack[0], stack[1] = 0.05, 0.5
+    scene_path = str(tmp_path / "scene.npy")
+    np.save(scene_path, stack)
+    with open(scene_path + ".json", "w", encoding="utf-8") as f:
+        json.dump({"bounds": [0, 0, 1, 1], "bands": {"red": 0, "nir": 1}}, f)
+    path = str(tmp_path / "pyramid.mbtiles")
+    build_pyramid(RasterSource([NpyScene(scene_path)]), path, ZOOM, ZOOM)
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DELETE FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                     (ZOOM, int(180 // tile_degrees(ZOOM)), int(90 // tile_degrees(ZOOM)) - 1))
+    conn.close()
+    return TilePyramid(path)
+
+def test_missing_tile_cells_are_simulated(pyramid_with_gap):
+    real = SatelliteProcessor(pyramid=pyramid_with_gap).get_grid_columns(*BBOX, grid_size=8)
+    simulated = SatelliteProcessor().get_grid_columns(*BBOX, grid_size=8)
+    # Cells wholly south-west of the missing tile's north-east corner (~0.70°)
+    gap = (real["row"] < 6) & (real["col"] < 6)
+    for key in real:
+        np.testing.assert_array_equal(real[key][gap], simulated[key][gap])
+    assert (real["land_use"][~gap] == LAND_USE_CODES["forest"]).all()
+
+def test_missing_tile_world_cells_are_simulated(pyramid_with_gap):
+    level = 4
+    rows, cols = WorldGrid.cells_in(*WorldGrid.cell_range(*BBOX, level))
+    real = SatelliteProcessor(pyramid=pyramid_with_gap).world_cell_columns(level, rows, cols)
+    simulated = SatelliteProcessor().world_cell_columns(level, rows, cols)
+    corner = tile_degrees(ZOOM)
+    d = WorldGrid.cell_degrees(level)
+    gap = (real["lat"] + d / 2 <= corner) & (real["lng"] + d / 2 <= corner)
+    assert gap.any() and not gap.all()
+    for key in real:
+        np.testing.assert_array_equal(real[key][gap], simulated[key][gap])
+    assert (real["land_use"][~gap] == LAND_USE_CODES["forest"]).all()
@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pytest
+
+from data_processing.raster import RasterSource, NpyScene
+from data_processing.satellite_features import SatelliteProcessor, LAND_USE_CODES
+from data_processing.world_grid import WorldGrid
+
+NODATA = -9999.0
+BBOX = (0.1, 0.1, 0.9, 0.9)
+
+@pytest.fixture
+def half_nodata_scene(tmp_path):
+    """
+    A forest scene over (0, 0)-(1, 1) whose western half is nodata.
+    """
+    stack = np.empty((3, 100, 100), dtype=np.float32)
+    stack[0], stack[1], stack[2] = 0.05, 0.5, 0.1
+    stack[:, :, :50] = NODATA
+    path = str(tmp_path / "scene.npy")
+    np.save(path, stack)
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump({"bounds": [0, 0, 1, 1], "bands": {"red": 0, "nir": 1, "green": 2}, "nodata": NODATA}, f)
+    return NpyScene(path)
+
+def test_nodata_cells_are_simulated(half_nodata_scene):
+    real = SatelliteProcessor(source=RasterSource([half_nodata_scene])).get_grid_columns(*BBOX, grid_size=8)
+    simulated = SatelliteProcessor().get_grid_columns(*BBOX, grid_size=8)
+    # Cells 0-3 of each row lie in the nodata half
+    gap = real["col"] < 4
+    for key in real:
+        np.testing.assert_array_equal(real[key][gap], simulated[key][gap])
+    assert (real["land_use"][~gap] == LAND_USE_CODES["forest"]).all()
+    assert (real["ndvi"][~gap] > 0.8).all()
+
+def test_nodata_world_cells_are_simulated(half_nodata_scene):
+    processor = SatelliteProcessor(source=RasterSource([half_nodata_scene]))
+    level = 4
+    rows, cols = WorldGrid.cells_in(*WorldGrid.cell_range(*BBOX, level))
+    real = processor.world_cell_columns(level, rows, cols)
+    simulated = SatelliteProcessor().world_cell_columns(level, rows, cols)
+    gap = real["lng"] < 0.5
+    assert gap.any() and not gap.all()
+    for key in real:
+        np.testing.assert_array_equal(real[key][gap], simulated[key][gap])
+    assert (real["land_use"][~gap] == LAND_USE_CODES["forest"]).all()
@@ -0,0 +1,26 @@
+import pytest
+
+from regions.catalog import RegionCatalog, CATALOG_PATH
+
+@pytest.fixture(scope="module")
+def catalog():
+    return RegionCatalog.load(CATALOG_PATH)
+
+@pytest.mark.parametrize("lat, lng, name", [
+    (12.9, 80.2, "Coromandel Coastal Sector (Chennai)"),
+    (29.5, 79.0, "Jim Corbett National Park (Northern Sector)"),
+    (20.0, 75.0, None),
+    # Boundary points were outside the original open ranges and stay outside
+    (12.0, 80.0, None),
+    (12.5, 79.5, None),
+    (13.5, 80.5, None),
+    (29.0, 79.0, None),
+    (29.5, 78.5, None),
+    (30.0, 79.5, None),
+])
+def test_find_matches_the_original_ranges(catalog, lat, lng, name):
+    region = catalog.find(lat, lng)
+    assert (region.name if region else None) == name
+
+def test_plan_json_falls_back_to_the_generic_plan(catalog):
+    assert b'"location":"Regional Sector [12.00N, 80.00E]"' in catalog.plan_json(12.0, 80.0, 20.0)
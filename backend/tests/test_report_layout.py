@@ -0,0 +1,100 @@
+import random
+import re
+
+import pytest
+
+from reports.builder import ReportBuilder, ReportDocument
+
+TIMESTAMP = "2026-01-01 00:00:00"
+TOKEN = re.compile(rb"\((?:\\.|[^\\)])*\)|/[^\s/\[\]()]+|[-+]?\d*\.?\d+|[A-Za-z*']+")
+
+def report(level: str, score: int, reasons: int) -> dict:
+    return {
+        "location": {"lat": 12.9, "lng": 80.2},
+        "indicators": {"ndvi": 0.5, "forest_coverage": 40.0, "biomass": 120.0, "temperature": 31.2},
+        "rules": {"risk_level": level, "risk_score": score, "reasons": [f"Reason {i}" for i in range(reasons)]},
+        "impacts": [{"group": "Birds", "impact": "Loss of habitat."}] * reasons,
+        "interventions": ["Reforest."]
+    }
+
+# A High report leaves a colored fill behind, the long one pushes later blocks to other positions and pages
+REPORTS = [report("High", 8, 1), report("Low", 1, 0), report("Medium", 5, 12), report("Low", 2, 3)]
+
+def drawing(contents: bytes) -> list:
+    """
+    What a page content stream draws: text and painted rectangles with absolute
+    positions, font and colors, from the handful of operators FPDF writes.
+    """
+    # PDF's initial graphics state: black fill and stroke, 1 pt lines
+    state = {"tx": 0.0, "ty": 0.0, "fill": (0.0, 0.0, 0.0), "stroke": (0.0, 0.0, 0.0), "font": None, "width": 1.0}
+    stack, operands, events, rects, position = [], [], [], [], (0.0, 0.0)
+    for token in TOKEN.findall(contents):
+        if token[:1] in b"(/" or not token[:1].isalpha():
+            operands.append(token)
+            continue
+        op, args = token.decode("latin1"), operands
+        operands = []
+        numbers = [float(a) for a in args if a[:1] not in b"(/"]
+        if op == "q":
+            stack.append(dict(state))
+        elif op == "Q":
+            state = stack.pop()
+        elif op == "cm":
+            state["tx"] += numbers[4]
+            state["ty"] += numbers[5]
+        elif op in ("g", "rg"):
+            state["fill"] = tuple(numbers) * (3 if op == "g" else 1)
+        elif op in ("G", "RG"):
+            state["stroke"] = tuple(numbers) * (3 if op == "G" else 1)
+        elif op == "w":
+            state["width"] = numbers[0]
+        elif op == "Tf":
+            state["font"] = (args[0], numbers[0])
+        elif op == "Td":
+            position = (numbers[0], numbers[1])
+        elif op == "Tj":
+            events.append(("text", args[0], state["font"], state["fill"],
+                           round(position[0] + state["tx"], 2), round(position[1] + state["ty"], 2)))
+        elif op == "re":
+            rects.append((round(numbers[0] + state["tx"], 2), round(numbers[1] + state["ty"], 2), numbers[2], numbers[3]))
+        elif op in ("f", "S", "B"):
+            for rect in rects:
+                events.append(("rect", op, rect, state["fill"] if op != "S" else None,
+                               state["stroke"] if op != "f" else None, state["width"] if op != "f" else None))
+            rects = []
+    return events
+
+def assert_same_drawing(actual, expected) -> None:
+    """
+    Equal, except that positions may differ by rounding (FPDF writes them to 0.01 pt).
+    """
+    if isinstance(expected, float):
+        assert actual == pytest.approx(expected, abs=0.011)
+    elif isinstance(expected, (list, tuple)):
+        assert type(actual) is type(expected) and len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert_same_drawing(a, e)
+    else:
+        assert actual == expected
+
+def render(reports: list) -> list:
+    random.seed(7)
+    pdf = ReportDocument()
+    for data in reports:
+        ReportBuilder.add_report(pdf, data, TIMESTAMP)
+    return [drawing(bytes(page.contents)) for _, page in sorted(pdf.pages.items())]
+
+def test_replayed_layout_draws_like_the_layout_itself(monkeypatch):
+    ReportDocument._static_blocks.clear()
+    replayed = [render(REPORTS), render(REPORTS[::-1])]
+    assert ReportDocument._static_blocks
+
+    def draw_directly(pdf, name, h, draw):
+        if pdf.will_page_break(h):
+            pdf.add_page()
+        draw()
+    monkeypatch.setattr(ReportDocument, "static_block", draw_directly)
+    assert_same_drawing(replayed, [render(REPORTS), render(REPORTS[::-1])])
+
+def test_reports_render(client):
+    assert ReportBuilder.render(REPORTS[0]).startswith(b"%PDF")
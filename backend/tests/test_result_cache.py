@@ -0,0 +1,29 @@
+from analysis.result_cache import ResultCache, DiskBackend
+
+def test_disk_cache_is_shared_between_workers(tmp_path):
+    # Two workers' caches over one directory, both started before anything was stored
+    first = ResultCache(DiskBackend(str(tmp_path)))
+    second = ResultCache(DiskBackend(str(tmp_path)))
+    first.put("a", b"payload")
+    assert second.get("a") == b"payload"
+    assert second.stats()["entries"] == 1 and second.stats()["hits"] == 1
+
+def test_entries_removed_by_another_worker_are_misses(tmp_path):
+    first = ResultCache(DiskBackend(str(tmp_path)), max_entries=1)
+    second = ResultCache(DiskBackend(str(tmp_path)))
+    first.put("a", b"payload")
+    assert second.get("a") == b"payload"
+    # The first worker's eviction deletes the file the second has indexed
+    first.put("b", b"other")
+    assert second.get("a") is None
+    assert second.stats()["entries"] == 0
+    assert second.get("b") == b"other"
+
+def test_adopted_entries_respect_the_limits(tmp_path):
+    writer = ResultCache(DiskBackend(str(tmp_path)))
+    reader = ResultCache(DiskBackend(str(tmp_path)), max_entries=1)
+    writer.put("a", b"1")
+    writer.put("b", b"2")
+    assert reader.get("a") == b"1"
+    assert reader.get("b") == b"2"
+    assert reader.stats()["entries"] == 1
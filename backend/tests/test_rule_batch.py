@@ -0,0 +1,34 @@
+import numpy as np
+
+from risk_engine.ecological_risk import AdvancedRiskEngine
+from data_processing.satellite_features import LAND_USE_CLASSES
+
+def test_batch_matches_per_cell_rules():
+    rng = np.random.default_rng(7)
+    n = 2000
+    ndvi = np.round(rng.uniform(0, 1, n), 3)
+    land_use = rng.integers(0, len(LAND_USE_CLASSES), n)
+    temperature = np.round(rng.uniform(20, 40, n), 1)
+    water_index = np.round(rng.uniform(0, 1, n), 2)
+    # Exact threshold values, where < and > matter
+    ndvi[:4] = [0.3, 0.5, 0.2999, 0.4999]
+    temperature[:4] = [33.0, 30.0, 33.1, 30.1]
+    water_index[:4] = [0.2, 0.19, 0.2, 0.21]
+
+    batch = AdvancedRiskEngine.batch_to_records(
+        AdvancedRiskEngine.evaluate_risk_batch(ndvi, land_use, temperature, water_index)
+    )
+    expected = [
+        AdvancedRiskEngine.evaluate_risk(n_, LAND_USE_CLASSES[lu], t, w)
+        for n_, lu, t, w in zip(ndvi.tolist(), land_use.tolist(), temperature.tolist(), water_index.tolist())
+    ]
+    assert batch == expected
+
+def test_model_batch_matches_single_predictions():
+    from ml.risk_model import BiodiversityRiskModel
+    model = BiodiversityRiskModel()
+    rng = np.random.default_rng(11)
+    rows = [(round(rng.uniform(0, 1), 3), LAND_USE_CLASSES[rng.integers(0, 4)], round(rng.uniform(20, 40), 1),
+             round(rng.uniform(0, 1), 2)) for _ in range(200)]
+    features = np.array([[n, LAND_USE_CLASSES.index(lu), t, w] for n, lu, t, w in rows])
+    assert model.batch_to_records(model.predict_batch(features)) == [model.predict(*row) for row in rows]
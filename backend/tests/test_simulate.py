@@ -0,0 +1,16 @@
+def test_single_realization_matches_analyze_region(client):
+    body = {"lat": 12.9, "lng": 80.2, "urban_growth_pct": 10, "temp_increase": 1.0}
+    simulated = client.post("/simulate", json=body)
+    assert simulated.status_code == 200
+    assert simulated.json() == client.post("/analyze-region", json=body).json()
+
+def test_ensemble_summarizes_every_cell(client):
+    response = client.post("/simulate", json={"lat": 12.9, "lng": 80.2, "realizations": 50, "temp_increase_sd": 0.5})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["realizations"] == 50 and len(result["grid"]) == 25
+
+def test_ensemble_parameters_are_validated(client):
+    assert client.post("/simulate", json={"lat": 12.9, "lng": 80.2, "realizations": 0}).status_code == 400
+    assert client.post("/simulate", json={"lat": 12.9, "lng": 80.2, "realizations": 10,
+                                          "temp_increase_sd": -1}).status_code == 400
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from analysis.trends import TrendEngine
+from storage.database import init_db
+from storage.history import AnalysisHistoryWriter
+from storage.timeseries import IndicatorSeriesStore
+
+def test_baseline_is_a_function_of_cell_and_month():
+    months = np.arange(np.datetime64("2024-01", "M"), np.datetime64("2026-01", "M"))
+    tiles = np.array([IndicatorSeriesStore.tile_id(12.9, 80.2), IndicatorSeriesStore.tile_id(-3.4, -60.1)])
+    together = TrendEngine.baseline(tiles, months)
+    alone = TrendEngine.baseline(tiles[1:], months[6:])
+    for name, values in together.items():
+        assert np.array_equal(values, TrendEngine.baseline(tiles, months)[name])
+        assert np.array_equal(values[1:, 6:], alone[name])
+
+def test_trend_data_is_stable_across_calls(client):
+    params = {"lat": 47.61, "lng": 8.53, "months": 24}
+    first = client.get("/trend-data", params=params).json()
+    # The first call stored the baseline; the second reads it back
+    assert client.get("/trend-data", params=params).json() == first
+    assert len(first) == 24 and all(month["observations"] == 0 for month in first)
+
+def test_trend_data_validates_window(client):
+    assert client.get("/trend-data", params={"lat": 1, "lng": 2, "months": 0}).status_code == 400
+    assert client.get("/trend-data", params={"lat": 1, "lng": 2, "window": 0}).status_code == 400
+
+def test_same_day_observations_are_averaged(tmp_path):
+    db_path = str(tmp_path / "series.db")
+    init_db(db_path)
+
+    def cell(ndvi: float, temperature: float):
+        return {"grid_id": "0_0", "location": {"lat": 1.005, "lng": 2.005}, "rules": {"risk_score": 1},
+                "indicators": {"ndvi": ndvi, "temperature": temperature, "water_index": 0.2}}
+
+    writer = AnalysisHistoryWriter(db_path=db_path)
+    writer.start()
+    for ndvi, temperature in [(0.4, 30.0), (0.8, 31.0), (0.6, 35.0)]:
+        writer.record([cell(ndvi, temperature)])
+    writer.stop()
+
+    # Observations are dated by their UTC day
+    today = datetime.now(timezone.utc).date()
+    month = TrendEngine(IndicatorSeriesStore(db_path)).monthly(1.005, 2.005, 1, end=today)[0]
+    assert month["observations"] == 3
+    assert month["ndvi"] == 0.6 and month["temperature"] == 32.0
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import axios from 'axios';
 import Sidebar from './Sidebar';
 import MapView from './MapView';
@@ -6,6 +6,8 @@ import SatelliteAnalysis from './SatelliteAnalysis';
 import MitigationPlan from './MitigationPlan';
 
 const API_BASE = 'http://localhost:8000';
+// Cached world-grid cells are dropped beyond this many
+const MAX_CACHED_CELLS = 5000;
 
 function Dashboard() {
     const [analysisData, setAnalysisData] = useState(null);
@@ -13,19 +15,46 @@ function Dashboard() {
     const [trendData, setTrendData] = useState([]);
     const [forecastData, setForecastData] = useState([]);
     const [alerts, setAlerts] = useState([]);
+    const [cellInsights, setCellInsights] = useState({});
     const [loading, setLoading] = useState(false);
     const [isGeneratingReport, setIsGeneratingReport] = useState(false);
     const [currentCoords, setCurrentCoords] = useState(null);
     const [showSatelliteDeepDive, setShowSatelliteDeepDive] = useState(false);
     const [showMitigationPlan, setShowMitigationPlan] = useState(false);
+    // World-grid cells fetched so far (baseline scenario), by id, for one grid level
+    const cellCache = useRef({ level: null, cells: {} });
+
+    const fetchCells = async (coords, bounds) => {
+        const cache = cellCache.current;
+        if (Object.keys(cache.cells).length > MAX_CACHED_CELLS) cache.cells = {};
+        // Only cells the server has not sent before are computed and returned
+        const res = await axios.post(`${API_BASE}/analyze-cells`, { ...bounds, known_ids: Object.keys(cache.cells) });
+        const { level, cell_degrees, rows, cols, cells } = res.data;
+        // Ids of another level are ignored by the server, so a level change returns every cell
+        if (level !== cache.level) {
+            cache.level = level;
+            cache.cells = {};
+        }
+        cells.forEach(cell => { cache.cells[cell.grid_id] = cell; });
+
+        const grid = [];
+        for (let row = rows[0]; row < rows[1]; row++) {
+            for (let col = cols[0]; col < cols[1]; col++) {
+                const cell = cache.cells[`${level}/${row}/${col}`];
+                if (cell) grid.push(cell);
+            }
+        }
+        // The clicked point's cell stands for the region, as the centre cell does for /analyze-region
+        const centerId = `${level}/${Math.floor((coords.lat + 90) / cell_degrees)}/${Math.floor((coords.lng + 180) / cell_degrees)}`;
+        const center = cache.cells[centerId] || grid[Math.floor(grid.length / 2)];
+        return { ...center, cell_degrees, grid };
+    };
 
     const fetchAnalysis = async (coords, params = null) => {
         if (!coords || typeof coords.lat !== 'number') return;
 
         setLoading(true);
         try {
-            const endpoint = params ? `${API_BASE}/simulate` : `${API_BASE}/analyze-region`;
-
             const bounds = {
                 min_lat: coords.lat - 0.025,
                 max_lat: coords.lat + 0.025,
@@ -33,25 +62,27 @@ function Dashboard() {
                 max_lng: coords.lng + 0.025
             };
 
-            const payload = params ? { ...coords, ...bounds, ...params } : { ...coords, ...bounds };
-
-            const res = await axios.post(endpoint, payload);
+            // Scenarios run on a per-request grid; the baseline map reuses cached world-grid cells
+            const res = params
+                ? await axios.post(`${API_BASE}/simulate`, { ...coords, ...bounds, ...params })
+                : { data: await fetchCells(coords, bounds) };
 
             if (res.data) {
                 setAnalysisData(res.data);
                 setSelectedCell(res.data);
 
                 if (!params) {
-                    // Parallel fetch for trends, forecast, and alerts
-                    const [trendRes, forecastRes, alertsRes] = await Promise.all([
-                        axios.get(`${API_BASE}/trend-data`, { params: coords }),
-                        axios.get(`${API_BASE}/forecast`, { params: coords }),
-                        axios.get(`${API_BASE}/alerts`, { params: coords })
-                    ]);
-
-                    setTrendData(trendRes.data || []);
-                    setForecastData(forecastRes.data || []);
-                    setAlerts(alertsRes.data || []);
+                    // One bulk call: trends, forecast and alerts for the clicked point and every grid cell
+                    const cells = res.data.grid || [];
+                    const insightsRes = await axios.post(`${API_BASE}/insights`, {
+                        points: [coords, ...cells.map(cell => cell.location)]
+                    });
+                    const [regionInsights, ...cellResults] = insightsRes.data.points;
+
+                    setTrendData(regionInsights.trends || []);
+                    setForecastData(regionInsights.forecast || []);
+                    setAlerts(regionInsights.alerts || []);
+                    setCellInsights(Object.fromEntries(cells.map((cell, i) => [cell.grid_id, cellResults[i]])));
                 }
             }
         } catch (err) {
@@ -72,15 +103,11 @@ function Dashboard() {
         if (!cell) return;
         setSelectedCell(cell);
 
-        const coords = cell.location ? { lat: cell.location.lat, lng: cell.location.lng } : null;
-        if (coords) {
-            axios.get(`${API_BASE}/trend-data`, { params: coords })
-                .then(res => setTrendData(res.data || []))
-                .catch(err => console.error("Error fetching cell trends:", err));
-
-            axios.get(`${API_BASE}/forecast`, { params: coords })
-                .then(res => setForecastData(res.data || []))
-                .catch(err => console.error("Error fetching forecast:", err));
+        // Cell insights arrive with the region analysis; no per-click requests
+        const insights = cellInsights[cell.grid_id];
+        if (insights) {
+            setTrendData(insights.trends || []);
+            setForecastData(insights.forecast || []);
         }
     };
 
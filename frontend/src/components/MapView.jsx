@@ -209,10 +209,11 @@ const MapView = ({ onSelectRegion, onCellSelect, currentAnalysis, activeCell, ta
                 {gridCells.map((cell, idx) => {
                     if (!cell || !cell.location) return null;
                     const coords = cell.location;
-                    // Slightly overlap cells to ensure no gaps (0.01 width/height)
+                    // Slightly overlap cells to ensure no gaps (world-grid cells report their size, others are 0.01 wide)
+                    const half = (currentAnalysis?.cell_degrees || 0.01) / 2 + 0.0001;
                     const bounds = [
-                        [coords.lat - 0.0051, coords.lng - 0.0051],
-                        [coords.lat + 0.0051, coords.lng + 0.0051]
+                        [coords.lat - half, coords.lng - half],
+                        [coords.lat + half, coords.lng + half]
                     ];
                     const isActive = activeCell?.grid_id === cell.grid_id;
                     const cellColor = getHeatmapColor(cell);